@@ -6,7 +6,44 @@ Handles chat messages with AI agents
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-from openai import OpenAI
+import sys
+import time
+import threading
+
+# Shared agent router and response cache live in src/ (bundled via vercel.json includeFiles).
+# Both import numpy, so they are loaded on first use instead of at cold start;
+# the cache module is not loaded at all unless RESPONSE_CACHE=1.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+RESPONSE_CACHE = os.environ.get('RESPONSE_CACHE', '0') == '1'
+
+# Config is read once per instance; warm invocations reuse it
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+CHAT_MODEL = os.environ.get('CHAT_MODEL', 'gpt-4o-mini')
+CHAT_TIMEOUT = float(os.environ.get('CHAT_TIMEOUT', '30'))
+
+# Completions go straight to the REST endpoint over one pooled httpx client:
+# the openai SDK costs ~0.7 s to import plus ~0.3 s on its first call, which
+# every cold start paid. httpx itself is only imported when a completion is
+# needed (cache hits and preflights skip it).
+_http_client = None
+_client_lock = threading.Lock()
+
+def get_http_client():
+    """Shared client for the OpenAI API (created on first use, keeps its connections)"""
+    global _http_client
+    if _http_client is None:
+        with _client_lock:
+            if _http_client is None:
+                import httpx
+                _http_client = httpx.Client(
+                    base_url=OPENAI_BASE_URL,
+                    headers={'Authorization': f'Bearer {OPENAI_API_KEY}'},
+                    http2=os.environ.get('HTTP_HTTP2', '0') == '1',
+                    limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+                    timeout=httpx.Timeout(CHAT_TIMEOUT, connect=5.0)
+                )
+    return _http_client
 
 # Agent configurations
 AGENTS = {
@@ -43,25 +80,19 @@ AGENTS = {
 }
 
 def route_to_agent(message, topic):
-    """Route message to appropriate agent based on content"""
-    message_lower = message.lower()
-    
-    # Simple keyword-based routing
-    if any(word in message_lower for word in ['marketing', 'brand', 'campaign', 'audience']):
-        return 'aurora'
-    elif any(word in message_lower for word in ['design', 'ui', 'ux', 'interface', 'visual']):
-        return 'helios'
-    elif any(word in message_lower for word in ['tech', 'code', 'api', 'backend', 'infrastructure']):
-        return 'hephaestus'
-    elif any(word in message_lower for word in ['data', 'analysis', 'research', 'knowledge']):
-        return 'athena'
-    else:
-        return 'elara'  # Default to CEO
+    """Route message to appropriate agent based on content (shared router)"""
+    from agent_router import route_message
+    return route_message(message)
 
 def generate_response(agent_id, message, topic):
-    """Generate AI response for agent"""
-    # Initialize OpenAI client with API key from environment
-    client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+    """Generate AI response for agent (repeated topic/message pairs come from the cache when RESPONSE_CACHE=1)"""
+    response_cache = None
+    if RESPONSE_CACHE:
+        from response_cache import response_cache
+        cached = response_cache.get(agent_id, topic, message)
+        if cached is not None:
+            return cached
+    
     agent = AGENTS[agent_id]
     
     system_prompt = f"""You are {agent['name']}, {agent['role']} at Sentient Sphere Technologies.
@@ -74,23 +105,27 @@ Be helpful, insightful, and stay in character."""
 
     try:
         # Debug: Check if API key is loaded
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if not api_key:
+        if not OPENAI_API_KEY:
             return "Error: OPENAI_API_KEY not found in environment"
-        if len(api_key) < 20:
-            return f"Error: OPENAI_API_KEY seems invalid (length: {len(api_key)})"
+        if len(OPENAI_API_KEY) < 20:
+            return f"Error: OPENAI_API_KEY seems invalid (length: {len(OPENAI_API_KEY)})"
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        started = time.perf_counter()
+        response = get_http_client().post('/chat/completions', json={
+            "model": CHAT_MODEL,
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": message}
             ],
-            max_tokens=150,
-            temperature=0.7
-        )
+            "max_tokens": 150,
+            "temperature": 0.7
+        })
+        response.raise_for_status()
         
-        return response.choices[0].message.content
+        text = response.json()["choices"][0]["message"]["content"]
+        if response_cache is not None:
+            response_cache.put(agent_id, topic, message, text, latency=time.perf_counter() - started)
+        return text
     except Exception as e:
         # Return detailed error for debugging
         import traceback
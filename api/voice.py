@@ -1,20 +1,47 @@
 """
 Vercel Serverless Function - Voice Endpoint
-Handles text-to-speech with ElevenLabs
+Handles text-to-speech with ElevenLabs (JSON/base64 by default, or a
+streamed audio/mpeg body with "stream": true)
 """
 
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-import requests
+import httpx
 import base64
+from urllib.parse import urlsplit
 
 ELEVENLABS_API_KEY = os.environ.get('ELEVENLABS_API_KEY')
-ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/text-to-speech"
+ELEVENLABS_BASE_URL = os.environ.get('ELEVENLABS_BASE_URL', 'https://api.elevenlabs.io/v1').rstrip('/')
+ELEVENLABS_API_URL = f"{ELEVENLABS_BASE_URL}/text-to-speech"
+HTTP_HTTP2 = os.environ.get('HTTP_HTTP2', '0') == '1'
+
+# Shared client: warm invocations reuse the pooled keep-alive connection
+# instead of paying DNS + TCP + TLS on every request. Built on first use so
+# preflights on a cold instance don't pay for the TLS context.
+_http_client = None
+
+def get_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            http2=HTTP_HTTP2,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60),
+            timeout=httpx.Timeout(30.0, connect=5.0)
+        )
+    return _http_client
 
 class handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so streamed audio can use chunked transfer encoding
+    protocol_version = 'HTTP/1.1'
+
     def do_POST(self):
-        """Handle POST requests for voice synthesis"""
+        """Handle POST requests for voice synthesis
+
+        Default response is JSON with base64 audio. With "stream": true in the
+        body (or ?stream=1) the ElevenLabs stream is passed through as
+        audio/mpeg chunks, so playback can start on the first one.
+        """
         try:
             # Read request body
             content_length = int(self.headers['Content-Length'])
@@ -24,6 +51,7 @@ class handler(BaseHTTPRequestHandler):
             # Extract data
             text = data.get('text', '')
             voice_id = data.get('voice_id', 'EXAVITQu4vr4xnSDxMaL')
+            stream = data.get('stream') is True or 'stream=1' in urlsplit(self.path).query.split('&')
             
             if not text:
                 raise ValueError("No text provided")
@@ -44,34 +72,59 @@ class handler(BaseHTTPRequestHandler):
                 }
             }
             
-            response = requests.post(url, json=payload, headers=headers)
+            if stream:
+                self.stream_audio(f"{url}/stream", payload, headers)
+                return
+            
+            response = get_http_client().post(url, json=payload, headers=headers)
             
             if response.status_code == 200:
                 # Convert audio to base64
                 audio_base64 = base64.b64encode(response.content).decode('utf-8')
-                
-                # Send response
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                response_data = {
+                self.send_json(200, {
                     'audio': audio_base64,
                     'format': 'mp3'
-                }
-                self.wfile.write(json.dumps(response_data).encode('utf-8'))
+                })
             else:
                 raise Exception(f"ElevenLabs API error: {response.status_code}")
                 
         except Exception as e:
             # Error response
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
+            self.send_json(500, {'error': str(e)})
+    
+    def stream_audio(self, url, payload, headers):
+        """Pass the ElevenLabs MP3 stream through as chunked audio/mpeg"""
+        with get_http_client().stream("POST", url, json=payload, headers=headers) as response:
+            # Errors before the first byte still get a JSON 500
+            if response.status_code != 200:
+                raise Exception(f"ElevenLabs API error: {response.status_code}")
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'audio/mpeg')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.send_header('Cache-Control', 'no-store')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
-            error_data = {'error': str(e)}
-            self.wfile.write(json.dumps(error_data).encode('utf-8'))
+            
+            try:
+                for chunk in response.iter_bytes():
+                    if chunk:
+                        self.wfile.write(b"%X\r\n%s\r\n" % (len(chunk), chunk))
+                        self.wfile.flush()
+            except Exception:
+                # Headers are gone: drop the connection so the client sees a truncated body
+                self.close_connection = True
+                return
+            self.wfile.write(b"0\r\n\r\n")
+    
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         """Handle CORS preflight"""
@@ -79,5 +132,5 @@ class handler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
-
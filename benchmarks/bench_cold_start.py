@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Arranque a frio das funções serverless (api/chat.py, api/voice.py)
+Cada execução corre num processo Python novo (como uma instância fria):
+    import     tempo a importar o módulo do handler
+    1.º pedido latência do primeiro pedido (inclui imports e clientes preguiçosos)
+    quentes    p50 dos pedidos seguintes na mesma instância
+    total      do arranque do processo até à primeira resposta
+
+O OpenAI e o ElevenLabs são simulados por um servidor HTTP local
+(OPENAI_BASE_URL / ELEVENLABS_BASE_URL), por isso não entra o custo de TLS;
+--upstream-ms acrescenta latência fixa ao servidor simulado. --api-dir permite
+medir outra versão dos handlers (ex.: uma cópia de um commit anterior).
+
+Uso:
+    python benchmarks/bench_cold_start.py --runs 5 --warm 50
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+REQUESTS = {
+    "chat": {"message": "Como devemos posicionar a campanha de marketing?", "topic": "Lançamento"},
+    "voice": {"text": "Bom dia a todos, vamos começar.", "voice_id": "EXAVITQu4vr4xnSDxMaL"}
+}
+
+COMPLETION = {
+    "id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "Proponho começarmos por um segmento piloto."}}],
+    "usage": {"prompt_tokens": 80, "completion_tokens": 12, "total_tokens": 92}
+}
+
+# Código do processo filho: importa o handler, serve-o e mede os pedidos
+CHILD = r"""
+import sys, time, json, statistics, threading, http.client
+from http.server import ThreadingHTTPServer
+api_dir, name, warm = sys.argv[1], sys.argv[2], int(sys.argv[3])
+payload = json.dumps(json.loads(sys.argv[4])).encode()
+sys.path.insert(0, api_dir)
+
+started = time.perf_counter()
+module = __import__(name)
+import_ms = (time.perf_counter() - started) * 1000
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), module.handler)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+
+def call():
+    start = time.perf_counter()
+    conn.request("POST", "/", body=payload, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200 or b"Error" in body[:20]:
+        raise SystemExit(f"{name}: {response.status} {body[:200]!r}")
+    return (time.perf_counter() - start) * 1000
+
+first_ms = call()
+first_at = time.time()
+warm_ms = [call() for _ in range(warm)]
+print(json.dumps({"import_ms": import_ms, "first_ms": first_ms, "first_at": first_at,
+                  "warm_ms": statistics.median(warm_ms) if warm_ms else None}))
+"""
+
+
+def mock_upstream(delay_ms: float) -> str:
+    """OpenAI (/chat/completions) e ElevenLabs (/text-to-speech/<voz>) simulados"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay_ms / 1000)
+            if self.path.endswith("/chat/completions"):
+                body, content_type = json.dumps(COMPLETION).encode(), "application/json"
+            else:
+                body, content_type = b"\xff\xfb" + b"\x00" * 4096, "audio/mpeg"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def cold_run(api_dir: str, name: str, warm: int, upstream: str) -> dict:
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="sk-bench-0000000000000000000000",
+        OPENAI_BASE_URL=f"{upstream}/v1",
+        ELEVENLABS_API_KEY="bench",
+        ELEVENLABS_BASE_URL=f"{upstream}/v1",
+        RESPONSE_CACHE="0"
+    )
+    spawned_at = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, api_dir, name, str(warm), json.dumps(REQUESTS[name])],
+        env=env, capture_output=True, text=True, check=True
+    )
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats["total_ms"] = (stats.pop("first_at") - spawned_at) * 1000
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import, primeiro pedido e pedidos quentes dos handlers em api/")
+    parser.add_argument("--api-dir", default=os.path.join(ROOT, "api"))
+    parser.add_argument("--handlers", nargs="+", default=["chat", "voice"])
+    parser.add_argument("--runs", type=int, default=5, help="Instâncias frias por handler")
+    parser.add_argument("--warm", type=int, default=50, help="Pedidos quentes por instância")
+    parser.add_argument("--upstream-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    upstream = mock_upstream(args.upstream_ms)
+    api_dir = os.path.abspath(args.api_dir)
+    print(f"📊 {api_dir}: {args.runs} instâncias frias, {args.warm} pedidos quentes cada, "
+          f"upstream simulado +{args.upstream_ms:.0f} ms (medianas)\n")
+    print(f"{'handler':<8} {'import':>9} {'1.º pedido':>11} {'quentes':>9} {'total':>9}")
+    for name in args.handlers:
+        runs = [cold_run(api_dir, name, args.warm, upstream) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in ("import_ms", "first_ms", "warm_ms", "total_ms")}
+        print(f"{name:<8} {median['import_ms']:>6.0f} ms {median['first_ms']:>8.1f} ms "
+              f"{median['warm_ms']:>6.2f} ms {median['total_ms']:>6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Gateway ASGI (src/app.py) vs proxy Flask antigo
+Os dois proxies ficam à frente do mesmo backend simulado (FastAPI), cada
+servidor no seu processo. Mede, com N pedidos e C em paralelo:
+    GET  /api/agents         latência p50/p95 e pedidos/s
+    POST /api/meeting/start  idem (corpo JSON)
+    GET  /api/stream         tempo até ao primeiro byte de uma resposta em
+                             streaming (o backend envia um chunk a cada --chunk-ms)
+    WS   /ws/<id>            ida e volta de uma mensagem (o Flask não suporta)
+
+O proxy antigo é reconstruído aqui (Flask + requests, sem reutilizar conexões)
+para a comparação não depender do ficheiro que o gateway substituiu.
+
+Uso:
+    python benchmarks/bench_gateway.py --requests 2000 --concurrency 20
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import statistics
+import multiprocessing
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import httpx
+
+AGENTS = [{"id": f"agent{i}", "name": f"Agente {i}", "role": "Executivo " * 5} for i in range(10)]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_backend(port: int, chunks: int, chunk_ms: float):
+    import uvicorn
+    from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+    from fastapi.responses import StreamingResponse
+
+    backend = FastAPI()
+
+    @backend.get("/")
+    async def root():
+        return {"status": "operational"}
+
+    @backend.get("/agents")
+    async def agents():
+        return {"agents": AGENTS}
+
+    @backend.post("/meeting/start")
+    async def start(request: Request):
+        body = await request.json()
+        return {"session_id": body["session_id"], "opening_message": "Bom dia a todos. " * 20}
+
+    @backend.get("/stream")
+    async def stream():
+        async def chunks_iter():
+            for i in range(chunks):
+                yield f"data: chunk {i}\n\n".encode()
+                await asyncio.sleep(chunk_ms / 1000)
+        return StreamingResponse(chunks_iter(), media_type="text/event-stream")
+
+    @backend.websocket("/ws/{session_id}")
+    async def ws(websocket: WebSocket, session_id: str):
+        await websocket.accept()
+        try:
+            while True:
+                await websocket.send_text(await websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+
+    uvicorn.run(backend, host="127.0.0.1", port=port, log_level="warning")
+
+
+def run_legacy(port: int, backend_url: str):
+    """O proxy de src/app.py antes do gateway (Flask + requests por pedido)"""
+    import logging
+    import requests
+    from flask import Flask, request, Response
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    legacy = Flask(__name__)
+
+    @legacy.route('/api/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+    def proxy_api(path):
+        url = f"{backend_url}/{path}"
+        headers = {key: value for key, value in request.headers if key.lower() != 'host'}
+        try:
+            if request.method == 'GET':
+                resp = requests.get(url, headers=headers, params=request.args)
+            elif request.method == 'POST':
+                resp = requests.post(url, headers=headers, json=request.json)
+            else:
+                return Response(status=200)
+            return Response(resp.content, status=resp.status_code, headers=dict(resp.headers))
+        except Exception as e:
+            return {'error': str(e)}, 500
+
+    legacy.run(host="127.0.0.1", port=port, debug=False, threaded=True)
+
+
+def run_gateway(port: int, backend_url: str):
+    import uvicorn
+    os.environ["BACKEND_URL"] = backend_url
+    os.environ["GATEWAY_SPAWN_BACKEND"] = "0"
+    from app import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_listening(port: int, timeout: float = 20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Servidor na porta {port} não arrancou")
+
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def load(base: str, method: str, path: str, requests: int, concurrency: int):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(base_url=base, timeout=30, limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                i = queue.get_nowait()
+                body = {"user_name": "Rui", "topic": "Vendas", "session_id": f"s{i}"} if method == "POST" else None
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+async def ttfb(base: str, path: str, samples: int):
+    first, total = [], []
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        for _ in range(samples):
+            start = time.perf_counter()
+            async with client.stream("GET", path) as response:
+                seen_first = False
+                async for _ in response.aiter_raw():
+                    if not seen_first:
+                        first.append(time.perf_counter() - start)
+                        seen_first = True
+            total.append(time.perf_counter() - start)
+    return statistics.median(first), statistics.median(total)
+
+
+async def ws_roundtrip(url: str, messages: int):
+    from websockets.asyncio.client import connect
+    try:
+        async with connect(url) as ws:
+            times = []
+            for i in range(messages):
+                start = time.perf_counter()
+                await ws.send(json.dumps({"content": f"mensagem {i}"}))
+                await ws.recv()
+                times.append(time.perf_counter() - start)
+            return times
+    except Exception:
+        return None
+
+
+def report_load(name: str, result):
+    latencies, errors, elapsed = result
+    if not latencies:
+        print(f"  {name:<8} sem respostas ({errors} erros)")
+        return
+    print(f"  {name:<8} p50 {percentile(latencies, 0.5) * 1000:7.2f} ms  p95 {percentile(latencies, 0.95) * 1000:7.2f} ms  "
+          f"{len(latencies) / elapsed:8.0f} pedidos/s  {errors} erros")
+
+
+async def run_all(proxies, args):
+    backend_name, backend_base = proxies[0]
+    for method, path in (("GET", "/api/agents"), ("POST", "/api/meeting/start")):
+        print(f"\n{method} {path}")
+        # Referência: o backend sem proxy à frente
+        report_load(backend_name, await load(backend_base, method, path[len("/api"):], args.requests, args.concurrency))
+        for name, base in proxies[1:]:
+            report_load(name, await load(base, method, path, args.requests, args.concurrency))
+
+    print(f"\nGET /api/stream ({args.chunks} chunks a cada {args.chunk_ms:.0f} ms)")
+    for name, base in proxies[1:]:
+        try:
+            first, total = await ttfb(base, "/api/stream", args.stream_samples)
+        except httpx.HTTPError as e:
+            # O proxy antigo repete o Transfer-Encoding do backend num corpo já sem chunks
+            print(f"  {name:<8} falhou: {e!r}")
+            continue
+        print(f"  {name:<8} primeiro byte {first * 1000:7.1f} ms  resposta completa {total * 1000:7.1f} ms")
+
+    print("\nWS /ws/<id> (ida e volta)")
+    for name, base in proxies[1:]:
+        times = await ws_roundtrip(base.replace("http", "ws", 1) + "/ws/bench", args.ws_messages)
+        if times is None:
+            print(f"  {name:<8} não suportado")
+        else:
+            print(f"  {name:<8} p50 {percentile(times, 0.5) * 1000:7.2f} ms  p95 {percentile(times, 0.95) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e débito: gateway ASGI vs proxy Flask")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--chunk-ms", type=float, default=100)
+    parser.add_argument("--stream-samples", type=int, default=5)
+    parser.add_argument("--ws-messages", type=int, default=500)
+    args = parser.parse_args()
+
+    backend_port, legacy_port, gateway_port = free_port(), free_port(), free_port()
+    backend_url = f"http://127.0.0.1:{backend_port}"
+    processes = [
+        multiprocessing.Process(target=run_backend, args=(backend_port, args.chunks, args.chunk_ms), daemon=True),
+        multiprocessing.Process(target=run_legacy, args=(legacy_port, backend_url), daemon=True),
+        multiprocessing.Process(target=run_gateway, args=(gateway_port, backend_url), daemon=True)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for port in (backend_port, legacy_port, gateway_port):
+            wait_listening(port)
+        proxies = [("direto", backend_url), ("flask", f"http://127.0.0.1:{legacy_port}"), ("gateway", f"http://127.0.0.1:{gateway_port}")]
+
+        print(f"📊 {args.requests} pedidos, {args.concurrency} em paralelo, {os.cpu_count()} CPU(s)")
+        asyncio.run(run_all(proxies, args))
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
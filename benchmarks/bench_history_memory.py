@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Memória do histórico de conversa por sessão
+Compara a lista de dicts antiga (from, from_name, content, timestamp ISO)
+com o ConversationHistory (registos com __slots__ e anel limitado).
+
+Uso:
+    python benchmarks/bench_history_memory.py --sessions 300 --turns 200
+"""
+
+import os
+import sys
+import random
+import tempfile
+import argparse
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from conversation_history import ConversationHistory, HISTORY_MAX_TURNS, wait_for_spill
+
+SPEAKERS = [
+    ("user", "Participante"),
+    ("elara", "Elara Veyra"),
+    ("aurora", "Aurora Castellane"),
+    ("helios", "Helios Vanterre"),
+    ("hephaestus", "Hephaestus Forge"),
+    ("athena", "Athena Sophros")
+]
+
+WORDS = (
+    "estratégia mercado clientes produto equipa dados design sistema campanha "
+    "orçamento crescimento lançamento métricas arquitetura prioridade objetivo"
+).split()
+
+
+def make_turns(turns: int, rng: random.Random):
+    """Mensagens com o tamanho típico de uma resposta (~60-120 palavras)"""
+    return [
+        (*SPEAKERS[i % len(SPEAKERS)], " ".join(rng.choices(WORDS, k=rng.randint(60, 120))))
+        for i in range(turns)
+    ]
+
+
+def build_legacy(sessions: int, turns):
+    result = {}
+    for s in range(sessions):
+        history = []
+        for sender, sender_name, content in turns:
+            # As strings chegam do JSON/LLM: cópias novas em cada mensagem
+            history.append({
+                "from": "".join(sender),
+                "from_name": "".join(sender_name),
+                "content": "".join(content),
+                "timestamp": datetime.now().isoformat()
+            })
+        result[f"s{s}"] = history
+    return result
+
+
+def build_compact(sessions: int, turns, spill_dir: str, max_turns: int):
+    result = {}
+    for s in range(sessions):
+        history = ConversationHistory(max_turns, spill_path=os.path.join(spill_dir, f"s{s}.jsonl"))
+        for sender, sender_name, content in turns:
+            history.append("".join(sender), "".join(sender_name), "".join(content))
+        result[f"s{s}"] = history
+    wait_for_spill()
+    return result
+
+
+def measure(build, *args):
+    tracemalloc.start()
+    data = build(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória do histórico por sessão")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--max-turns", type=int, default=HISTORY_MAX_TURNS)
+    args = parser.parse_args()
+
+    turns = make_turns(args.turns, random.Random(42))
+    print(f"📊 {args.sessions} sessões x {args.turns} mensagens (anel de {args.max_turns})\n")
+
+    legacy, _ = measure(build_legacy, args.sessions, turns)
+    with tempfile.TemporaryDirectory() as spill_dir:
+        compact, _ = measure(build_compact, args.sessions, turns, spill_dir, args.max_turns)
+        spilled = sum(os.path.getsize(os.path.join(spill_dir, f)) for f in os.listdir(spill_dir))
+
+    for name, total in (("legacy", legacy), ("compact", compact)):
+        print(f"{name:<8} {total / 1024 / 1024:8.2f} MB  {total / args.sessions / 1024:8.1f} KB/sessão")
+    print(f"\nRedução: {legacy / max(compact, 1):.1f}x  (em disco: {spilled / 1024 / 1024:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Latência por pedido com conexões frias vs. quentes
+Frio: um cliente HTTP novo por pedido (DNS + TCP + TLS a cada chamada, como
+o requests.post antigo). Quente: o cliente partilhado de http_transport.
+
+Por defeito usa um servidor HTTP local; para medir também o custo de TLS,
+apontar para um host real, ex.:
+    python benchmarks/bench_http_transport.py --url https://api.elevenlabs.io/v1/models
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import httpx
+from http_transport import create_http_client, get_http_client, warm_up, close_http_client
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    body = b'{"ok": true}'
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_local_server() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+async def cold_call(url: str) -> float:
+    start = time.perf_counter()
+    async with create_http_client() as client:
+        await client.get(url)
+    return time.perf_counter() - start
+
+
+async def warm_call(client: httpx.AsyncClient, url: str) -> float:
+    start = time.perf_counter()
+    await client.get(url)
+    return time.perf_counter() - start
+
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    print(f"{label:<22} média {statistics.mean(samples) * 1000:7.2f} ms   "
+          f"p50 {statistics.median(samples) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms")
+
+
+async def run(url: str, requests: int):
+    cold = [await cold_call(url) for _ in range(requests)]
+
+    client = get_http_client()
+    await warm_up([url])
+    warm = [await warm_call(client, url) for _ in range(requests)]
+    await close_http_client()
+
+    print(f"🌐 {url} ({requests} pedidos sequenciais)")
+    print("=" * 70)
+    report("❄️  Conexão fria", cold)
+    report("🔥 Conexão quente", warm)
+    print(f"   Poupança por pedido: {(statistics.mean(cold) - statistics.mean(warm)) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL a pedir (por defeito, servidor local)")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url or start_local_server(), args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Completions concorrentes
+Compara o caminho síncrono antigo (OpenAI().create dentro de uma função async)
+com o LLMClient assíncrono partilhado, para N sessões em simultâneo.
+
+Não usa a API real: um cliente falso simula a latência de cada completion.
+
+Uso:
+    python benchmarks/bench_llm_concurrency.py --sessions 30
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from llm_client import LLMClient
+
+
+def fake_response(text: str):
+    """Resposta com o mesmo formato do SDK"""
+    message = SimpleNamespace(content=text)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeAsyncCompletions:
+    """Simula AsyncOpenAI().chat.completions"""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    async def create(self, model, messages, **params):
+        await asyncio.sleep(self.latencies[messages[-1]["content"]])
+        return fake_response("ok")
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, latencies):
+        self.chat = SimpleNamespace(completions=FakeAsyncCompletions(latencies))
+
+    async def close(self):
+        pass
+
+
+async def blocking_turn(latency: float):
+    """Caminho antigo: chamada síncrona que bloqueia o event loop"""
+    time.sleep(latency)
+    return "ok"
+
+
+async def run_blocking(latencies):
+    start = time.perf_counter()
+    await asyncio.gather(*(blocking_turn(latency) for latency in latencies.values()))
+    return time.perf_counter() - start
+
+
+async def run_async(latencies, max_concurrency: int):
+    client = LLMClient(client=FakeAsyncOpenAI(latencies), max_concurrency=max_concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client.complete(messages=[{"role": "user", "content": session}])
+        for session in latencies
+    ))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--min-latency", type=float, default=0.2)
+    parser.add_argument("--max-latency", type=float, default=1.0)
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    latencies = {
+        f"session_{i}": random.uniform(args.min_latency, args.max_latency)
+        for i in range(args.sessions)
+    }
+
+    total = sum(latencies.values())
+    slowest = max(latencies.values())
+
+    print(f"⚡ {args.sessions} sessões concorrentes")
+    print(f"   Soma das latências:  {total:.2f}s")
+    print(f"   Sessão mais lenta:   {slowest:.2f}s")
+    print("=" * 50)
+
+    blocking = asyncio.run(run_blocking(latencies))
+    print(f"❌ Síncrono (antigo):   {blocking:.2f}s  ({blocking / slowest:.1f}x a mais lenta)")
+
+    concurrent = asyncio.run(run_async(latencies, args.max_concurrency))
+    print(f"✅ LLMClient async:     {concurrent:.2f}s  ({concurrent / slowest:.1f}x a mais lenta)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Teste de carga do backend (main.py) totalmente offline
+Arranca os serviços simulados (mock_services.py) e o backend apontado para
+eles, e conduz N reuniões simuladas, C de cada vez:
+    POST /meeting/start  ->  WS /ws/<id>  ->  T turnos (mensagem, resposta)
+
+Por turno mede a latência até à mensagem final (agent_message) e o tempo até
+ao primeiro byte da resposta (primeiro delta, chunk de áudio ou mensagem).
+Com o CPU consumido pelo backend (lido de /proc), estima quantas sessões
+simultâneas cabem num core a este ritmo de turnos.
+
+Uso:
+    python benchmarks/bench_load.py --meetings 40 --concurrency 20 --turns 5 --stream
+    python benchmarks/bench_load.py --workers 2 --llm-errors 0.02 --video 0.2
+    python benchmarks/bench_load.py --backend-url http://127.0.0.1:8002 --mock-port 9100
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import signal
+import subprocess
+import multiprocessing
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+from websockets.asyncio.client import connect as ws_connect
+
+import mock_services
+
+DEFAULT_LABELS = os.path.join(BENCH_DIR, "routing_labels.jsonl")
+TOPICS = [
+    "Lançamento do produto no mercado português", "Estratégia de crescimento para 2025",
+    "Redesign da aplicação móvel", "Migração da infraestrutura para a cloud"
+]
+# Texto das respostas de recurso do backend quando o LLM falha
+FALLBACK_MARKER = "dificuldades técnicas"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentiles(values: List[float]) -> str:
+    if not values:
+        return "sem amostras"
+    ordered = sorted(values)
+
+    def p(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+    return f"p50 {p(0.5):7.0f} ms  p95 {p(0.95):7.0f} ms  p99 {p(0.99):7.0f} ms  (n={len(values)})"
+
+
+def process_tree_cpu(pid: int) -> Optional[float]:
+    """CPU (s) do processo e descendentes vivos, a partir de /proc (só Linux)"""
+    if not os.path.isdir("/proc"):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    children: Dict[int, List[int]] = {}
+    cpu: Dict[int, float] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # Depois do nome: estado(0) ppid(1) ... utime(11) stime(12)
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        cpu[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+
+    total, stack = 0.0, [pid]
+    while stack:
+        current = stack.pop()
+        total += cpu.get(current, 0.0)
+        stack.extend(children.get(current, []))
+    return total
+
+
+async def wait_ready(url: str, timeout: float = 60, process: Optional[subprocess.Popen] = None):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"O backend terminou ao arrancar (código {process.returncode}; ver --verbose)")
+            try:
+                if (await client.get(url, timeout=1)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} não respondeu em {timeout:.0f}s")
+
+
+class Results:
+    def __init__(self):
+        self.start: List[float] = []
+        self.turn: List[float] = []
+        self.ttfb: List[float] = []
+        self.video: List[float] = []
+        self.turns = 0
+        self.fallbacks = 0      # Respostas de recurso (LLM falhou)
+        self.errors: Dict[str, int] = {}
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+async def run_meeting(index: int, base_url: str, args, messages: List[str], results: Results, rng: random.Random):
+    session_id = f"load-{index}-{random.getrandbits(32):08x}"
+    user_name = f"Participante{index}"
+    want_video = rng.random() < args.video
+    video_pending: Dict[str, float] = {}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        try:
+            response = await client.post("/meeting/start", json={
+                "user_name": user_name, "topic": rng.choice(TOPICS), "session_id": session_id
+            })
+            response.raise_for_status()
+        except httpx.HTTPError:
+            results.error("meeting_start")
+            return
+        results.start.append(time.perf_counter() - started)
+        # Mensagens já terminadas: o áudio delas (abertura, fim de uma resposta
+        # em streaming) pode ainda chegar e não conta para o turno seguinte
+        finished = {response.json().get("opening_message_id")}
+
+    ws_url = base_url.replace("http", "ws", 1) + f"/ws/{session_id}" + ("?avatar_video=1" if want_video else "")
+    try:
+        async with ws_connect(ws_url, max_size=None, open_timeout=args.timeout) as ws:
+            async def receive(deadline: float):
+                frame = await asyncio.wait_for(ws.recv(), timeout=max(0.001, deadline - time.perf_counter()))
+                if isinstance(frame, bytes):
+                    return None
+                message = json.loads(frame)
+                if message.get("type") == "agent_video" and message.get("job_id") in video_pending:
+                    results.video.append(time.perf_counter() - video_pending.pop(message["job_id"]))
+                return message
+
+            for turn in range(args.turns):
+                await asyncio.sleep(rng.expovariate(1000 / args.think_ms) if args.think_ms > 0 else 0)
+                sent = time.perf_counter()
+                await ws.send(json.dumps({
+                    "content": rng.choice(messages), "user_name": user_name, "stream": args.stream
+                }))
+                deadline = sent + args.timeout
+                first = None
+                try:
+                    while True:
+                        message = await receive(deadline)
+                        if message is None:
+                            continue
+                        kind = message.get("type")
+                        if message.get("message_id") in finished:
+                            continue
+                        if kind in ("agent_message_delta", "agent_audio_chunk", "agent_message") and first is None:
+                            first = time.perf_counter() - sent
+                        if kind == "error":
+                            results.error("ws_error")
+                            break
+                        if kind == "agent_message":
+                            finished.add(message.get("message_id"))
+                            results.turn.append(time.perf_counter() - sent)
+                            results.ttfb.append(first)
+                            results.turns += 1
+                            if FALLBACK_MARKER in message.get("content", ""):
+                                results.fallbacks += 1
+                            if message.get("video_job_id"):
+                                video_pending[message["video_job_id"]] = time.perf_counter()
+                            break
+                except asyncio.TimeoutError:
+                    results.error("turn_timeout")
+                    return
+
+            # Vídeos ainda em render (só se pedidos)
+            deadline = time.perf_counter() + args.video_wait
+            while video_pending and time.perf_counter() < deadline:
+                try:
+                    await receive(deadline)
+                except asyncio.TimeoutError:
+                    break
+            if video_pending:
+                results.error("video_timeout")
+    except Exception as e:
+        results.error(f"ws_{type(e).__name__}")
+
+
+async def drive(base_url: str, args, messages: List[str]) -> Results:
+    results = Results()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+
+    async def one(index: int):
+        async with semaphore:
+            await run_meeting(index, base_url, args, messages, results, random.Random(rng.random()))
+
+    await asyncio.gather(*(one(i) for i in range(args.meetings)))
+    return results
+
+
+def backend_env(args, mock_url: str, scratch: str) -> Dict[str, str]:
+    """Ambiente do backend apontado para os serviços simulados (ficheiros em `scratch`)"""
+    return dict(
+        os.environ,
+        # O python3 do start.sh passa a ser o interpretador deste benchmark
+        PATH=os.path.dirname(sys.executable) + os.pathsep + os.environ.get("PATH", ""),
+        OPENAI_API_KEY="sk-mock-load-test",
+        OPENAI_BASE_URL=f"{mock_url}/v1",
+        ELEVENLABS_API_KEY="mock",
+        ELEVENLABS_BASE_URL=f"{mock_url}/v1",
+        DID_API_KEY="mock",
+        DID_BASE_URL=mock_url,
+        HTTP_WARMUP_URLS=mock_url,
+        AVATAR_POLL_INITIAL="0.5",
+        AUDIO_CACHE="1" if args.caches else "0",
+        RESPONSE_CACHE="1" if args.caches else "0",
+        AUDIO_CACHE_DIR=os.path.join(scratch, "audio"),
+        VIDEO_CACHE_DB=os.path.join(scratch, "video.db"),
+        HUB_DB_PATH=os.path.join(scratch, "hub.db"),
+        TIKTOKEN_CACHE_DIR=os.path.join(scratch, "tiktoken")
+    )
+
+
+def start_backend(args, mock_url: str, port: int) -> subprocess.Popen:
+    scratch = tempfile.mkdtemp(prefix="staff_ai_load_")
+    env = dict(backend_env(args, mock_url, scratch), PORT=str(port), WEB_CONCURRENCY=str(args.workers))
+    if args.workers > 1:
+        # O start.sh lança o broker local; sessões em SQLite partilhado
+        env["SESSION_STORE_URL"] = f"sqlite:///{os.path.join(scratch, 'sessions.db')}"
+    return subprocess.Popen(
+        ["bash", os.path.join(ROOT, "start.sh")],
+        env=env,
+        start_new_session=True,
+        stdout=None if args.verbose else subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga offline: latência por turno, TTFB e sessões por core")
+    parser.add_argument("--meetings", type=int, default=40, help="Reuniões no total")
+    parser.add_argument("--concurrency", type=int, default=20, help="Reuniões em simultâneo")
+    parser.add_argument("--turns", type=int, default=5, help="Mensagens do participante por reunião")
+    parser.add_argument("--think-ms", type=float, default=1000, help="Pausa média entre turnos (exponencial)")
+    parser.add_argument("--stream", action="store_true", help="Respostas em streaming (deltas + áudio por frase)")
+    parser.add_argument("--video", type=float, default=0.0, help="Fração de reuniões com vídeo de avatar")
+    parser.add_argument("--video-wait", type=float, default=30, help="Espera máxima pelos vídeos no fim de cada reunião")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn do backend (start.sh)")
+    parser.add_argument("--caches", action="store_true", help="Manter as caches de áudio/respostas ligadas")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--backend-url", help="Usar um backend já a correr (apontado para --mock-port)")
+    parser.add_argument("--mock-port", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar o output do backend")
+    mock_services.add_arguments(parser)
+    args = parser.parse_args()
+
+    with open(args.labels, encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f if line.strip()]
+
+    mock_port = args.mock_port or free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    mock = multiprocessing.Process(
+        target=mock_services.serve, args=(mock_services.config_from_args(args), mock_port), daemon=True
+    )
+    mock.start()
+
+    backend = None
+    base_url = args.backend_url
+    if base_url is None:
+        backend_port = free_port()
+        base_url = f"http://127.0.0.1:{backend_port}"
+        backend = start_backend(args, mock_url, backend_port)
+
+    try:
+        asyncio.run(wait_ready(f"{mock_url}/__stats"))
+        asyncio.run(wait_ready(f"{base_url}/", process=backend))
+
+        cpu_before = process_tree_cpu(backend.pid) if backend else None
+        started = time.perf_counter()
+        results = asyncio.run(drive(base_url, args, messages))
+        wall = time.perf_counter() - started
+        cpu_after = process_tree_cpu(backend.pid) if backend else None
+        mock_stats = httpx.get(f"{mock_url}/__stats").json()
+    finally:
+        if backend is not None:
+            # O uvicorn é filho do bash: terminar o grupo inteiro
+            os.killpg(backend.pid, signal.SIGTERM)
+            backend.wait()
+        mock.terminate()
+
+    print(f"📊 {args.meetings} reuniões ({args.concurrency} em simultâneo) x {args.turns} turnos, "
+          f"{'streaming' if args.stream else 'sem streaming'}, {args.workers} worker(s), {os.cpu_count()} CPU(s)")
+    print(f"   LLM {args.llm_ttft} + {args.llm_tokens}x{args.llm_token}, TTS {args.tts}, "
+          f"erros LLM/TTS/D-ID {args.llm_errors}/{args.tts_errors}/{args.did_errors}\n")
+    print(f"/meeting/start   {percentiles(results.start)}")
+    print(f"turno (completo) {percentiles(results.turn)}")
+    print(f"primeiro byte    {percentiles([t for t in results.ttfb if t is not None])}")
+    if args.video:
+        print(f"vídeo do avatar  {percentiles(results.video)}")
+
+    print(f"\n{results.turns} turnos em {wall:.1f}s ({results.turns / wall:.1f} turnos/s); "
+          f"respostas de recurso: {results.fallbacks}; erros: {results.errors or 0}")
+
+    if cpu_before is not None and cpu_after is not None:
+        cpu = cpu_after - cpu_before
+        cores = cpu / wall
+        concurrent = min(args.concurrency, args.meetings)
+        print(f"CPU do backend: {cpu:.1f}s ({cores:.2f} cores em média)")
+        if cores > 0:
+            print(f"sessões por core: {concurrent / cores:.0f} "
+                  f"({concurrent} sessões simultâneas, uma mensagem a cada ~{args.think_ms / 1000:.1f}s + resposta)")
+    else:
+        print("CPU do backend: indisponível (backend externo ou sem /proc)")
+
+    print("\nserviços simulados: " + ", ".join(
+        f"{service} {entry['requests']} pedidos ({entry['errors']} erros, média {entry['mean_ms']} ms)"
+        for service, entry in mock_stats.items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
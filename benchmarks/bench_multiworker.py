@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Reuniões reais repartidas por vários workers do backend
+Para cada N em --workers arranca, como o start.sh, N processos uvicorn do
+main:app ligados a um broker (Unix socket) e a sessões em SQLite partilhado
+(com um worker: sem broker e sessões em memória), todos apontados para os
+serviços simulados (mock_services.py).
+
+Cada worker tem a sua porta para que a distribuição seja controlada: como no
+start.sh, não há afinidade e cada participante de uma reunião liga-se a um
+worker ao acaso (é o que o kernel faz com a porta partilhada). --affinity põe
+todos os participantes de cada reunião (e o /meeting/start) no mesmo worker.
+
+Por reunião:
+    POST /meeting/start  ->  um WebSocket por participante  ->  T turnos
+Em cada turno um participante envia uma mensagem; mede-se o tempo até ele
+receber a agent_message. No fim verifica-se a entrega aos outros
+participantes (user_message e agent_message de cada turno) e se o áudio da
+abertura chegou a todos, estejam ou não no worker do /meeting/start.
+
+Uso:
+    python benchmarks/bench_multiworker.py --workers 1 2 4 --meetings 40 --turns 5
+    python benchmarks/bench_multiworker.py --workers 2 4 --affinity --stream
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from typing import Dict, List, Set, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, BENCH_DIR)
+
+import httpx
+from websockets.asyncio.client import connect as ws_connect
+
+import mock_services
+from bench_load import DEFAULT_LABELS, TOPICS, backend_env, free_port, percentiles, process_tree_cpu, wait_ready
+
+
+class Participant:
+    """Um WebSocket de uma reunião e o que chegou por ele"""
+
+    def __init__(self, name: str, worker: int):
+        self.name = name
+        self.worker = worker
+        self.replies: asyncio.Queue = asyncio.Queue()   # message_id de cada agent_message
+        self.agent_messages: Set[str] = set()
+        self.user_messages = 0
+        self.opening_audio = False
+
+
+class Results:
+    def __init__(self):
+        self.turn: List[float] = []
+        self.turns = 0
+        self.cross_turns = 0        # Turnos de reuniões com participantes em mais de um worker
+        self.expected = 0           # Mensagens que os outros participantes deviam receber
+        self.delivered = 0
+        self.opening_expected = 0
+        self.opening_delivered = 0
+        self.opening_remote = 0     # Participantes noutro worker que não o do /meeting/start
+        self.opening_remote_delivered = 0
+        self.errors: Dict[str, int] = {}
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def placement(workers: int, participants: int, affinity: bool, rng: random.Random) -> List[int]:
+    """Worker de cada participante de uma reunião"""
+    if affinity:
+        return [rng.randrange(workers)] * participants
+    return [rng.randrange(workers) for _ in range(participants)]
+
+
+async def read_frames(ws, participant: Participant, opening_id: str):
+    async for frame in ws:
+        if isinstance(frame, bytes):
+            continue
+        message = json.loads(frame)
+        kind = message.get("type")
+        if kind == "agent_audio_chunk" and message.get("message_id") == opening_id:
+            participant.opening_audio = True
+        elif kind == "agent_message":
+            participant.agent_messages.add(message.get("message_id"))
+            participant.replies.put_nowait(message.get("message_id"))
+        elif kind == "user_message":
+            participant.user_messages += 1
+
+
+async def run_meeting(index: int, urls: List[str], args, messages: List[str], results: Results, rng: random.Random):
+    session_id = f"mw-{index}-{random.getrandbits(32):08x}"
+    workers = placement(len(urls), args.participants, args.affinity, rng)
+    participants = [Participant(f"Participante{index}-{p}", worker) for p, worker in enumerate(workers)]
+    cross = len(set(workers)) > 1
+
+    async with httpx.AsyncClient(base_url=urls[workers[0]], timeout=args.timeout) as client:
+        try:
+            response = await client.post("/meeting/start", json={
+                "user_name": participants[0].name, "topic": rng.choice(TOPICS), "session_id": session_id
+            })
+            response.raise_for_status()
+        except httpx.HTTPError:
+            results.error("meeting_start")
+            return
+        opening_id = response.json().get("opening_message_id")
+
+    sockets, readers = [], []
+    try:
+        for participant in participants:
+            ws_url = urls[participant.worker].replace("http", "ws", 1) + f"/ws/{session_id}"
+            ws = await ws_connect(ws_url, max_size=None, open_timeout=args.timeout)
+            sockets.append(ws)
+            readers.append(asyncio.create_task(read_frames(ws, participant, opening_id)))
+
+        sent_ids: List[Tuple[int, str]] = []   # (quem falou, message_id da resposta)
+        answered: Set[str] = set()
+        for turn in range(args.turns):
+            await asyncio.sleep(rng.expovariate(1000 / args.think_ms) if args.think_ms > 0 else 0)
+            speaker = turn % len(participants)
+            sent = time.perf_counter()
+            await sockets[speaker].send(json.dumps({
+                "content": rng.choice(messages), "user_name": participants[speaker].name, "stream": args.stream
+            }))
+            try:
+                # As respostas aos turnos anteriores também chegaram a este participante
+                message_id = None
+                while message_id is None or message_id in answered:
+                    message_id = await asyncio.wait_for(
+                        participants[speaker].replies.get(), timeout=max(0.001, sent + args.timeout - time.perf_counter())
+                    )
+            except asyncio.TimeoutError:
+                results.error("turn_timeout")
+                return
+            results.turn.append(time.perf_counter() - sent)
+            results.turns += 1
+            results.cross_turns += cross
+            sent_ids.append((speaker, message_id))
+            answered.add(message_id)
+
+        # Os outros participantes recebem a mensagem e a resposta de cada turno
+        expected_user = [sum(1 for s, _ in sent_ids if s != p) for p in range(len(participants))]
+        expected = sum(expected_user) + len(sent_ids) * (len(participants) - 1)
+        deadline = time.perf_counter() + args.grace
+
+        def count() -> int:
+            total = 0
+            for p, participant in enumerate(participants):
+                total += min(participant.user_messages, expected_user[p])
+                total += sum(1 for s, message_id in sent_ids if s != p and message_id in participant.agent_messages)
+            return total
+
+        while (count() < expected or not all(p.opening_audio for p in participants)) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+        results.expected += expected
+        results.delivered += count()
+        for participant in participants:
+            results.opening_expected += 1
+            results.opening_delivered += participant.opening_audio
+            if participant.worker != workers[0]:
+                results.opening_remote += 1
+                results.opening_remote_delivered += participant.opening_audio
+    except Exception as e:
+        results.error(f"ws_{type(e).__name__}")
+    finally:
+        for reader in readers:
+            reader.cancel()
+        for ws in sockets:
+            await ws.close()
+
+
+async def drive(urls: List[str], args, messages: List[str]) -> Results:
+    results = Results()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+
+    async def one(index: int):
+        async with semaphore:
+            await run_meeting(index, urls, args, messages, results, random.Random(rng.random()))
+
+    await asyncio.gather(*(one(i) for i in range(args.meetings)))
+    return results
+
+
+def start_workers(args, workers: int, mock_url: str) -> tuple:
+    """Broker (com mais de um worker) e N processos uvicorn do main:app, cada um na sua porta"""
+    scratch = tempfile.mkdtemp(prefix="staff_ai_mw_")
+    env = backend_env(args, mock_url, scratch)
+    output = None if args.verbose else subprocess.DEVNULL
+    processes: List[subprocess.Popen] = []
+
+    if workers > 1:
+        socket_path = os.path.join(scratch, "bus.sock")
+        processes.append(subprocess.Popen(
+            [sys.executable, "message_bus.py", "broker", socket_path], cwd=SRC_DIR, stdout=output, stderr=output
+        ))
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+        env["MESSAGE_BUS_URL"] = f"unix://{socket_path}"
+        env["SESSION_STORE_URL"] = f"sqlite:///{os.path.join(scratch, 'sessions.db')}"
+
+    urls = []
+    for i in range(workers):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=SRC_DIR, env=dict(env, WORKER_ID=f"w{i}"), stdout=output, stderr=output
+        )
+        processes.append(process)
+        urls.append(f"http://127.0.0.1:{port}")
+        asyncio.run(wait_ready(f"{urls[-1]}/", process=process))
+    return urls, processes
+
+
+def run(args, workers: int, mock_url: str, messages: List[str]):
+    urls, processes = start_workers(args, workers, mock_url)
+    try:
+        cpu_before = sum(process_tree_cpu(p.pid) or 0.0 for p in processes)
+        started = time.perf_counter()
+        results = asyncio.run(drive(urls, args, messages))
+        wall = time.perf_counter() - started
+        cpu = sum(process_tree_cpu(p.pid) or 0.0 for p in processes) - cpu_before
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    return results, wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reuniões com participantes repartidos por N workers do backend")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--meetings", type=int, default=40, help="Reuniões no total")
+    parser.add_argument("--concurrency", type=int, default=20, help="Reuniões em simultâneo")
+    parser.add_argument("--participants", type=int, default=2, help="WebSockets por reunião")
+    parser.add_argument("--turns", type=int, default=5, help="Mensagens por reunião (os participantes alternam)")
+    parser.add_argument("--think-ms", type=float, default=500, help="Pausa média entre turnos (exponencial)")
+    parser.add_argument("--stream", action="store_true", help="Respostas em streaming")
+    parser.add_argument("--affinity", action="store_true", help="Participantes de cada reunião no mesmo worker")
+    parser.add_argument("--caches", action="store_true", help="Manter as caches de áudio/respostas ligadas")
+    parser.add_argument("--grace", type=float, default=5, help="Espera máxima pelas entregas no fim de cada reunião")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--verbose", action="store_true", help="Mostrar o output dos workers")
+    mock_services.add_arguments(parser)
+    args = parser.parse_args()
+
+    with open(args.labels, encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f if line.strip()]
+
+    mock_port = free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    mock = multiprocessing.Process(
+        target=mock_services.serve, args=(mock_services.config_from_args(args), mock_port), daemon=True
+    )
+    mock.start()
+
+    print(f"📊 {args.meetings} reuniões ({args.concurrency} em simultâneo) x {args.turns} turnos, "
+          f"{args.participants} participantes por reunião, {'com' if args.affinity else 'sem'} afinidade, "
+          f"{'streaming' if args.stream else 'sem streaming'}, {os.cpu_count()} CPU(s)")
+    print(f"   LLM {args.llm_ttft} + {args.llm_tokens}x{args.llm_token}, TTS {args.tts}\n")
+
+    try:
+        asyncio.run(wait_ready(f"{mock_url}/__stats"))
+        baseline = None
+        for workers in args.workers:
+            results, wall, cpu = run(args, workers, mock_url, messages)
+            throughput = results.turns / wall
+            baseline = baseline or throughput
+            print(f"{workers:>2} worker(s)  {throughput:6.1f} turnos/s ({throughput / baseline:.2f}x)  "
+                  f"CPU {cpu / wall:.2f} cores  {results.cross_turns / max(1, results.turns):4.0%} dos turnos "
+                  f"com participantes noutro worker")
+            print(f"   turno     {percentiles(results.turn)}")
+            print(f"   entregas  {results.delivered}/{results.expected} mensagens aos outros participantes; "
+                  f"áudio da abertura {results.opening_delivered}/{results.opening_expected} "
+                  f"({results.opening_remote_delivered}/{results.opening_remote} noutro worker); "
+                  f"erros: {results.errors or 0}")
+    finally:
+        mock.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Prefixos fixos dos agentes e cache de prompts do fornecedor
+Compara o prompt antigo (persona, tópico, histórico e instruções num só
+f-string) com o atual (prefixo fixo por agente + sessão + turno).
+
+Sem --live, simula uma reunião e mede quanto de cada pedido repete o início
+de um pedido anterior (o que o OpenAI pode servir da cache: a partir de 1024
+tokens, em blocos de 128). Com --live envia os pedidos ao modelo (precisa de
+OPENAI_API_KEY; OPENAI_BASE_URL opcional) e mede o tempo até ao primeiro
+token e os cached_tokens devolvidos (com PROMPT_CACHE_KEY=1, o layout atual
+leva também prompt_cache_key).
+
+Uso:
+    python benchmarks/bench_prompt_cache.py --turns 60
+    PROMPT_CACHE_KEY=1 python benchmarks/bench_prompt_cache.py --live --turns 40
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from main import AGENTS_CONFIG, AGENT_PREFIXES, COMPLETION_PARAMS, build_agent_messages
+from agent_prompts import prompt_cache_params
+from agent_router import router
+from conversation_history import ConversationHistory
+from llm_client import LLMClient
+from meeting_summary import summarizer
+from token_budget import count_tokens
+
+DEFAULT_LABELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_labels.jsonl")
+
+CACHE_MIN_TOKENS = 1024
+CACHE_INCREMENT = 128
+# Pedidos anteriores ainda em cache (a cache do OpenAI dura alguns minutos)
+CACHE_WINDOW = 20
+
+TOPIC = "Lançamento do produto no mercado português"
+USER_NAME = "Participante"
+REPLY = (
+    "Concordo com a direção. Proponho validarmos primeiro com um grupo de clientes, "
+    "medir a adoção nas primeiras semanas e ajustar o plano com base nesses dados."
+)
+
+
+def legacy_messages(agent: Dict, context: str, topic: str, history, user_name: str) -> List[Dict[str, str]]:
+    """Prompt que existia em get_agent_response (reconstruído em cada turno)"""
+    history_text = ""
+    if history:
+        history_text = "\n\nCONTEXTO DA CONVERSA:\n"
+        for msg in history[-6:]:
+            history_text += f"- {msg.sender_name}: {msg.content[:150]}...\n"
+
+    system_prompt = f"""Você é {agent['name']}, {agent['role']} da Sentient Sphere Technologies.
+
+PERSONALIDADE E TOM: {agent['personality']}
+
+CONTEXTO DA REUNIÃO:
+- Tópico: {topic}
+- Participante: {user_name}
+- Você está numa reunião executiva profissional
+
+INSTRUÇÕES CRÍTICAS:
+- Responda em português de Portugal
+- Máximo 120 palavras (seja conciso e direto)
+- Mantenha tom profissional mas acessível
+- Contribua com insights específicos da sua área de expertise
+- Seja colaborativo e construtivo
+- Use dados e exemplos quando relevante
+- Evite repetir o que outros já disseram
+
+{history_text}
+
+{context}"""
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": context}
+    ]
+
+
+def simulate(turns: int, messages: List[str]):
+    """
+    Pedidos de uma reunião: (agent_id, layout antigo, layout atual)
+
+    O resumo é atualizado nos mesmos momentos que o MeetingSummarizer
+    atualizaria (com um texto fixo no lugar da chamada ao modelo).
+    """
+    history = ConversationHistory()
+    session = {"conversation_history": history}
+    requests = []
+    clock = 0.0
+
+    def record(sender: str, sender_name: str, content: str):
+        nonlocal clock
+        clock += 1
+        history.append(sender, sender_name, content, timestamp=clock)
+        _, pending = summarizer.prompt_history(session)
+        if len(pending) >= summarizer.every + summarizer.keep_recent:
+            folded = pending[:len(pending) - summarizer.keep_recent]
+            session["summary"] = f"Resumo de {int(folded[-1].timestamp)} mensagens. " + REPLY * 2
+            session["summary_until"] = folded[-1].timestamp
+
+    for turn in range(turns):
+        content = messages[turn % len(messages)]
+        record("user", USER_NAME, content)
+        agent_id = router.route(content).agent_id
+        context = f"{USER_NAME} disse: \"{content}\"\n\nResponda de forma relevante e acrescente valor à discussão."
+        summary, recent = summarizer.prompt_history(session)
+        requests.append((
+            agent_id,
+            legacy_messages(AGENTS_CONFIG[agent_id], context, TOPIC, history.last(), USER_NAME),
+            build_agent_messages(agent_id, context, TOPIC, recent, USER_NAME, summary)
+        ))
+        record(agent_id, AGENTS_CONFIG[agent_id]["name"], REPLY)
+    return requests
+
+
+def serialize(messages: List[Dict[str, str]]) -> str:
+    return "".join(f"<{m['role']}>{m['content']}\n" for m in messages)
+
+
+def common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def cacheable(tokens: int) -> int:
+    """Tokens que o OpenAI pode servir da cache para um prefixo repetido"""
+    if tokens < CACHE_MIN_TOKENS:
+        return 0
+    return CACHE_MIN_TOKENS + (tokens - CACHE_MIN_TOKENS) // CACHE_INCREMENT * CACHE_INCREMENT
+
+
+def offline_report(name: str, prompts: List[str]):
+    seen: List[str] = []
+    total = shared_total = cacheable_total = 0
+    for prompt in prompts:
+        best = max((common_prefix(prompt, previous) for previous in seen[-CACHE_WINDOW:]), default=0)
+        shared = count_tokens(prompt[:best]) if best else 0
+        total += count_tokens(prompt)
+        shared_total += shared
+        cacheable_total += cacheable(shared)
+        seen.append(prompt)
+
+    n = len(prompts)
+    print(f"{name:<8} {total / n:8.0f} tokens/pedido  {shared_total / n:8.0f} repetidos "
+          f"({shared_total / max(total, 1):.0%})  {cacheable_total / n:8.0f} em cache "
+          f"({cacheable_total / max(total, 1):.0%})")
+
+
+async def live_report(name: str, requests, layout: int):
+    client = LLMClient()
+    for agent_id, *layouts in requests:
+        params = dict(COMPLETION_PARAMS)
+        if layout == 1:
+            params.update(prompt_cache_params(agent_id))
+        async for _ in client.stream(messages=layouts[layout], **params):
+            pass
+    stats = client.stats.snapshot()
+    await client.aclose()
+    print(f"{name:<8} TTFT p50 {stats['ttft_ms']['p50']} ms  p95 {stats['ttft_ms']['p95']} ms  "
+          f"cached {stats['cached_tokens']}/{stats['prompt_tokens']} tokens ({stats['cached_ratio']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache de prompts: layout antigo vs prefixo fixo")
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--live", action="store_true", help="Enviar os pedidos ao modelo")
+    args = parser.parse_args()
+
+    with open(args.labels, encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f if line.strip()]
+    requests = simulate(args.turns, messages)
+
+    prefix_tokens = {agent_id: count_tokens(prefix) for agent_id, prefix in AGENT_PREFIXES.items()}
+    print(f"📊 {args.turns} turnos; prefixo fixo por agente: {prefix_tokens} tokens\n")
+
+    offline_report("legacy", [serialize(legacy) for _, legacy, _ in requests])
+    offline_report("prefix", [serialize(current) for _, _, current in requests])
+
+    if args.live:
+        print()
+        asyncio.run(live_report("legacy", requests, 0))
+        asyncio.run(live_report("prefix", requests, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Cache de respostas (exata e por semelhança)
+Reproduz dois padrões de tráfego com um LLM simulado (latência fixa):
+    aberturas  reuniões com tópicos repetidos e nomes de participantes diferentes
+    chat       perguntas de api/chat.py, com repetições e variações de escrita
+
+Para cada modo (só exata, e por semelhança com vários limiares) mostra a
+taxa de acertos, o tempo poupado e as respostas servidas de uma pergunta
+diferente (erradas).
+
+Uso:
+    python benchmarks/bench_response_cache.py --requests 5000 --llm-ms 900
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from agent_router import route_message
+from response_cache import ResponseCache
+
+DEFAULT_LABELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_labels.jsonl")
+
+TOPICS = [
+    "Lançamento do produto no mercado português", "Estratégia de crescimento para 2025",
+    "Redesign da aplicação móvel", "Migração da infraestrutura para a cloud",
+    "Análise dos resultados do trimestre", "Plano de contratação da equipa",
+    "Expansão para o Brasil", "Parcerias com universidades", "Roadmap de IA",
+    "Orçamento de marketing", "Experiência do cliente", "Segurança e conformidade"
+]
+NAMES = ["Rui", "Ana", "Miguel", "Sofia", "João", "Marta", "Pedro", "Inês", "Tiago", "Beatriz"]
+
+# Variações que a normalização já trata (acertos exatos)
+EXACT_VARIANTS = [
+    lambda m: m,
+    lambda m: m.lower(),
+    lambda m: m.rstrip("?.!") + " ?",
+]
+# Variações de escrita (só a cache por semelhança as apanha)
+NEAR_VARIANTS = [
+    lambda m: "Olá, " + m,
+    lambda m: m.rstrip("?.!") + ", por favor?",
+    lambda m: "Pergunta rápida: " + m,
+    lambda m: m.replace("nossa", "a nossa").replace("nosso", "o nosso"),
+]
+
+# Perguntas diferentes mas muito parecidas (uma resposta de outra está errada)
+TEMPLATES = [
+    "Qual é o prazo para {x}?", "Quanto custa {x}?", "Quem fica responsável por {x}?",
+    "Que riscos vês em {x}?", "Como medimos o sucesso de {x}?"
+]
+SUBJECTS = [
+    "a campanha de março", "a campanha de abril", "o novo site", "a app móvel", "a migração da base de dados",
+    "o relatório trimestral", "a contratação de engenheiros", "o evento em Lisboa", "o evento no Porto",
+    "a parceria com a universidade", "o programa de fidelização", "a revisão de segurança"
+]
+
+
+def zipf_choice(rng: random.Random, items, s: float = 1.1):
+    weights = [1 / (i + 1) ** s for i in range(len(items))]
+    return rng.choices(items, weights)[0]
+
+
+def workload(requests: int, messages, unique: float, seed: int = 42):
+    """Pedidos (agente, tópico, mensagem, nome, id da pergunta original)"""
+    rng = random.Random(seed)
+    opening = "Abra a reunião de forma profissional e calorosa. Apresente-se brevemente e convide {name} a partilhar suas ideias sobre {topic}."
+    result = []
+    for _ in range(requests):
+        if rng.random() < 0.3:
+            topic, name = zipf_choice(rng, TOPICS), rng.choice(NAMES)
+            result.append(("elara", topic, opening.format(name=name, topic=topic), name, f"open:{topic}"))
+            continue
+        if rng.random() < unique:
+            # Cauda longa: combinações pouco repetidas
+            template, subject = rng.randrange(len(TEMPLATES)), rng.randrange(len(SUBJECTS))
+            message = TEMPLATES[template].format(x=SUBJECTS[subject])
+            result.append((route_message(message), "General Discussion", message, "", f"tail:{template}:{subject}"))
+            continue
+        base = zipf_choice(rng, range(len(messages)))
+        variants = EXACT_VARIANTS if rng.random() < 0.6 else NEAR_VARIANTS
+        message = rng.choice(variants)(messages[base])
+        result.append((route_message(message), "General Discussion", message, "", f"chat:{base}"))
+    return result
+
+
+def run(requests, llm_ms: float, similarity: float):
+    cache = ResponseCache(enabled=True, similarity=similarity, max_entries=4096)
+    wrong = 0
+    lookup_seconds = 0.0
+    for agent_id, topic, message, name, base in requests:
+        started = time.perf_counter()
+        cached = cache.get(agent_id, topic, message, user_name=name)
+        lookup_seconds += time.perf_counter() - started
+        if cached is None:
+            response = f"{base}|{name}" if name else base
+            cache.put(agent_id, topic, message, response, user_name=name, latency=llm_ms / 1000)
+        elif cached.split("|")[0] != base:
+            wrong += 1
+        elif name and not cached.endswith(name):
+            wrong += 1
+    stats = cache.stats()
+    return stats, wrong, lookup_seconds / len(requests) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acertos e tempo poupado pela cache de respostas")
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--llm-ms", type=float, default=900, help="Latência simulada de uma resposta do LLM")
+    parser.add_argument("--similarity", type=float, nargs="+", default=[0.95, 0.9, 0.85])
+    parser.add_argument("--unique", type=float, default=0.4, help="Fração de perguntas da cauda longa")
+    args = parser.parse_args()
+
+    with open(args.labels, encoding="utf-8") as f:
+        messages = [json.loads(line)["message"] for line in f if line.strip()]
+    requests = workload(args.requests, messages, args.unique)
+
+    print(f"📊 {args.requests} pedidos, LLM simulado a {args.llm_ms:.0f} ms\n")
+    print(f"{'modo':<14} {'acertos':>8} {'exatos':>7} {'próximos':>9} {'errados':>8} {'poupado':>10} {'média/pedido':>13} {'lookup':>9}")
+    for similarity in [0.0] + args.similarity:
+        stats, wrong, lookup_us = run(requests, args.llm_ms, similarity)
+        hits = stats["exact_hits"] + stats["near_hits"]
+        mean_ms = (len(requests) - hits) * args.llm_ms / len(requests)
+        name = "exata" if similarity == 0 else f"semelhança {similarity:.2f}"
+        print(f"{name:<14} {stats['hit_rate']:>8.1%} {stats['exact_hits']:>7} {stats['near_hits']:>9} {wrong:>8} "
+              f"{stats['saved_seconds']:>9.0f}s {mean_ms:>10.0f} ms {lookup_us:>7.1f}µs")
+    print(f"\nSem cache: {args.llm_ms:.0f} ms por pedido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Encaminhamento de mensagens para agentes
+Compara a cadeia de palavras-chave antiga (src/main.py) com o AgentRouter:
+precisão em mensagens rotuladas (PT/EN) e mensagens por segundo.
+
+routing_labels.jsonl foi usado para afinar as palavras-chave dos perfis;
+routing_holdout.jsonl não, e é a precisão nele que mede a generalização.
+
+Uso:
+    python benchmarks/bench_router.py
+    python benchmarks/bench_router.py --labels benchmarks/routing_labels.jsonl --repeat 200
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from agent_router import AgentRouter
+
+DEFAULT_LABELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_labels.jsonl")
+DEFAULT_HOLDOUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_holdout.jsonl")
+
+
+def legacy_route(content: str) -> str:
+    """Cadeia if/elif que existia no loop do WebSocket"""
+    responding_agent = "elara"
+    content_lower = content.lower()
+    if any(word in content_lower for word in ["marketing", "mercado", "campanha", "clientes"]):
+        responding_agent = "aurora"
+    elif any(word in content_lower for word in ["design", "visual", "interface", "ux", "ui"]):
+        responding_agent = "helios"
+    elif any(word in content_lower for word in ["técnico", "tecnologia", "sistema", "código", "arquitetura"]):
+        responding_agent = "hephaestus"
+    elif any(word in content_lower for word in ["dados", "análise", "métricas", "números", "estatística"]):
+        responding_agent = "athena"
+    return responding_agent
+
+
+def load_labels(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(name: str, route, tuning, holdout, repeat: int):
+    misses = [r for r in tuning + holdout if route(r["message"]) != r["agent"]]
+    tuning_accuracy = 1 - sum(r in tuning for r in misses) / len(tuning)
+    holdout_accuracy = 1 - sum(r in holdout for r in misses) / len(holdout)
+
+    messages = [r["message"] for r in tuning + holdout]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            route(message)
+    elapsed = time.perf_counter() - start
+    per_message = elapsed / (repeat * len(messages))
+
+    print(f"{name:<10} precisão {tuning_accuracy:6.1%} (afinação)  {holdout_accuracy:6.1%} (held-out)  "
+          f"{1 / per_message:10,.0f} msg/s  {per_message * 1e6:8.1f} µs/msg")
+    return misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do encaminhamento de agentes")
+    parser.add_argument("--labels", default=DEFAULT_LABELS, help="Conjunto usado para afinar")
+    parser.add_argument("--holdout", default=DEFAULT_HOLDOUT, help="Conjunto nunca usado para afinar")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    tuning = load_labels(args.labels)
+    holdout = load_labels(args.holdout)
+    router = AgentRouter()
+
+    print(f"📊 {len(tuning)} + {len(holdout)} (held-out) mensagens rotuladas, {args.repeat} repetições\n")
+    legacy_misses = evaluate("legacy", legacy_route, tuning, holdout, args.repeat)
+    router_misses = evaluate("router", lambda m: router.route(m).agent_id, tuning, holdout, args.repeat)
+
+    if args.show_misses:
+        for name, misses, route in (
+            ("legacy", legacy_misses, legacy_route),
+            ("router", router_misses, lambda m: router.route(m).agent_id)
+        ):
+            print(f"\n❌ {name}:")
+            for r in misses:
+                print(f"   esperado {r['agent']:<10} obtido {route(r['message']):<10} {r['message']}")
+
+
+if __name__ == "__main__":
+    main()
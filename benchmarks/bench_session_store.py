@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Session store (memory, SQLite, Redis)
+Para cada backend, N sessões com M mensagens cada:
+    append   mensagens/s juntadas e gravadas em lotes (flush)
+    history  latência p50 de history(last=50) por sessão
+    get      latência p50 dos metadados
+
+Antes de medir, confirma com cada backend que o histórico lido é o escrito
+(pela ordem) e que um lote cuja escrita falha volta à fila e é gravado no
+flush seguinte.
+
+O Redis é simulado com o fakeredis (pip install fakeredis), com a mesma API
+assíncrona do redis-py; --redis-url usa um servidor real.
+
+Uso:
+    python benchmarks/bench_session_store.py --sessions 200 --messages 50
+    python benchmarks/bench_session_store.py --redis-url redis://localhost:6379/15
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from conversation_history import HistoryEntry
+from session_store import MemorySessionStore, SQLiteSessionStore, RedisSessionStore
+
+META = {"thread_id": "meeting_bench", "user_name": "Rui", "topic": "Lançamento do produto"}
+CONTENT = "Proponho validarmos primeiro com um grupo de clientes e medir a adoção. " * 3
+
+
+def redis_stand_in():
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return fakeredis.FakeAsyncRedis()
+
+
+def build_stores(args):
+    stores = [
+        ("memory", MemorySessionStore()),
+        ("sqlite", SQLiteSessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db")))
+    ]
+    if args.redis_url:
+        stores.append(("redis", RedisSessionStore(args.redis_url)))
+    else:
+        client = redis_stand_in()
+        if client is None:
+            print("⚠️  fakeredis não instalado; Redis ignorado (pip install fakeredis ou --redis-url)")
+        else:
+            stores.append(("redis*", RedisSessionStore("redis://stand-in", client=client)))
+    return stores
+
+
+async def check(name: str, store) -> bool:
+    """Histórico lido == escrito, e um lote que falha não se perde"""
+    await store.create("check", META)
+    for i in range(5):
+        store.append("check", HistoryEntry("user", "Rui", f"mensagem {i}", float(i)))
+    await store.flush()
+
+    # Falha simulada na escrita do lote seguinte
+    write_batch = store._write_batch
+
+    async def failing(batch):
+        raise ConnectionError("falha simulada")
+
+    store._write_batch = failing
+    for i in range(5, 8):
+        store.append("check", HistoryEntry("elara", "Elara Veyra", f"mensagem {i}", float(i)))
+    await store.flush()
+    retained = store.stats()["pending"]
+    store._write_batch = write_batch
+    await store.flush()
+
+    contents = [entry.content for entry in await store.history("check")]
+    meta = await store.get("check")
+    await store.update("check", {"summary": "Resumo"})
+    ok = (
+        retained == 3
+        and contents == [f"mensagem {i}" for i in range(8)]
+        and meta == META
+        and (await store.get("check"))["summary"] == "Resumo"
+        and [e.content for e in await store.history("check", last=2)] == ["mensagem 6", "mensagem 7"]
+    )
+    await store.delete("check")
+    print(f"{'✅' if ok else '❌'} {name:<7} histórico, metadados e lote que falhou "
+          f"({retained} mensagens na fila após a falha, {len(contents)} lidas)")
+    return ok
+
+
+async def measure(name: str, store, sessions: int, messages: int):
+    ids = [f"bench-{i}" for i in range(sessions)]
+    for session_id in ids:
+        await store.create(session_id, META)
+
+    started = time.perf_counter()
+    for m in range(messages):
+        for session_id in ids:
+            store.append(session_id, HistoryEntry("user", "Rui", CONTENT, float(m)))
+            if len(store._pending) >= store.batch_size:
+                await store.flush()
+    await store.flush()
+    append_rate = sessions * messages / (time.perf_counter() - started)
+
+    history_ms, get_ms = [], []
+    for session_id in ids:
+        t0 = time.perf_counter()
+        await store.history(session_id, last=50)
+        history_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        await store.get(session_id)
+        get_ms.append((time.perf_counter() - t0) * 1000)
+
+    for session_id in ids:
+        await store.delete(session_id)
+    print(f"  {name:<7} {append_rate:10,.0f} mensagens/s  history p50 {statistics.median(history_ms):6.2f} ms  "
+          f"get p50 {statistics.median(get_ms):6.2f} ms  ({store.stats()['batches']} lotes)")
+
+
+async def run(args) -> bool:
+    stores = build_stores(args)
+    ok = True
+    for name, store in stores:
+        ok = await check(name, store) and ok
+
+    print(f"\n📊 {args.sessions} sessões x {args.messages} mensagens, lotes de {stores[0][1].batch_size}")
+    for name, store in stores:
+        await measure(name, store, args.sessions, args.messages)
+        await store.close()
+    if not args.redis_url:
+        print("\n  redis* = fakeredis (sem rede; mede o custo do cliente, não o do servidor)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session store: verificação e débito por backend")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--redis-url", help="Servidor Redis real em vez do fakeredis")
+    args = parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Mock Services - OpenAI, ElevenLabs e D-ID simulados localmente (offline)
+Um só servidor com os endpoints que o backend usa:
+    POST /v1/chat/completions                  JSON ou SSE (stream=true, com usage)
+    POST /v1/text-to-speech/{voz}              MP3 completo
+    POST /v1/text-to-speech/{voz}/stream       MP3 em chunks
+    POST /talks, GET /talks/{id}               talk D-ID (render com latência)
+    GET  /talks/{id}.mp4                       vídeo do talk
+    GET  /__stats                              pedidos, erros e latências servidas
+
+Latências configuráveis por distribuição e taxa de erros por serviço.
+Apontar o backend com OPENAI_BASE_URL=<url>/v1, ELEVENLABS_BASE_URL=<url>/v1
+e DID_BASE_URL=<url>.
+
+Uso:
+    python benchmarks/mock_services.py --port 9100 --llm-ttft lognormal:400:0.4 --llm-errors 0.01
+"""
+
+import time
+import json
+import uuid
+import random
+import asyncio
+import argparse
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+WORDS = (
+    "proponho validarmos a estratégia com um grupo piloto de clientes medir a adoção nas primeiras "
+    "semanas ajustar o plano com base nos dados e alinhar marketing produto e tecnologia num "
+    "calendário comum com metas claras para o trimestre"
+).split()
+
+# Frame MPEG de silêncio (cabeçalho válido) repetido para simular áudio
+MP3_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class Latency:
+    """
+    Distribuição de latência a partir de uma especificação em ms:
+        const:200 | uniform:100:400 | normal:300:50 | lognormal:300:0.5 (mediana, sigma)
+    """
+
+    def __init__(self, spec: str):
+        kind, *params = spec.split(":")
+        self.spec = spec
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind not in ("const", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Distribuição desconhecida: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Uma amostra em segundos"""
+        p = self.params
+        if self.kind == "const":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1])
+        else:
+            ms = p[0] * rng.lognormvariate(0, p[1])
+        return max(0.0, ms) / 1000
+
+
+class MockConfig:
+    def __init__(
+        self,
+        llm_ttft: str = "lognormal:350:0.4",
+        llm_token: str = "const:12",
+        llm_tokens: int = 60,
+        tts: str = "lognormal:250:0.3",
+        tts_chunks: int = 8,
+        tts_chunk: str = "const:40",
+        did_create: str = "lognormal:300:0.3",
+        did_render: str = "lognormal:4000:0.3",
+        llm_errors: float = 0.0,
+        tts_errors: float = 0.0,
+        did_errors: float = 0.0,
+        seed: int = 42
+    ):
+        self.llm_ttft = Latency(llm_ttft)
+        self.llm_token = Latency(llm_token)
+        self.llm_tokens = llm_tokens
+        self.tts = Latency(tts)
+        self.tts_chunks = tts_chunks
+        self.tts_chunk = Latency(tts_chunk)
+        self.did_create = Latency(did_create)
+        self.did_render = Latency(did_render)
+        self.errors = {"llm": llm_errors, "tts": tts_errors, "did": did_errors}
+        self.rng = random.Random(seed)
+
+    def failed(self, service: str) -> bool:
+        return self.rng.random() < self.errors[service]
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    rng = config.rng
+    stats: Dict[str, Dict] = {}
+    talks: Dict[str, float] = {}   # id -> quando fica pronto
+
+    def record(service: str, seconds: float, error: bool = False):
+        entry = stats.setdefault(service, {"requests": 0, "errors": 0, "latency_s": 0.0})
+        entry["requests"] += 1
+        entry["errors"] += error
+        entry["latency_s"] += seconds
+
+    def error_response(service: str) -> JSONResponse:
+        record(service, 0.0, error=True)
+        return JSONResponse({"error": {"message": f"mock {service} error", "type": "server_error"}}, status_code=500)
+
+    def completion_text() -> str:
+        start = rng.randrange(len(WORDS))
+        return " ".join(WORDS[(start + i) % len(WORDS)] for i in range(config.llm_tokens)).capitalize() + "."
+
+    @app.api_route("/", methods=["GET", "HEAD"])
+    @app.api_route("/v1", methods=["GET", "HEAD"])
+    async def root():
+        # Aquecimento de conexões (HEAD ao base_url)
+        return Response(status_code=200)
+
+    @app.get("/__stats")
+    async def get_stats():
+        return {
+            service: {**entry, "mean_ms": round(entry["latency_s"] / max(entry["requests"] - entry["errors"], 1) * 1000, 1)}
+            for service, entry in stats.items()
+        }
+
+    # --------------------------------------------------------------
+    # OpenAI
+    # --------------------------------------------------------------
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if config.failed("llm"):
+            return error_response("llm")
+
+        model = body.get("model", "mock")
+        words = completion_text().split(" ")
+        ttft = config.llm_ttft.sample(rng)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(words), "total_tokens": prompt_tokens + len(words)}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            delay = ttft + sum(config.llm_token.sample(rng) for _ in words)
+            await asyncio.sleep(delay)
+            record("llm", delay)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+                "usage": usage
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        def chunk(delta: Dict, finish_reason=None, **extra) -> bytes:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                **extra
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        async def events():
+            started = time.perf_counter()
+            await asyncio.sleep(ttft)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                yield chunk({"content": word if i == 0 else " " + word})
+                await asyncio.sleep(config.llm_token.sample(rng))
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                yield chunk(None, usage=usage)
+            yield b"data: [DONE]\n\n"
+            record("llm", time.perf_counter() - started)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # --------------------------------------------------------------
+    # ElevenLabs
+    # --------------------------------------------------------------
+
+    def audio_for(text: str) -> bytes:
+        # ~1 frame por cada 4 caracteres (a duração acompanha o texto)
+        return MP3_FRAME * max(1, len(text) // 4)
+
+    @app.post("/v1/text-to-speech/{voice_id}")
+    async def text_to_speech(voice_id: str, request: Request):
+        body = await request.json()
+        if config.failed("tts"):
+            return error_response("tts")
+        delay = config.tts.sample(rng)
+        await asyncio.sleep(delay)
+        record("tts", delay)
+        return Response(audio_for(body.get("text", "")), media_type="audio/mpeg")
+
+    @app.post("/v1/text-to-speech/{voice_id}/stream")
+    async def text_to_speech_stream(voice_id: str, request: Request):
+        body = await request.json()
+        if config.failed("tts"):
+            return error_response("tts")
+        audio = audio_for(body.get("text", ""))
+        size = -(-len(audio) // config.tts_chunks)
+
+        async def chunks():
+            started = time.perf_counter()
+            await asyncio.sleep(config.tts.sample(rng))
+            for offset in range(0, len(audio), size):
+                yield audio[offset:offset + size]
+                await asyncio.sleep(config.tts_chunk.sample(rng))
+            record("tts_stream", time.perf_counter() - started)
+
+        return StreamingResponse(chunks(), media_type="audio/mpeg")
+
+    @app.get("/v1/voices")
+    async def voices():
+        return {"voices": []}
+
+    # --------------------------------------------------------------
+    # D-ID
+    # --------------------------------------------------------------
+
+    @app.post("/talks")
+    async def create_talk(request: Request):
+        await request.json()
+        if config.failed("did"):
+            return error_response("did")
+        delay = config.did_create.sample(rng)
+        await asyncio.sleep(delay)
+        record("did", delay)
+        talk_id = f"tlk_{uuid.uuid4().hex[:16]}"
+        talks[talk_id] = time.time() + config.did_render.sample(rng)
+        return JSONResponse({"id": talk_id, "object": "talk", "status": "created"}, status_code=201)
+
+    @app.get("/talks/{talk_id}.mp4")
+    async def talk_video(talk_id: str):
+        return Response(b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 32 * 1024, media_type="video/mp4")
+
+    @app.get("/talks/{talk_id}")
+    async def get_talk(talk_id: str, request: Request):
+        ready_at = talks.get(talk_id)
+        if ready_at is None:
+            return JSONResponse({"kind": "NotFoundError"}, status_code=404)
+        if time.time() < ready_at:
+            return {"id": talk_id, "status": "started"}
+        return {
+            "id": talk_id, "status": "done",
+            "result_url": f"{str(request.base_url).rstrip('/')}/talks/{talk_id}.mp4"
+        }
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Opções das latências/erros (partilhadas com bench_load.py)"""
+    group = parser.add_argument_group("serviços simulados (ms: const:N | uniform:A:B | normal:M:SD | lognormal:MEDIANA:SIGMA)")
+    group.add_argument("--llm-ttft", default="lognormal:350:0.4", help="Tempo até ao primeiro token")
+    group.add_argument("--llm-token", default="const:12", help="Intervalo entre tokens")
+    group.add_argument("--llm-tokens", type=int, default=60, help="Palavras por resposta")
+    group.add_argument("--tts", default="lognormal:250:0.3", help="Latência do ElevenLabs (até ao 1.º chunk no stream)")
+    group.add_argument("--tts-chunks", type=int, default=8)
+    group.add_argument("--tts-chunk", default="const:40", help="Intervalo entre chunks no stream")
+    group.add_argument("--did-create", default="lognormal:300:0.3")
+    group.add_argument("--did-render", default="lognormal:4000:0.3", help="Tempo até o talk ficar pronto")
+    group.add_argument("--llm-errors", type=float, default=0.0, help="Fração de pedidos com erro 500")
+    group.add_argument("--tts-errors", type=float, default=0.0)
+    group.add_argument("--did-errors", type=float, default=0.0)
+    group.add_argument("--seed", type=int, default=42)
+
+
+def config_from_args(args) -> MockConfig:
+    return MockConfig(
+        llm_ttft=args.llm_ttft, llm_token=args.llm_token, llm_tokens=args.llm_tokens,
+        tts=args.tts, tts_chunks=args.tts_chunks, tts_chunk=args.tts_chunk,
+        did_create=args.did_create, did_render=args.did_render,
+        llm_errors=args.llm_errors, tts_errors=args.tts_errors, did_errors=args.did_errors,
+        seed=args.seed
+    )
+
+
+def serve(config: MockConfig, port: int, host: str = "127.0.0.1"):
+    uvicorn.run(create_app(config), host=host, port=port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI, ElevenLabs e D-ID simulados")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    url = f"http://{args.host}:{args.port}"
+    print(f"📊 Serviços simulados em {url}")
+    print(f"   OPENAI_BASE_URL={url}/v1 ELEVENLABS_BASE_URL={url}/v1 DID_BASE_URL={url}")
+    serve(config_from_args(args), args.port, args.host)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Agent Communication Hub - Memória das conversas entre agentes e participantes
+send_message não bloqueia: a mensagem entra numa fila e uma tarefa de fundo
+grava-a em lotes num SQLite (WAL), indexado por (thread_id, created_at).
+get_thread devolve as mensagens de uma thread (também as que ainda estão
+na fila).
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import tempfile
+from typing import List, Dict, Optional
+
+from persistence import SQLiteConnections, WriteBehind
+
+# Configuração (via env vars)
+HUB_DB_PATH = os.getenv("HUB_DB_PATH", os.path.join(tempfile.gettempdir(), "staff_ai_hub.db"))
+HUB_BATCH = int(os.getenv("HUB_BATCH", "128"))
+HUB_FLUSH_INTERVAL = float(os.getenv("HUB_FLUSH_INTERVAL", "0.5"))
+HUB_MAX_PENDING = int(os.getenv("HUB_MAX_PENDING", "10000"))   # Acima disto as mais antigas perdem-se
+
+
+class HubMessage:
+    """Uma mensagem guardada no hub"""
+
+    __slots__ = ("id", "thread_id", "from_agent", "to_agent", "content", "message_type", "created_at")
+
+    def __init__(
+        self,
+        id: str,
+        thread_id: Optional[str],
+        from_agent: str,
+        to_agent: str,
+        content: str,
+        message_type: str,
+        created_at: float
+    ):
+        self.id = id
+        self.thread_id = thread_id
+        self.from_agent = from_agent
+        self.to_agent = to_agent
+        self.content = content
+        self.message_type = message_type
+        self.created_at = created_at
+
+    def to_record(self) -> tuple:
+        return (self.id, self.thread_id, self.from_agent, self.to_agent,
+                self.content, self.message_type, self.created_at)
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "thread_id": self.thread_id,
+            "from_agent": self.from_agent,
+            "to_agent": self.to_agent,
+            "content": self.content,
+            "message_type": self.message_type,
+            "created_at": self.created_at
+        }
+
+
+class AgentCommunicationHub(WriteBehind):
+    """
+    Hub de comunicação com escrita diferida
+
+    O turno nunca espera pela gravação: send_message só junta a mensagem à
+    fila. Chamar start() dentro do event loop para ativar a gravação em
+    fundo e close() no fim para gravar o que falta.
+    """
+
+    label = "mensagens do hub"
+
+    def __init__(
+        self,
+        db_path: str = HUB_DB_PATH,
+        batch_size: int = HUB_BATCH,
+        flush_interval: float = HUB_FLUSH_INTERVAL,
+        max_pending: int = HUB_MAX_PENDING
+    ):
+        super().__init__(batch_size, flush_interval, max_pending)
+        self.db_path = db_path
+        self._conn = SQLiteConnections(db_path)
+        self._stats["messages"] = 0
+        self._init_db()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def send_message(
+        self,
+        from_agent: str,
+        to_agent: str,
+        content: str,
+        message_type: str = "message",
+        thread_id: Optional[str] = None
+    ) -> str:
+        """
+        Registar uma mensagem (não bloqueia)
+
+        Returns:
+            ID da mensagem
+        """
+
+        message = HubMessage(uuid.uuid4().hex, thread_id, from_agent, to_agent, content, message_type, time.time())
+        self._enqueue(message)
+        self._stats["messages"] += 1
+        return message.id
+
+    async def get_thread(
+        self,
+        thread_id: str,
+        since: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Mensagens de uma thread por ordem (as posteriores a `since`, se indicado)
+
+        Args:
+            thread_id: ID da thread
+            since: Timestamp (epoch); só mensagens mais recentes
+            limit: Máximo de mensagens (as primeiras a partir de `since`)
+        """
+
+        stored, pending = await self._read_with_pending(
+            lambda: asyncio.to_thread(self._get_thread_sync, thread_id, since, limit),
+            lambda message: message.thread_id == thread_id and (since is None or message.created_at > since)
+        )
+        messages = stored + [message.to_dict() for message in pending]
+        return messages[:limit] if limit else messages
+
+    async def _write_batch(self, batch: List[HubMessage]):
+        await asyncio.to_thread(self._write_batch_sync, batch)
+
+    # ------------------------------------------------------------------
+    # SQLite (operações síncronas, correm numa thread)
+    # ------------------------------------------------------------------
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS hub_messages (
+                id TEXT NOT NULL,
+                thread_id TEXT,
+                from_agent TEXT NOT NULL,
+                to_agent TEXT NOT NULL,
+                content TEXT NOT NULL,
+                message_type TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_hub_thread_time ON hub_messages(thread_id, created_at);
+        """)
+        conn.commit()
+
+    def _write_batch_sync(self, batch: List[HubMessage]):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO hub_messages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [message.to_record() for message in batch]
+            )
+
+    def _get_thread_sync(self, thread_id: str, since: Optional[float], limit: Optional[int]) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT id, thread_id, from_agent, to_agent, content, message_type, created_at "
+            "FROM hub_messages WHERE thread_id = ? AND created_at > ? "
+            "ORDER BY created_at, rowid LIMIT ?",
+            (thread_id, -1.0 if since is None else since, -1 if limit is None else limit)
+        ).fetchall()
+        return [HubMessage(*row).to_dict() for row in rows]
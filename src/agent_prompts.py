@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Agent Prompts - Prompts dos agentes com prefixo fixo por agente
+O prefixo (persona, instruções) é compilado uma vez a partir de
+AGENTS_CONFIG e é sempre o mesmo texto, byte a byte. A parte da sessão
+(tópico, participante, histórico) e a do turno vêm depois, em mensagens
+próprias, para que o início do pedido seja sempre igual.
+
+A cache de prompts do OpenAI só atua a partir de 1024 tokens repetidos. O
+prefixo tem cerca de 150 tokens e um pedido típico ~500 (bench_prompt_cache):
+com estes prompts não há cached_tokens, com ou sem prompt_cache_key. O
+prefixo não é aumentado só para chegar ao mínimo: cada token a mais é pago
+em todos os pedidos.
+"""
+
+import os
+from types import MappingProxyType
+from typing import Dict, List, Mapping
+
+# Enviar prompt_cache_key ao OpenAI (agrupa os pedidos de cada agente). Desligado
+# por defeito: só ajuda com prompts acima de 1024 tokens (ver acima)
+PROMPT_CACHE_KEY = os.getenv("PROMPT_CACHE_KEY", "0") == "1"
+PROMPT_CACHE_KEY_PREFIX = os.getenv("PROMPT_CACHE_KEY_PREFIX", "staff-ai")
+
+INSTRUCTIONS = """INSTRUÇÕES CRÍTICAS:
+- Responda em português de Portugal
+- Máximo 120 palavras (seja conciso e direto)
+- Mantenha tom profissional mas acessível
+- Contribua com insights específicos da sua área de expertise
+- Seja colaborativo e construtivo
+- Use dados e exemplos quando relevante
+- Evite repetir o que outros já disseram"""
+
+
+def compile_agent_prefix(agent: Dict) -> str:
+    """Prefixo fixo de um agente (não depende da sessão nem do turno)"""
+
+    return f"""Você é {agent['name']}, {agent['role']} da Sentient Sphere Technologies.
+
+PERSONALIDADE E TOM: {agent['personality']}
+
+Você está numa reunião executiva profissional
+
+{INSTRUCTIONS}"""
+
+
+def compile_agent_prefixes(agents: Mapping[str, Dict]) -> Mapping[str, str]:
+    """Prefixos de todos os agentes (imutável)"""
+    return MappingProxyType({
+        agent_id: compile_agent_prefix(agent)
+        for agent_id, agent in agents.items()
+    })
+
+
+def session_prompt(topic: str, user_name: str, history_text: str) -> str:
+    """Parte da sessão e do histórico (muda de turno para turno)"""
+    return f"""CONTEXTO DA REUNIÃO:
+- Tópico: {topic}
+- Participante: {user_name}{history_text}"""
+
+
+def prompt_messages(prefix: str, session_text: str, context: str) -> List[Dict[str, str]]:
+    """Mensagens do pedido: prefixo fixo, sessão, instrução do turno"""
+    return [
+        {"role": "system", "content": prefix},
+        {"role": "system", "content": session_text},
+        {"role": "user", "content": context}
+    ]
+
+
+def prompt_cache_params(agent_id: str) -> Dict[str, str]:
+    """Parâmetros de cache do pedido (prompt_cache_key por agente, se PROMPT_CACHE_KEY=1)"""
+    if not PROMPT_CACHE_KEY or not PROMPT_CACHE_KEY_PREFIX:
+        return {}
+    return {"prompt_cache_key": f"{PROMPT_CACHE_KEY_PREFIX}:{agent_id}"}
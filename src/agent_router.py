@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Agent Router - Escolha do agente que responde a uma mensagem
+Palavras-chave + nomes numa única passagem regex e similaridade vetorial (NumPy)
+
+Partilhado por src/main.py, src/server.py e api/chat.py.
+"""
+
+import os
+import re
+import zlib
+import unicodedata
+from functools import lru_cache
+from typing import List, Dict
+
+import numpy as np
+
+# Configuração (via env vars)
+ROUTER_DIM = int(os.getenv("ROUTER_DIM", "2048"))
+ROUTER_MIN_SCORE = float(os.getenv("ROUTER_MIN_SCORE", "0.12"))
+ROUTER_MULTI_THRESHOLD = float(os.getenv("ROUTER_MULTI_THRESHOLD", "0.5"))
+
+DEFAULT_AGENT = "elara"
+
+# Pesos da combinação de sinais
+KEYWORD_WEIGHT = 0.35
+SIMILARITY_WEIGHT = 1.0
+NAME_BONUS = 2.0
+
+# Perfis dos agentes: nomes pelos quais podem ser chamados, palavras-chave
+# fortes (PT e EN) e um texto descritivo para a similaridade vetorial
+AGENT_PROFILES = {
+    "elara": {
+        "names": ["elara", "veyra", "ceo", "chief of staff"],
+        "keywords": [
+            "estrategia", "estrategico", "visao", "lideranca", "prioridade", "prioridades",
+            "decisao", "decidir", "objetivo", "objetivos", "okr", "okrs", "plano", "roadmap",
+            "investimento", "investidores", "orcamento", "equipa", "contratar", "parceria",
+            "strategy", "vision", "leadership", "priorities", "budget", "hiring", "team"
+        ],
+        "profile": (
+            "estrategia visao lideranca decisao prioridades objetivos metas plano de negocio "
+            "crescimento da empresa investimento investidores orcamento equipa contratacao "
+            "parcerias cultura organizacao governance resumo proximos passos coordenar reuniao "
+            "strategy vision leadership decision priorities goals business plan growth budget hiring"
+        )
+    },
+    "aurora": {
+        "names": ["aurora", "castellane", "cmo"],
+        "keywords": [
+            "marketing", "mercado", "campanha", "campanhas", "clientes", "cliente", "marca",
+            "branding", "publicidade", "anuncios", "redes sociais", "instagram", "linkedin",
+            "seo", "conversao", "funil", "leads", "growth", "lancamento", "posicionamento",
+            "brand", "campaign", "audience", "customers", "ads", "social media", "launch"
+        ],
+        "profile": (
+            "marketing mercado campanha clientes marca branding publicidade anuncios redes sociais "
+            "conteudo storytelling comunicacao publico alvo persona segmentacao funil de vendas "
+            "conversao leads aquisicao retencao growth hacking lancamento posicionamento concorrencia "
+            "preco vendas brand campaign audience customers advertising social media launch pricing"
+        )
+    },
+    "helios": {
+        "names": ["helios", "vanterre", "cdo"],
+        "keywords": [
+            "design", "visual", "interface", "ux", "ui", "layout", "logotipo", "logo",
+            "cores", "tipografia", "prototipo", "wireframe", "usabilidade", "estetica",
+            "ecra", "ecras", "figma", "mockup", "ilustracao", "icone", "icones", "botao", "botoes",
+            "colors", "typography", "prototype", "usability", "screen", "mockups"
+        ],
+        "profile": (
+            "design visual interface experiencia do utilizador ux ui layout logotipo identidade visual "
+            "cores paleta tipografia prototipo wireframe usabilidade estetica ecras aplicacao movel "
+            "navegacao acessibilidade figma mockup ilustracao icones animacao look and feel "
+            "user experience colors typography prototype usability screens accessibility"
+        )
+    },
+    "hephaestus": {
+        "names": ["hephaestus", "forge", "cto"],
+        "keywords": [
+            "tecnico", "tecnica", "tecnologia", "sistema", "sistemas", "codigo", "arquitetura",
+            "servidor", "servidores", "backend", "frontend", "api", "apis", "infraestrutura",
+            "cloud", "nuvem", "base de dados", "seguranca", "escalabilidade", "deploy",
+            "bug", "bugs", "latencia", "performance", "integracao", "microservicos", "kubernetes",
+            "tech", "code", "infrastructure", "database", "security", "scalability", "server"
+        ],
+        "profile": (
+            "tecnologia sistema codigo arquitetura de software servidores backend frontend api "
+            "infraestrutura cloud nuvem base de dados seguranca escalabilidade deploy desenvolvimento "
+            "programacao bugs latencia performance integracao microservicos devops automacao "
+            "inteligencia artificial modelos tech code software architecture infrastructure database "
+            "security scalability engineering development"
+        )
+    },
+    "athena": {
+        "names": ["athena", "sophros", "cko"],
+        "keywords": [
+            "dados", "analise", "analisar", "metricas", "numeros", "estatistica", "estatisticas",
+            "relatorio", "relatorios", "kpi", "kpis", "dashboard", "pesquisa", "estudo",
+            "conhecimento", "tendencias", "benchmark", "indicadores", "previsao", "insights", "evidencia",
+            "data", "analysis", "research", "knowledge", "metrics", "report", "statistics"
+        ],
+        "profile": (
+            "dados analise metricas numeros estatistica relatorio kpi dashboard indicadores pesquisa "
+            "estudo de mercado conhecimento documentacao tendencias benchmark previsao insights "
+            "evidencia fontes comparacao percentagem medicao resultados data analysis research "
+            "knowledge metrics statistics report evidence trends forecast"
+        )
+    }
+}
+
+
+def normalize(text: str) -> str:
+    """Minúsculas e sem acentos ("Análise" -> "analise")"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    # Decompor e descartar as marcas (emojis e outros símbolos também caem)
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=50000)
+def _word_features(word: str, dim: int) -> tuple:
+    """Índices da palavra e dos seus trigramas (memorizado: o vocabulário repete-se)"""
+    padded = f"<{word}>"
+    return (zlib.crc32(word.encode()) % dim,) + tuple(
+        zlib.crc32(padded[i:i + 3].encode()) % dim for i in range(len(padded) - 2)
+    )
+
+
+def hashed_features(text: str, dim: int = ROUTER_DIM, normalized: bool = False) -> np.ndarray:
+    """
+    Vetor de features por hashing (palavras + trigramas de caracteres)
+
+    Não precisa de vocabulário nem de modelo: funciona offline e tolera
+    variações ("campanha"/"campanhas", erros de escrita).
+    """
+
+    indices = []
+    weights = []
+    for word in WORD_RE.findall(text if normalized else normalize(text)):
+        if len(word) < 2:
+            continue
+        features = _word_features(word, dim)
+        indices.extend(features)
+        weights.append(1.0)
+        weights.extend([0.5] * (len(features) - 1))
+
+    vector = np.bincount(indices, weights, minlength=dim).astype(np.float32)
+
+    # Amortecer repetições e normalizar (similaridade de cosseno = produto interno)
+    np.log1p(vector, out=vector)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class RouteResult:
+    """Resultado do encaminhamento"""
+
+    __slots__ = ("agent_id", "confidence", "scores", "addressed", "agents")
+
+    def __init__(self, agent_id: str, confidence: float, scores: Dict[str, float], addressed: List[str], agents: List[str]):
+        self.agent_id = agent_id
+        self.confidence = confidence
+        self.scores = scores
+        self.addressed = addressed
+        self.agents = agents
+
+    def to_dict(self) -> Dict:
+        return {
+            "agent_id": self.agent_id,
+            "confidence": self.confidence,
+            "scores": self.scores,
+            "addressed": self.addressed,
+            "agents": self.agents
+        }
+
+
+class AgentRouter:
+    """
+    Motor de encaminhamento
+
+    - Uma regex com todas as palavras-chave e nomes (uma passagem pela mensagem)
+    - Similaridade de cosseno com os vetores de perfil dos agentes (uma
+      multiplicação matriz-vetor para todos os agentes de uma vez)
+    """
+
+    def __init__(self, profiles: Dict[str, Dict] = AGENT_PROFILES, dim: int = ROUTER_DIM, default_agent: str = DEFAULT_AGENT):
+        self.agent_ids = list(profiles)
+        self.dim = dim
+        self.default_agent = default_agent
+        index = {agent_id: i for i, agent_id in enumerate(self.agent_ids)}
+
+        # termo -> (índice do agente, é nome?)
+        self._terms: Dict[str, tuple] = {}
+        for agent_id, profile in profiles.items():
+            for keyword in profile["keywords"]:
+                self._terms[normalize(keyword)] = (index[agent_id], False)
+            for name in profile["names"]:
+                self._terms[normalize(name)] = (index[agent_id], True)
+
+        alternatives = sorted(self._terms, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(re.escape(t) for t in alternatives) + r")\b")
+
+        # Matriz de perfis (agentes x dim), linhas normalizadas
+        self._profiles = np.stack([
+            hashed_features(" ".join([p["profile"], *p["keywords"]]), dim)
+            for p in profiles.values()
+        ])
+
+    def score(self, message: str) -> Dict[str, np.ndarray]:
+        """Sinais brutos por agente (palavras-chave, nomes, similaridade)"""
+
+        n = len(self.agent_ids)
+        keyword_hits = np.zeros(n, dtype=np.float32)
+        named = np.zeros(n, dtype=np.float32)
+
+        text = normalize(message)
+        for term in self._pattern.findall(text):
+            agent_index, is_name = self._terms[term]
+            if is_name:
+                named[agent_index] = 1.0
+            else:
+                keyword_hits[agent_index] += 1.0
+
+        similarity = self._profiles @ hashed_features(text, self.dim, normalized=True)
+        return {"keywords": keyword_hits, "named": named, "similarity": similarity}
+
+    def route(self, message: str, multi: bool = False, threshold: float = ROUTER_MULTI_THRESHOLD) -> RouteResult:
+        """
+        Escolher o(s) agente(s) para uma mensagem
+
+        Args:
+            message: Texto do participante
+            multi: Devolver também todos os agentes relevantes (mesa redonda)
+            threshold: Confiança mínima (relativa ao melhor) para entrar em multi
+
+        Returns:
+            RouteResult com agente principal, confiança (0-1) e pontuações
+        """
+
+        signals = self.score(message)
+        combined = (
+            KEYWORD_WEIGHT * np.minimum(signals["keywords"], 3.0)
+            + SIMILARITY_WEIGHT * signals["similarity"]
+            + NAME_BONUS * signals["named"]
+        )
+
+        addressed = [self.agent_ids[i] for i in np.flatnonzero(signals["named"])]
+        best = int(np.argmax(combined))
+        top = float(combined[best])
+
+        # Confiança: peso do melhor agente face aos restantes
+        exp = np.exp((combined - top) * 8.0)
+        confidences = exp / exp.sum()
+        scores = {agent_id: round(float(c), 4) for agent_id, c in zip(self.agent_ids, confidences)}
+
+        # Sem sinal suficiente: responde o agente por defeito (Elara)
+        agent_id = self.agent_ids[best] if top >= ROUTER_MIN_SCORE else self.default_agent
+        confidence = scores[agent_id]
+
+        agents = [agent_id]
+        if multi:
+            relevant = [
+                self.agent_ids[i] for i in np.argsort(-combined)
+                if self.agent_ids[i] in addressed or (combined[i] >= ROUTER_MIN_SCORE and combined[i] >= threshold * top)
+            ]
+            agents = relevant or agents
+
+        return RouteResult(agent_id, confidence, scores, addressed, agents)
+
+
+# Router partilhado
+router = AgentRouter()
+
+
+def route_message(message: str) -> str:
+    """Atalho: ID do agente que deve responder"""
+    return router.route(message).agent_id
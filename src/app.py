@@ -1,78 +1,303 @@
 #!/usr/bin/env python3
 """
-STAFF AI Meeting Room - Flask Wrapper
-Serve o frontend React e faz proxy para o backend FastAPI
+STAFF AI Meeting Room - Gateway ASGI
+Serve o frontend React e faz proxy para o backend FastAPI (main.py):
+    - pedidos HTTP com conexões reutilizadas e corpos em streaming
+      (pedido e resposta nunca ficam inteiros em memória)
+    - WebSockets (/ws/...) passados ao backend nos dois sentidos
+    - tráfego só segue quando o backend responde à sonda de prontidão
+      (GET /ready dá 503 até lá)
+
+Uso:
+    python app.py                                  # lança também o backend
+    GATEWAY_SPAWN_BACKEND=0 BACKEND_URL=http://10.0.0.2:8002 python app.py
 """
 
 import os
-import subprocess
-import time
-from flask import Flask, send_from_directory, request, Response
-from flask_cors import CORS
-import requests
-
-# Inicializar Flask
-app = Flask(__name__, static_folder='static', static_url_path='')
-CORS(app)
-
-# URL do backend FastAPI (local)
-FASTAPI_URL = "http://localhost:8002"
-
-# Iniciar FastAPI em background
-def start_fastapi():
-    """Iniciar servidor FastAPI em background"""
-    subprocess.Popen([
-        "python3", "/home/ubuntu/meeting_room_app/src/main.py"
-    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    time.sleep(3)  # Aguardar inicialização
-
-# Iniciar FastAPI ao carregar
-start_fastapi()
-
-@app.route('/')
-def index():
-    """Servir frontend React"""
-    return send_from_directory(app.static_folder, 'index.html')
-
-@app.route('/<path:path>')
-def serve_static(path):
-    """Servir arquivos estáticos ou frontend"""
-    file_path = os.path.join(app.static_folder, path)
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return send_from_directory(app.static_folder, path)
-    # Se não for arquivo, servir index.html (SPA routing)
-    return send_from_directory(app.static_folder, 'index.html')
-
-@app.route('/api/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
-def proxy_api(path):
-    """Proxy para API FastAPI"""
-    url = f"{FASTAPI_URL}/{path}"
-    
-    # Preparar request
-    headers = {key: value for key, value in request.headers if key.lower() != 'host'}
-    
+import sys
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from websockets.asyncio.client import connect as ws_connect
+
+from http_transport import HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HTTP_CONNECT_TIMEOUT
+from static_manifest import static_manifest
+
+# Configuração (via env vars)
+BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8002").rstrip("/")
+GATEWAY_SPAWN_BACKEND = os.getenv("GATEWAY_SPAWN_BACKEND", "1") == "1"
+GATEWAY_READY_PATH = os.getenv("GATEWAY_READY_PATH", "/")
+GATEWAY_READY_TIMEOUT = float(os.getenv("GATEWAY_READY_TIMEOUT", "30"))    # Espera máxima de um pedido pelo backend
+GATEWAY_PROBE_INTERVAL = float(os.getenv("GATEWAY_PROBE_INTERVAL", "5"))   # Sonda com o backend pronto
+GATEWAY_PROBE_FAILURES = int(os.getenv("GATEWAY_PROBE_FAILURES", "3"))     # Falhas seguidas até deixar de estar pronto
+GATEWAY_TIMEOUT = float(os.getenv("GATEWAY_TIMEOUT", "120"))               # Leitura (respostas em streaming)
+# Caminhos do backend servidos tal como estão (o resto é frontend; /api/... perde o prefixo)
+GATEWAY_BACKEND_PATHS = tuple(
+    path.strip()
+    for path in os.getenv("GATEWAY_BACKEND_PATHS", "/meeting,/agents,/metrics,/threads,/avatar,/cache,/voice").split(",")
+    if path.strip()
+)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Headers que não passam pelo proxy (hop-by-hop)
+HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host"
+}
+# Headers do pedido WebSocket que o cliente websockets gera ele próprio
+WS_SKIP_HEADERS = HOP_HEADERS | {
+    "sec-websocket-key", "sec-websocket-version", "sec-websocket-extensions", "sec-websocket-protocol"
+}
+
+
+class Backend:
+    """Pool de conexões para o backend, sonda de prontidão e processo (opcional)"""
+
+    def __init__(self, url: str = BACKEND_URL):
+        self.url = url
+        self.ws_url = "ws" + url[len("http"):]
+        self.ready = asyncio.Event()
+        self.client: Optional[httpx.AsyncClient] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def start(self, spawn: bool = GATEWAY_SPAWN_BACKEND):
+        self.client = httpx.AsyncClient(
+            base_url=self.url,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(GATEWAY_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        )
+        if spawn:
+            port = str(urlsplit(self.url).port or 8002)
+            self._process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", port,
+                cwd=SRC_DIR
+            )
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def close(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+        if self._process is not None and self._process.returncode is None:
+            self._process.terminate()
+            await self._process.wait()
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def probe(self) -> bool:
+        try:
+            response = await self.client.get(GATEWAY_READY_PATH, timeout=2)
+            return response.status_code < 500
+        except httpx.HTTPError:
+            return False
+
+    async def _probe_loop(self):
+        # Rápido até o backend responder; depois só confirma de vez em quando
+        # (uma sonda lenta sob carga não chega para cortar o tráfego)
+        failures = 0
+        while True:
+            if await self.probe():
+                failures = 0
+                if not self.ready.is_set():
+                    print(f"✅ Backend pronto em {self.url}")
+                self.ready.set()
+                await asyncio.sleep(GATEWAY_PROBE_INTERVAL)
+                continue
+
+            failures += 1
+            if self.ready.is_set() and failures >= GATEWAY_PROBE_FAILURES:
+                print(f"⚠️  Backend deixou de responder em {self.url}")
+                self.ready.clear()
+            await asyncio.sleep(0.1 if not self.ready.is_set() else 1)
+
+    async def wait_ready(self) -> bool:
+        if self.ready.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=GATEWAY_READY_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+backend = Backend()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Frontend indexado e comprimido uma vez (STATIC_DIR)
+    await asyncio.to_thread(static_manifest.build)
+    await backend.start()
+    yield
+    await backend.close()
+
+# Inicializar gateway
+app = FastAPI(title="STAFF AI Meeting Room Gateway", lifespan=lifespan, docs_url=None, redoc_url=None, openapi_url=None)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+def backend_unavailable() -> JSONResponse:
+    return JSONResponse({"error": "Backend indisponível"}, status_code=503, headers={"Retry-After": "1"})
+
+
+def forwarded_headers(request, skip=HOP_HEADERS) -> list:
+    headers = [(key, value) for key, value in request.headers.items() if key not in skip and key != "x-forwarded-for"]
+    client = request.client.host if request.client else ""
+    forwarded_for = request.headers.get("x-forwarded-for")
+    headers += [
+        ("x-forwarded-for", f"{forwarded_for}, {client}" if forwarded_for else client),
+        ("x-forwarded-proto", request.url.scheme),
+        ("x-forwarded-host", request.headers.get("host", ""))
+    ]
+    return headers
+
+
+async def proxy_http(request: Request, path: str):
+    """Reencaminhar um pedido ao backend sem o guardar inteiro em memória"""
+    if not await backend.wait_ready():
+        return backend_unavailable()
+
+    # Só há corpo a reencaminhar se o cliente o anunciou (um GET não leva
+    # corpo e o httpx enviá-lo-ia com transfer-encoding: chunked)
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+    upstream_request = backend.client.build_request(
+        request.method,
+        httpx.URL(path=path, query=request.url.query.encode()),
+        headers=forwarded_headers(request),
+        content=request.stream() if has_body else None
+    )
     try:
-        if request.method == 'GET':
-            resp = requests.get(url, headers=headers, params=request.args)
-        elif request.method == 'POST':
-            resp = requests.post(url, headers=headers, json=request.json)
-        elif request.method == 'PUT':
-            resp = requests.put(url, headers=headers, json=request.json)
-        elif request.method == 'DELETE':
-            resp = requests.delete(url, headers=headers)
-        elif request.method == 'OPTIONS':
-            return Response(status=200)
-        
-        # Retornar resposta
-        return Response(
-            resp.content,
-            status=resp.status_code,
-            headers=dict(resp.headers)
+        upstream = await backend.client.send(upstream_request, stream=True)
+    except httpx.ConnectError:
+        backend.ready.clear()
+        return backend_unavailable()
+    except httpx.TimeoutException:
+        return JSONResponse({"error": "Backend não respondeu a tempo"}, status_code=504)
+
+    headers = [(key, value) for key, value in upstream.headers.multi_items() if key.lower() not in HOP_HEADERS]
+    response = StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        background=BackgroundTask(upstream.aclose)
+    )
+    # Substituir os headers por defeito (mantém content-encoding/content-length do backend)
+    response.raw_headers = [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers]
+    return response
+
+
+async def proxy_websocket(websocket: WebSocket, path: str):
+    """Ligar o WebSocket do cliente ao do backend e copiar mensagens nos dois sentidos"""
+    if not await backend.wait_ready():
+        await websocket.close(code=1013)
+        return
+
+    url = f"{backend.ws_url}{path}"
+    if websocket.url.query:
+        url += f"?{websocket.url.query}"
+    try:
+        upstream = await ws_connect(
+            url,
+            additional_headers=forwarded_headers(websocket, WS_SKIP_HEADERS),
+            subprotocols=websocket.scope.get("subprotocols") or None,
+            max_size=None,
+            compression=None
         )
     except Exception as e:
-        return {'error': str(e)}, 500
+        print(f"⚠️  WebSocket do backend indisponível ({path}): {e}")
+        await websocket.close(code=1011)
+        return
+
+    await websocket.accept(subprotocol=upstream.subprotocol)
+
+    async def client_to_backend():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") is not None:
+                await upstream.send(message["text"])
+            elif message.get("bytes") is not None:
+                await upstream.send(message["bytes"])
+
+    async def backend_to_client():
+        async for message in upstream:
+            if isinstance(message, str):
+                await websocket.send_text(message)
+            else:
+                await websocket.send_bytes(message)
+
+    tasks = [asyncio.create_task(client_to_backend()), asyncio.create_task(backend_to_client())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await upstream.close()
+        try:
+            await websocket.close(code=upstream.close_code or 1000)
+        except (RuntimeError, WebSocketDisconnect):
+            pass   # Cliente já fechou
+
+
+@app.get("/ready")
+async def ready():
+    """Sonda de prontidão (503 enquanto o backend não responde)"""
+    if not backend.ready.is_set():
+        return JSONResponse({"ready": False, "backend": backend.url}, status_code=503)
+    return {"ready": True, "backend": backend.url}
+
+@app.websocket("/ws/{path:path}")
+async def websocket_proxy(websocket: WebSocket, path: str):
+    await proxy_websocket(websocket, f"/ws/{path}")
+
+@app.websocket("/api/ws/{path:path}")
+async def api_websocket_proxy(websocket: WebSocket, path: str):
+    await proxy_websocket(websocket, f"/ws/{path}")
+
+@app.api_route("/api/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD"])
+async def proxy_api(request: Request, path: str):
+    """Proxy para API FastAPI"""
+    return await proxy_http(request, f"/{path}")
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD"])
+async def serve(request: Request, path: str):
+    """Rotas do backend (GATEWAY_BACKEND_PATHS), ficheiros estáticos ou o frontend"""
+    route = f"/{path}"
+    if route.startswith(GATEWAY_BACKEND_PATHS):
+        return await proxy_http(request, route)
+
+    if request.method not in ("GET", "HEAD"):
+        return JSONResponse({"error": "Não encontrado"}, status_code=404)
+
+    return static_manifest.response(request, path)
+
 
 if __name__ == '__main__':
+    import uvicorn
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
-
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Audio Cache - Cache de áudio TTS endereçado por conteúdo
+Camada em memória (LRU) + camada em disco partilhada entre workers
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict
+
+# Configuração (via env vars)
+AUDIO_CACHE_ENABLED = os.getenv("AUDIO_CACHE", "1") != "0"
+AUDIO_CACHE_MEMORY_MB = int(os.getenv("AUDIO_CACHE_MEMORY_MB", "64"))
+AUDIO_CACHE_DISK_MB = int(os.getenv("AUDIO_CACHE_DISK_MB", "512"))
+AUDIO_CACHE_DIR = os.getenv(
+    "AUDIO_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "staff_ai_audio_cache")
+)
+
+# Ao limpar o disco, descer até esta fração do limite (evita limpar a cada escrita)
+DISK_LOW_WATERMARK = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """Normalizar texto para a chave (Unicode NFC, espaços colapsados)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(voice_id: str, model_id: str, voice_settings: Dict, text: str) -> str:
+    """
+    Chave do cache para uma síntese
+
+    Args:
+        voice_id: ID da voz do ElevenLabs
+        model_id: Modelo de TTS
+        voice_settings: stability, similarity_boost, style, use_speaker_boost
+        text: Texto a sintetizar
+
+    Returns:
+        Hash SHA-256 em hexadecimal
+    """
+
+    payload = json.dumps(
+        [voice_id, model_id, voice_settings, normalize_text(text)],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Cache de áudio em duas camadas
+
+    - Memória: LRU limitado em bytes, privado de cada processo
+    - Disco: um ficheiro por chave, com limite de tamanho; vários workers
+      podem partilhar o mesmo diretório (escritas atómicas, LRU por mtime)
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = AUDIO_CACHE_MEMORY_MB * 1024 * 1024,
+        disk_dir: Optional[str] = AUDIO_CACHE_DIR,
+        disk_bytes: int = AUDIO_CACHE_DISK_MB * 1024 * 1024
+    ):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk_size: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "writes": 0
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Procurar áudio em memória e depois em disco"""
+
+        audio = self.get_memory(key)
+        if audio is not None:
+            return audio
+        return self.get_disk(key)
+
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """Procurar só em memória (sem I/O; pode correr no event loop)"""
+
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+            return audio
+
+    def get_disk(self, key: str) -> Optional[bytes]:
+        """Procurar em disco e promover para memória (usar via asyncio.to_thread)"""
+
+        audio = self._disk_get(key)
+
+        with self._lock:
+            if audio is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._memory_put(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        """Guardar áudio nas duas camadas"""
+
+        with self._lock:
+            self._memory_put(key, audio)
+            self._stats["writes"] += 1
+
+        self._disk_put(key, audio)
+
+    def stats(self) -> Dict:
+        """Estatísticas de hits/misses/evictions"""
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_size
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["disk_bytes"] = self._disk_size
+        return stats
+
+    def clear_memory(self):
+        """Esvaziar a camada em memória (o disco mantém-se)"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    # ------------------------------------------------------------------
+    # Camada em memória (chamar com o lock)
+    # ------------------------------------------------------------------
+
+    def _memory_put(self, key: str, audio: bytes):
+        if len(audio) > self.memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._stats["memory_evictions"] += 1
+
+    # ------------------------------------------------------------------
+    # Camada em disco
+    # ------------------------------------------------------------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.mp3")
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            # Atualizar mtime: a limpeza do disco remove os menos usados
+            os.utime(path, None)
+            return audio
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, audio: bytes):
+        if not self.disk_dir or len(audio) > self.disk_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Escrita atómica: outro worker nunca lê um ficheiro a meio
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Erro ao escrever cache de áudio: {e}")
+            return
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk_size()
+            else:
+                self._disk_size += len(audio)
+            over_limit = self._disk_size > self.disk_bytes
+
+        if over_limit:
+            self._evict_disk()
+
+    def _scan_disk(self):
+        """Listar (mtime, tamanho, caminho) de todos os ficheiros do cache"""
+        entries = []
+        try:
+            shards = list(os.scandir(self.disk_dir))
+        except OSError:
+            return entries
+
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".mp3"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _scan_disk_size(self) -> int:
+        return sum(size for _, size, _ in self._scan_disk())
+
+    def _evict_disk(self):
+        """Remover os ficheiros menos usados até ficar abaixo do limite"""
+
+        # Reler o diretório: outros workers também escrevem
+        entries = sorted(self._scan_disk())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_bytes * DISK_LOW_WATERMARK)
+        evicted = 0
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._disk_size = total
+            self._stats["disk_evictions"] += evicted
+
+
+# Cache partilhado pelo processo
+audio_cache = AudioCache() if AUDIO_CACHE_ENABLED else None
+
+
+# CLI: pré-aquecer e consultar o cache
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache de áudio TTS")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prewarm_parser = subparsers.add_parser("prewarm", help="Sintetizar frases comuns de cada agente")
+    prewarm_parser.add_argument("--agents", nargs="*", help="Agentes (por defeito, todos)")
+
+    subparsers.add_parser("stats", help="Mostrar ocupação do cache em disco")
+
+    args = parser.parse_args()
+
+    if args.command == "prewarm":
+        import asyncio
+        from voice_service import prewarm_audio_cache
+
+        if not os.getenv("ELEVENLABS_API_KEY"):
+            print("⚠️  ELEVENLABS_API_KEY não configurada")
+            exit(1)
+
+        start = time.time()
+        stats = asyncio.run(prewarm_audio_cache(agents=args.agents))
+        print(f"✅ Pré-aquecimento concluído em {time.time() - start:.1f}s")
+        print(json.dumps(stats, indent=2))
+
+    elif args.command == "stats":
+        cache = AudioCache()
+        entries = cache._scan_disk()
+        print(f"📦 Diretório: {cache.disk_dir}")
+        print(f"   Ficheiros: {len(entries)}")
+        print(f"   Tamanho: {sum(size for _, size, _ in entries) / 1024 / 1024:.1f} MB "
+              f"(limite {cache.disk_bytes / 1024 / 1024:.0f} MB)")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Audio Frames - Protocolo de áudio binário para o WebSocket
+O texto segue em JSON com um audio_id; o MP3 segue em frames binários
+
+Formato de cada frame binário:
+    16 bytes  audio_id (UUID)
+     4 bytes  número de sequência (big-endian)
+     1 byte   flags (bit 0 = último frame)
+     N bytes  dados MP3
+"""
+
+import os
+import uuid
+import base64
+import struct
+from typing import List, Dict, Tuple, Optional
+
+# Formatos de áudio negociáveis
+AUDIO_FORMAT_BASE64 = "base64"   # Antigo: MP3 em base64 dentro do JSON
+AUDIO_FORMAT_BINARY = "binary"   # Novo: MP3 em frames binários
+AUDIO_FORMATS = (AUDIO_FORMAT_BASE64, AUDIO_FORMAT_BINARY)
+
+# Tamanho máximo dos dados em cada frame binário
+AUDIO_FRAME_CHUNK_SIZE = int(os.getenv("AUDIO_FRAME_CHUNK_SIZE", str(64 * 1024)))
+
+AUDIO_MIME = "audio/mpeg"
+
+FRAME_HEADER = struct.Struct("!16sIB")
+FLAG_LAST = 0x01
+
+
+def negotiate_audio_format(requested: Optional[str]) -> str:
+    """Escolher o formato de áudio; clientes antigos ficam em base64"""
+    if requested in AUDIO_FORMATS:
+        return requested
+    return AUDIO_FORMAT_BASE64
+
+
+def new_audio_id() -> str:
+    return uuid.uuid4().hex
+
+
+def encode_audio_frames(
+    audio_id: str,
+    audio: bytes,
+    chunk_size: int = AUDIO_FRAME_CHUNK_SIZE
+) -> List[bytes]:
+    """
+    Dividir o áudio em frames binários
+
+    Args:
+        audio_id: ID do áudio (hex de um UUID)
+        audio: Bytes do MP3
+        chunk_size: Tamanho máximo dos dados por frame
+
+    Returns:
+        Lista de frames prontos para websocket.send_bytes
+    """
+
+    audio_id_bytes = uuid.UUID(hex=audio_id).bytes
+    view = memoryview(audio)
+    count = max(1, -(-len(audio) // chunk_size))
+    frames = []
+
+    for seq in range(count):
+        flags = FLAG_LAST if seq == count - 1 else 0
+        header = FRAME_HEADER.pack(audio_id_bytes, seq, flags)
+        frames.append(header + view[seq * chunk_size:(seq + 1) * chunk_size])
+
+    return frames
+
+
+def decode_audio_frame(frame: bytes) -> Tuple[str, int, bool, bytes]:
+    """
+    Ler um frame binário (útil para clientes Python e testes)
+
+    Returns:
+        (audio_id, sequência, é_o_último, dados)
+    """
+
+    audio_id_bytes, seq, flags = FRAME_HEADER.unpack_from(frame)
+    return uuid.UUID(bytes=audio_id_bytes).hex, seq, bool(flags & FLAG_LAST), frame[FRAME_HEADER.size:]
+
+
+def audio_fields(
+    audio: Optional[bytes],
+    audio_format: str,
+    chunk_size: int = AUDIO_FRAME_CHUNK_SIZE
+) -> Tuple[Dict, List[bytes]]:
+    """
+    Campos de áudio para a mensagem JSON e os frames binários a enviar depois
+
+    Args:
+        audio: Bytes do MP3 (ou None se não houver áudio)
+        audio_format: Formato negociado com o cliente
+        chunk_size: Tamanho máximo dos dados por frame
+
+    Returns:
+        (campos a juntar à mensagem JSON, frames binários)
+    """
+
+    if not audio:
+        return {"audio": None}, []
+
+    if audio_format != AUDIO_FORMAT_BINARY:
+        return {"audio": base64.b64encode(audio).decode("utf-8")}, []
+
+    audio_id = new_audio_id()
+    frames = encode_audio_frames(audio_id, audio, chunk_size)
+    return {
+        "audio": None,
+        "audio_id": audio_id,
+        "audio_format": AUDIO_FORMAT_BINARY,
+        "audio_mime": AUDIO_MIME,
+        "audio_bytes": len(audio),
+        "audio_frames": len(frames)
+    }, frames
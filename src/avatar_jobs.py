@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Avatar Jobs - Motor assíncrono de vídeos D-ID
+Submissão imediata, polling partilhado com backoff e webhooks opcionais
+"""
+
+import os
+import hmac
+import time
+import uuid
+import heapq
+import random
+import asyncio
+from collections import OrderedDict
+from typing import Optional, Dict, List, Callable, Awaitable
+
+from avatar_service import AvatarService, AGENT_AVATARS, TALK_CONFIG
+from video_cache import video_cache, video_key, VideoCache
+from voice_service import AGENT_VOICES, COMMON_PHRASES
+from http_transport import get_http_client
+
+# Configuração (via env vars)
+AVATAR_POLL_INITIAL = float(os.getenv("AVATAR_POLL_INITIAL", "1.5"))
+AVATAR_POLL_MAX = float(os.getenv("AVATAR_POLL_MAX", "15"))
+AVATAR_POLL_FACTOR = float(os.getenv("AVATAR_POLL_FACTOR", "1.6"))
+AVATAR_POLL_CONCURRENCY = int(os.getenv("AVATAR_POLL_CONCURRENCY", "8"))
+AVATAR_JOB_TIMEOUT = float(os.getenv("AVATAR_JOB_TIMEOUT", "180"))
+
+# URL pública do endpoint de webhook (ex.: https://app/avatar/webhook?token=...)
+# Com webhook, o polling passa a ser apenas uma rede de segurança. Exige
+# DID_WEBHOOK_TOKEN (o mesmo valor que vai no ?token= do URL): sem ele o
+# webhook fica desligado, porque qualquer um podia anunciar um vídeo pronto.
+DID_WEBHOOK_URL = os.getenv("DID_WEBHOOK_URL", "")
+DID_WEBHOOK_TOKEN = os.getenv("DID_WEBHOOK_TOKEN", "")
+AVATAR_WEBHOOK_POLL_INTERVAL = float(os.getenv("AVATAR_WEBHOOK_POLL_INTERVAL", "30"))
+
+# Quantos jobs terminados manter para consulta de estado
+AVATAR_FINISHED_JOBS = 1000
+
+# Caminho HTTP onde main.py serve os vídeos guardados localmente
+AVATAR_VIDEOS_PATH = "/avatar/videos"
+
+JOB_PENDING = "pending"        # Ainda a criar o talk no D-ID
+JOB_SUBMITTED = "submitted"    # Talk criado, à espera do render
+JOB_DONE = "done"
+JOB_ERROR = "error"
+JOB_TIMEOUT = "timeout"
+
+
+class AvatarJob:
+    """Um vídeo de avatar em processamento"""
+
+    def __init__(
+        self,
+        agent_id: str,
+        text: str = None,
+        audio_url: str = None,
+        voice_id: str = None,
+        session_id: str = None,
+        message_id: str = None
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.agent_id = agent_id
+        self.text = text
+        self.audio_url = audio_url
+        self.voice_id = voice_id
+        self.session_id = session_id
+        self.message_id = message_id
+
+        self.talk_id: Optional[str] = None
+        self.status = JOB_PENDING
+        self.result_url: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.polls = 0
+        self.cache_key: Optional[str] = None
+        self.cached = False
+        self.done = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_ERROR, JOB_TIMEOUT)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "agent_id": self.agent_id,
+            "session_id": self.session_id,
+            "message_id": self.message_id,
+            "talk_id": self.talk_id,
+            "status": self.status,
+            "result_url": self.result_url,
+            "error": self.error,
+            "polls": self.polls,
+            "cached": self.cached,
+            "elapsed": round((self.finished_at or time.time()) - self.created_at, 2)
+        }
+
+
+class AvatarJobEngine:
+    """
+    Motor de jobs D-ID
+
+    Uma única tarefa de polling serve todos os jobs pendentes: cada job tem o
+    seu próximo instante de verificação num heap, com backoff exponencial e
+    jitter. Quando há webhook configurado, o D-ID avisa-nos e o polling só
+    apanha webhooks perdidos.
+    """
+
+    def __init__(
+        self,
+        service: Optional[AvatarService] = None,
+        webhook_url: str = DID_WEBHOOK_URL,
+        on_complete: Optional[Callable[[AvatarJob], Awaitable[None]]] = None,
+        cache: Optional[VideoCache] = video_cache,
+        webhook_token: str = DID_WEBHOOK_TOKEN
+    ):
+        if webhook_url and not webhook_token:
+            print("⚠️  DID_WEBHOOK_URL sem DID_WEBHOOK_TOKEN: webhook desligado, a usar polling")
+            webhook_url = ""
+        self.service = service or AvatarService()
+        self.webhook_url = webhook_url or None
+        self.webhook_token = webhook_token
+        self.on_complete = on_complete
+        self.cache = cache
+
+        self.jobs: "OrderedDict[str, AvatarJob]" = OrderedDict()
+        self._by_talk: Dict[str, AvatarJob] = {}
+        self._schedule = []  # heap de (instante, sequência, job)
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._poll_semaphore = asyncio.Semaphore(AVATAR_POLL_CONCURRENCY)
+        self._task: Optional[asyncio.Task] = None
+        self._cache_writes: set = set()
+        # Criação, polling e notificações em curso (referência forte até terminarem)
+        self._tasks: set = set()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Arrancar a tarefa de polling (idempotente)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        agent_id: str,
+        text: str = None,
+        audio_url: str = None,
+        voice_id: str = None,
+        session_id: str = None,
+        message_id: str = None
+    ) -> AvatarJob:
+        """
+        Submeter um vídeo; devolve logo o job (o talk é criado em background)
+
+        Args:
+            agent_id: ID do agente (elara, aurora, helios, hephaestus, athena)
+            text: Texto para o avatar falar
+            audio_url: URL do áudio pré-gerado (alternativa a text + voice_id)
+            voice_id: ID da voz ElevenLabs
+            session_id: Sessão a notificar quando o vídeo ficar pronto
+            message_id: Mensagem do agente a que o vídeo pertence
+
+        Returns:
+            AvatarJob (consultar job.status ou aguardar com wait())
+        """
+
+        job = AvatarJob(agent_id, text, audio_url, voice_id, session_id, message_id)
+        self.jobs[job.job_id] = job
+        self.start()
+        self._spawn(self._create(job), job)
+        return job
+
+    async def wait(self, job: AvatarJob, timeout: float = AVATAR_JOB_TIMEOUT) -> Optional[str]:
+        """Aguardar um job terminar (sem ocupar um worker) e devolver o URL"""
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return job.result_url
+
+    async def flush(self):
+        """Aguardar as escritas pendentes no cache de vídeo"""
+        if self._cache_writes:
+            await asyncio.gather(*self._cache_writes, return_exceptions=True)
+
+    def get(self, job_id: str) -> Optional[AvatarJob]:
+        return self.jobs.get(job_id)
+
+    def webhook_authorized(self, token: Optional[str]) -> bool:
+        """O pedido traz o token do webhook? (falso se o webhook estiver desligado)"""
+        if not self.webhook_url or not token:
+            return False
+        return hmac.compare_digest(token, self.webhook_token)
+
+    def handle_webhook(self, payload: Dict) -> bool:
+        """
+        Processar o callback do D-ID (mesmo formato de GET /talks/{id})
+
+        Returns:
+            True se o talk pertencia a um job pendente
+        """
+
+        job = self._by_talk.get(payload.get("id"))
+        if not job:
+            return False
+        self._apply_status(job, payload)
+        return True
+
+    def stats(self) -> Dict:
+        pending = sum(1 for job in self.jobs.values() if not job.finished)
+        return {
+            "pending": pending,
+            "finished": len(self.jobs) - pending,
+            "webhook": bool(self.webhook_url),
+            "cache_hits": sum(1 for job in self.jobs.values() if job.cached)
+        }
+
+    # ------------------------------------------------------------------
+    # Interno
+    # ------------------------------------------------------------------
+
+    def _spawn(self, coro, job: Optional[AvatarJob] = None) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._task_done(done, job))
+        return task
+
+    def _task_done(self, task: asyncio.Task, job: Optional[AvatarJob]):
+        """Uma exceção que escapa termina o job com erro (senão ficava pendente para sempre)"""
+        self._tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        if job is None:
+            print(f"⚠️  Erro ao notificar vídeo pronto: {error!r}")
+            return
+        print(f"❌ Erro no vídeo {job.job_id}: {error!r}")
+        self._finish(job, JOB_ERROR, error=str(error) or repr(error))
+
+    async def _create(self, job: AvatarJob):
+        avatar_config = AGENT_AVATARS.get(job.agent_id)
+        if not avatar_config:
+            self._finish(job, JOB_ERROR, error=f"Agente {job.agent_id} não tem avatar configurado")
+            return
+
+        # Mesmo avatar a dizer o mesmo: reutilizar o vídeo já renderizado
+        if self.cache is not None:
+            job.cache_key = video_key(
+                avatar_config["image_url"],
+                TALK_CONFIG,
+                audio_url=job.audio_url,
+                text=job.text,
+                voice_id=job.voice_id
+            )
+            cached = await asyncio.to_thread(self.cache.get, job.cache_key)
+            if cached:
+                job.cached = True
+                if cached["local_path"]:
+                    result_url = f"{AVATAR_VIDEOS_PATH}/{job.cache_key}.mp4"
+                else:
+                    result_url = cached["result_url"]
+                self._finish(job, JOB_DONE, result_url=result_url)
+                return
+
+        result = await self.service.create_talk(
+            source_url=avatar_config["image_url"],
+            script_text=job.text if not job.audio_url else None,
+            audio_url=job.audio_url,
+            voice_id=job.voice_id,
+            provider="elevenlabs",
+            webhook=self.webhook_url
+        )
+
+        if not result or not result.get("id"):
+            self._finish(job, JOB_ERROR, error="Falha ao criar talk no D-ID")
+            return
+
+        job.talk_id = result["id"]
+        job.status = JOB_SUBMITTED
+        self._by_talk[job.talk_id] = job
+        self._schedule_poll(job)
+
+    def _next_delay(self, job: AvatarJob) -> float:
+        if self.webhook_url:
+            base = AVATAR_WEBHOOK_POLL_INTERVAL
+        else:
+            base = min(AVATAR_POLL_MAX, AVATAR_POLL_INITIAL * AVATAR_POLL_FACTOR ** job.polls)
+        # Jitter: espalha os pedidos de jobs criados ao mesmo tempo
+        return random.uniform(base / 2, base)
+
+    def _schedule_poll(self, job: AvatarJob):
+        self._seq += 1
+        heapq.heappush(self._schedule, (time.monotonic() + self._next_delay(job), self._seq, job))
+        self._wakeup.set()
+
+    async def _poll_loop(self):
+        while True:
+            if not self._schedule:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._schedule[0][0] - time.monotonic()
+            if delay > 0:
+                # Acordar mais cedo se entrar um job com prazo mais curto
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            due = []
+            while self._schedule and self._schedule[0][0] <= now:
+                _, _, job = heapq.heappop(self._schedule)
+                if not job.finished:
+                    due.append(job)
+
+            for job in due:
+                self._spawn(self._poll(job), job)
+
+    async def _poll(self, job: AvatarJob):
+        if time.time() - job.created_at > AVATAR_JOB_TIMEOUT:
+            print("⏱️  Timeout aguardando vídeo")
+            self._finish(job, JOB_TIMEOUT, error="Timeout aguardando vídeo")
+            return
+
+        async with self._poll_semaphore:
+            status = await self.service.get_talk_status(job.talk_id)
+        job.polls += 1
+
+        if job.finished:
+            # O webhook chegou enquanto o pedido estava em curso
+            return
+        if status:
+            self._apply_status(job, status)
+        if not job.finished:
+            self._schedule_poll(job)
+
+    def _apply_status(self, job: AvatarJob, status: Dict):
+        if status.get("status") == "done":
+            self._finish(job, JOB_DONE, result_url=status.get("result_url"))
+            if self.cache is not None and job.cache_key and job.result_url:
+                task = asyncio.create_task(self._store(job))
+                self._cache_writes.add(task)
+                task.add_done_callback(self._cache_writes.discard)
+        elif status.get("status") in ("error", "rejected"):
+            print(f"❌ Erro na geração: {status.get('error')}")
+            self._finish(job, JOB_ERROR, error=str(status.get("error")))
+
+    def _finish(self, job: AvatarJob, status: str, result_url: str = None, error: str = None):
+        if job.finished:
+            return
+
+        job.status = status
+        job.result_url = result_url
+        job.error = error
+        job.finished_at = time.time()
+        job.done.set()
+
+        if job.talk_id:
+            self._by_talk.pop(job.talk_id, None)
+        self._prune()
+
+        if self.on_complete:
+            self._spawn(self.on_complete(job))
+
+    async def _store(self, job: AvatarJob):
+        """Guardar o vídeo no cache (e descarregá-lo, se houver diretório local)"""
+        video = None
+        if self.cache.local_dir:
+            try:
+                response = await get_http_client().get(job.result_url)
+                if response.status_code == 200:
+                    video = response.content
+            except Exception as e:
+                print(f"⚠️  Erro ao descarregar vídeo: {e}")
+
+        try:
+            await asyncio.to_thread(self.cache.put, job.cache_key, job.agent_id, job.result_url, video)
+        except Exception as e:
+            print(f"⚠️  Erro ao guardar vídeo em cache: {e}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - AVATAR_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+
+# Motor partilhado pelo processo
+avatar_jobs = AvatarJobEngine()
+
+
+async def prerender_phrase_bank(
+    agents: Optional[List[str]] = None,
+    phrases: Optional[List[str]] = None,
+    engine: Optional[AvatarJobEngine] = None
+) -> Dict:
+    """
+    Renderizar antecipadamente as frases comuns de cada agente
+
+    Frases já em cache não voltam a ser renderizadas.
+
+    Args:
+        agents: IDs dos agentes (por defeito, todos em AGENT_AVATARS)
+        phrases: Frases (por defeito, COMMON_PHRASES do voice_service)
+        engine: Motor a usar (por defeito, o partilhado)
+
+    Returns:
+        Contagem de vídeos renderizados, vindos do cache e falhados
+    """
+
+    engine = engine or avatar_jobs
+    jobs = [
+        engine.submit(agent_id, text=text, voice_id=AGENT_VOICES[agent_id]["voice_id"])
+        for agent_id in agents or AGENT_AVATARS
+        for text in phrases or COMMON_PHRASES
+    ]
+    await asyncio.gather(*(engine.wait(job) for job in jobs))
+    await engine.flush()
+
+    return {
+        "rendered": sum(1 for job in jobs if job.status == JOB_DONE and not job.cached),
+        "cached": sum(1 for job in jobs if job.cached),
+        "failed": sum(1 for job in jobs if job.status != JOB_DONE)
+    }
+
+
+# CLI: pré-renderizar o banco de frases
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vídeos de avatar")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prerender_parser = subparsers.add_parser("prerender", help="Renderizar frases comuns de cada agente")
+    prerender_parser.add_argument("--agents", nargs="*", help="Agentes (por defeito, todos)")
+
+    subparsers.add_parser("stats", help="Mostrar estatísticas do cache de vídeo")
+
+    args = parser.parse_args()
+
+    if args.command == "prerender":
+        if not os.getenv("DID_API_KEY"):
+            print("⚠️  DID_API_KEY não configurada")
+            exit(1)
+
+        start = time.time()
+        result = asyncio.run(prerender_phrase_bank(agents=args.agents))
+        print(f"✅ Concluído em {time.time() - start:.1f}s")
+        print(f"   Renderizados: {result['rendered']}, do cache: {result['cached']}, falhados: {result['failed']}")
+
+    elif args.command == "stats":
+        if video_cache is None:
+            print("⚠️  Cache de vídeo desativado (VIDEO_CACHE=0)")
+        else:
+            print(video_cache.stats())
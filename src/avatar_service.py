@@ -5,27 +5,37 @@ Geração de vídeos com avatares animados para os agentes
 """
 
 import os
-import requests
-import time
+import asyncio
 from typing import Optional, Dict
 
+from http_transport import get_http_client
+
 # API Key do D-ID (configurar via env var)
 DID_API_KEY = os.getenv("DID_API_KEY", "")
+DID_BASE_URL = os.getenv("DID_BASE_URL", "https://api.d-id.com").rstrip("/")
+
+# Configuração de render usada em todos os talks
+TALK_CONFIG = {
+    "fluent": True,
+    "pad_audio": 0.0,
+    "stitch": True
+}
 
 class AvatarService:
     """Serviço de geração de avatares animados usando D-ID"""
     
     def __init__(self, api_key: str = None):
         self.api_key = api_key or DID_API_KEY
-        self.base_url = "https://api.d-id.com"
+        self.base_url = DID_BASE_URL
         
-    def create_talk(
+    async def create_talk(
         self,
         source_url: str,
         script_text: str = None,
         audio_url: str = None,
         voice_id: str = None,
-        provider: str = "elevenlabs"
+        provider: str = "elevenlabs",
+        webhook: str = None
     ) -> Optional[Dict]:
         """
         Criar vídeo de avatar falando
@@ -36,6 +46,7 @@ class AvatarService:
             audio_url: URL do áudio pré-gerado (alternativa a script_text)
             voice_id: ID da voz (ElevenLabs ou Microsoft)
             provider: Provedor de voz (elevenlabs, microsoft, amazon)
+            webhook: URL que o D-ID chama quando o vídeo ficar pronto
             
         Returns:
             Dict com id do vídeo e status
@@ -74,15 +85,13 @@ class AvatarService:
         data = {
             "source_url": source_url,
             "script": script,
-            "config": {
-                "fluent": True,
-                "pad_audio": 0.0,
-                "stitch": True
-            }
+            "config": TALK_CONFIG
         }
+        if webhook:
+            data["webhook"] = webhook
         
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = await get_http_client().post(url, json=data, headers=headers)
             
             if response.status_code in [200, 201]:
                 return response.json()
@@ -95,7 +104,7 @@ class AvatarService:
             print(f"❌ Erro ao chamar D-ID: {e}")
             return None
     
-    def get_talk_status(self, talk_id: str) -> Optional[Dict]:
+    async def get_talk_status(self, talk_id: str) -> Optional[Dict]:
         """Verificar status de um vídeo"""
         
         if not self.api_key:
@@ -105,44 +114,13 @@ class AvatarService:
         headers = {"Authorization": f"Basic {self.api_key}"}
         
         try:
-            response = requests.get(url, headers=headers)
+            response = await get_http_client().get(url, headers=headers)
             if response.status_code == 200:
                 return response.json()
             return None
         except Exception as e:
             print(f"Erro ao verificar status: {e}")
             return None
-    
-    def wait_for_video(self, talk_id: str, max_wait: int = 60) -> Optional[str]:
-        """
-        Aguardar vídeo ficar pronto e retornar URL
-        
-        Args:
-            talk_id: ID do vídeo
-            max_wait: Tempo máximo de espera em segundos
-            
-        Returns:
-            URL do vídeo ou None
-        """
-        
-        start_time = time.time()
-        
-        while time.time() - start_time < max_wait:
-            status = self.get_talk_status(talk_id)
-            
-            if not status:
-                return None
-            
-            if status.get("status") == "done":
-                return status.get("result_url")
-            elif status.get("status") == "error":
-                print(f"❌ Erro na geração: {status.get('error')}")
-                return None
-            
-            time.sleep(2)  # Aguardar 2 segundos antes de verificar novamente
-        
-        print("⏱️  Timeout aguardando vídeo")
-        return None
 
 # Configuração dos avatares dos agentes
 AGENT_AVATARS = {
@@ -173,7 +151,7 @@ AGENT_AVATARS = {
     }
 }
 
-def generate_agent_video(
+async def generate_agent_video(
     agent_id: str,
     text: str,
     audio_url: str = None,
@@ -199,29 +177,32 @@ def generate_agent_video(
         print(f"⚠️  Agente {agent_id} não tem avatar configurado")
         return None
     
-    service = AvatarService(api_key)
-    
-    # Criar vídeo
-    result = service.create_talk(
-        source_url=avatar_config["image_url"],
-        script_text=text if not audio_url else None,
-        audio_url=audio_url,
-        voice_id=voice_id,
-        provider="elevenlabs"
-    )
-    
-    if not result:
-        return None
-    
-    talk_id = result.get("id")
-    if not talk_id:
-        return None
-    
-    print(f"🎬 Vídeo criado: {talk_id}")
-    print(f"   Aguardando processamento...")
-    
-    # Aguardar vídeo ficar pronto
-    video_url = service.wait_for_video(talk_id, max_wait=120)
+    # Import tardio: avatar_jobs depende deste módulo
+    from avatar_jobs import avatar_jobs, AvatarJobEngine
+    
+    # Outra API key: motor próprio, parado no fim deste vídeo
+    engine = avatar_jobs
+    own_engine = bool(api_key) and api_key != avatar_jobs.service.api_key
+    if own_engine:
+        engine = AvatarJobEngine(AvatarService(api_key))
+    
+    try:
+        # Criar vídeo (o polling é feito pelo motor, sem bloquear)
+        job = engine.submit(
+            agent_id,
+            text=text if not audio_url else None,
+            audio_url=audio_url,
+            voice_id=voice_id
+        )
+        
+        print(f"🎬 Vídeo submetido: {job.job_id}")
+        print(f"   Aguardando processamento...")
+        
+        video_url = await engine.wait(job, timeout=120)
+    finally:
+        if own_engine:
+            await engine.flush()
+            await engine.stop()
     
     if video_url:
         print(f"✅ Vídeo pronto: {video_url}")
@@ -246,12 +227,12 @@ if __name__ == "__main__":
     print("\n🎬 Testando avatar de Elara...")
     text = "Olá! Sou Elara Veyra, CEO da Sentient Sphere Technologies."
     
-    video_url = generate_agent_video(
+    video_url = asyncio.run(generate_agent_video(
         "elara",
         text,
         voice_id="XrExE9yKIg1WjnnlVkGX",  # Voz da Elara no ElevenLabs
         api_key=api_key
-    )
+    ))
     
     if video_url:
         print(f"\n✅ Vídeo gerado com sucesso!")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Conversation History - Histórico compacto e limitado de uma reunião
+Registos com __slots__, IDs internados, timestamps numéricos e um anel em memória;
+as mensagens mais antigas passam para disco (JSONL por sessão)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Iterator, Optional
+
+# Configuração (via env vars)
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "50"))   # Mensagens mantidas em memória
+HISTORY_SPILL_BATCH = int(os.getenv("HISTORY_SPILL_BATCH", "16"))  # Mensagens escritas de cada vez
+HISTORY_SPILL = os.getenv("HISTORY_SPILL", "1") != "0"
+HISTORY_SPILL_DIR = os.getenv(
+    "HISTORY_SPILL_DIR",
+    os.path.join(tempfile.gettempdir(), "staff_ai_history")
+)
+
+# Mensagens usadas no prompt dos agentes
+PROMPT_HISTORY_TURNS = 6
+
+# Uma só thread para as escritas em disco: fora do event loop e pela ordem
+# em que os lotes saem do anel (também a remoção dos ficheiros)
+_spill_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-spill")
+
+
+def wait_for_spill():
+    """Esperar que os lotes já entregues à thread de escrita estejam em disco"""
+    _spill_writer.submit(lambda: None).result()
+
+
+class HistoryEntry:
+    """Uma mensagem da reunião"""
+
+    __slots__ = ("sender", "sender_name", "content", "timestamp")
+
+    def __init__(self, sender: str, sender_name: str, content: str, timestamp: float):
+        # IDs e nomes repetem-se em todas as mensagens: uma só cópia por processo
+        self.sender = sys.intern(sender)
+        self.sender_name = sys.intern(sender_name)
+        self.content = content
+        self.timestamp = timestamp
+
+    def to_dict(self) -> Dict:
+        """Formato antigo (from, from_name, content, timestamp ISO)"""
+        return {
+            "from": self.sender,
+            "from_name": self.sender_name,
+            "content": self.content,
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+
+    def to_record(self) -> list:
+        return [self.sender, self.sender_name, self.content, self.timestamp]
+
+    @classmethod
+    def from_record(cls, record: list) -> "HistoryEntry":
+        return cls(*record)
+
+
+class ConversationHistory:
+    """
+    Histórico de uma sessão
+
+    Mantém em memória as últimas max_turns mensagens. As anteriores são
+    escritas em lotes num ficheiro JSONL (se houver spill_path) e continuam
+    acessíveis por iter_range. A escrita corre numa thread; enquanto não
+    acaba, o lote continua em memória (_writing).
+    """
+
+    __slots__ = (
+        "max_turns", "spill_path", "_ring", "_pending", "_writing",
+        "_spilled", "_spill_ok", "_lock"
+    )
+
+    def __init__(
+        self,
+        max_turns: int = HISTORY_MAX_TURNS,
+        spill_path: Optional[str] = None
+    ):
+        self.max_turns = max_turns
+        self.spill_path = spill_path
+        self._ring: deque = deque()
+        self._pending: List[HistoryEntry] = []   # Saíram do anel, ainda por escrever
+        self._writing: List[HistoryEntry] = []   # Entregues à thread de escrita
+        self._spilled = 0                        # Já escritas em disco
+        self._spill_ok = True
+        self._lock = threading.Lock()            # _writing/_spilled (thread de escrita)
+
+    @classmethod
+    def for_session(cls, session_id: str, max_turns: int = HISTORY_MAX_TURNS) -> "ConversationHistory":
+        """
+        Histórico com ficheiro de spill próprio da sessão (se ativo)
+
+        O ficheiro é também próprio do processo: com vários workers, cada um
+        tem a sua cópia do histórico da sessão.
+        """
+        spill_path = None
+        if HISTORY_SPILL:
+            safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in session_id)
+            spill_path = os.path.join(HISTORY_SPILL_DIR, f"{safe_id}.{os.getpid()}.jsonl")
+        history = cls(max_turns=max_turns, spill_path=spill_path)
+        history.discard()  # Restos de uma sessão anterior com o mesmo ID
+        return history
+
+    def __len__(self) -> int:
+        with self._lock:
+            spilled = self._spilled + len(self._writing)
+        return spilled + len(self._pending) + len(self._ring)
+
+    def append(self, sender: str, sender_name: str, content: str, timestamp: Optional[float] = None) -> HistoryEntry:
+        entry = HistoryEntry(sender, sender_name, content, time.time() if timestamp is None else timestamp)
+        self._push(entry)
+        return entry
+
+    def merge(self, entries: List[HistoryEntry]) -> int:
+        """
+        Juntar as mensagens que faltam (ex.: vindas de outro worker), pela
+        ordem dos timestamps
+
+        Mensagens já presentes (mesmo timestamp e remetente) são ignoradas,
+        tal como as anteriores às que já saíram do anel.
+
+        Returns:
+            Número de mensagens juntadas
+        """
+
+        ring = self._ring
+        known = {(entry.timestamp, entry.sender) for entry in ring}
+        floor = ring[0].timestamp if ring and len(self) > len(ring) else float("-inf")
+        missing = [
+            entry for entry in entries
+            if (entry.timestamp, entry.sender) not in known and entry.timestamp > floor
+        ]
+        if not missing:
+            return 0
+
+        if not ring or min(entry.timestamp for entry in missing) >= ring[-1].timestamp:
+            merged = sorted(missing, key=lambda entry: entry.timestamp)
+        else:
+            merged = sorted((*ring, *missing), key=lambda entry: entry.timestamp)
+            ring.clear()
+        for entry in merged:
+            self._push(entry)
+        return len(missing)
+
+    def _push(self, entry: HistoryEntry):
+        self._ring.append(entry)
+
+        if len(self._ring) > self.max_turns:
+            oldest = self._ring.popleft()
+            if self.spill_path:
+                self._pending.append(oldest)
+                if len(self._pending) >= HISTORY_SPILL_BATCH:
+                    self.flush()
+            else:
+                # Sem armazenamento: a mensagem é descartada
+                self._spilled += 1
+
+    def last(self, n: int = PROMPT_HISTORY_TURNS) -> List[HistoryEntry]:
+        """Últimas n mensagens (só memória, O(n))"""
+        if n <= 0:
+            return []
+        ring = self._ring
+        start = max(0, len(ring) - n)
+        return [ring[i] for i in range(start, len(ring))]
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return self.iter_range()
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterator[HistoryEntry]:
+        """
+        Mensagens [start, end) de toda a reunião, incluindo as que estão em disco
+
+        Sem spill_path as mensagens descartadas não são devolvidas.
+        """
+
+        with self._lock:
+            spilled = self._spilled
+            writing = list(self._writing)
+        total = spilled + len(writing) + len(self._pending) + len(self._ring)
+        end = total if end is None else min(end, total)
+        position = 0
+
+        if self.spill_path and spilled and start < spilled:
+            # Só as linhas já confirmadas; as seguintes podem estar a meio
+            with open(self.spill_path, encoding="utf-8") as f:
+                for line in f:
+                    if position >= end:
+                        return
+                    if position >= spilled:
+                        break
+                    if position >= start:
+                        yield HistoryEntry.from_record(json.loads(line))
+                    position += 1
+        else:
+            position = spilled
+
+        for entry in (*writing, *self._pending, *self._ring):
+            if position >= end:
+                return
+            if position >= start:
+                yield entry
+            position += 1
+
+    def flush(self):
+        """Entregar à thread de escrita as mensagens que já saíram do anel"""
+        if not self._pending or not self.spill_path:
+            return
+        batch, self._pending = self._pending, []
+        with self._lock:
+            self._writing.extend(batch)
+        _spill_writer.submit(self._write_batch, batch)
+
+    def _write_batch(self, batch: List[HistoryEntry]):
+        """Corre na thread de escrita"""
+        if not self._spill_ok:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(
+                    json.dumps(entry.to_record(), ensure_ascii=False) + "\n"
+                    for entry in batch
+                )
+        except Exception as e:
+            # Os lotes seguintes também ficam em memória, para manter a ordem
+            print(f"⚠️  Histórico: falha a escrever {self.spill_path}: {e!r}")
+            self._spill_ok = False
+            return
+        with self._lock:
+            self._spilled += len(batch)
+            del self._writing[:len(batch)]
+
+    def discard(self):
+        """Apagar o ficheiro de spill (fim da sessão)"""
+        self._pending.clear()
+        if self.spill_path:
+            # Na thread de escrita, depois dos lotes que ainda estão na fila
+            _spill_writer.submit(self._remove_spill)
+
+    def _remove_spill(self):
+        with self._lock:
+            self._writing.clear()
+        try:
+            os.remove(self.spill_path)
+        except OSError:
+            pass
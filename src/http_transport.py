@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+HTTP Transport - Cliente HTTP assíncrono partilhado pelo processo
+Keep-alive, limites de pool e timeouts comuns para ElevenLabs e D-ID
+"""
+
+import os
+import asyncio
+from typing import List, Optional
+
+import httpx
+
+# Configuração (via env vars)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_HTTP2 = os.getenv("HTTP_HTTP2", "0") == "1"
+
+# Hosts a aquecer no arranque (abre TCP + TLS antes do primeiro pedido real)
+HTTP_WARMUP_URLS = [
+    url.strip()
+    for url in os.getenv(
+        "HTTP_WARMUP_URLS",
+        "https://api.elevenlabs.io,https://api.d-id.com"
+    ).split(",")
+    if url.strip()
+]
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_http_client(http2: bool = HTTP_HTTP2) -> httpx.AsyncClient:
+    """Criar um cliente com a configuração de pool do processo"""
+
+    if http2 and not _http2_available():
+        print("⚠️  HTTP_HTTP2=1 mas o pacote h2 não está instalado (pip install 'httpx[http2]')")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente partilhado (criado na primeira utilização)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def warm_up(urls: Optional[List[str]] = None, connections: int = 1):
+    """
+    Abrir conexões para os hosts usados pelos serviços
+
+    Com connections > 1 os pedidos a cada host são simultâneos, por isso
+    ficam abertas várias conexões (uma por pedido em paralelo previsto).
+    Erros são ignorados: o aquecimento nunca impede o arranque.
+    """
+
+    client = get_http_client()
+
+    async def touch(url: str):
+        try:
+            await client.head(url)
+        except Exception as e:   # Ex.: URL inválido em HTTP_WARMUP_URLS
+            print(f"⚠️  Aquecimento falhou para {url}: {e!r}")
+
+    await asyncio.gather(*(
+        touch(url)
+        for url in (urls if urls is not None else HTTP_WARMUP_URLS)
+        for _ in range(connections)
+    ))
+
+
+async def close_http_client():
+    """Fechar o cliente partilhado (no shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
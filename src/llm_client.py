@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+LLM Client - Cliente OpenAI assíncrono partilhado
+Pool de conexões único e limite de concorrência para todos os agentes
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import List, Dict, Optional, AsyncIterator
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+# Configuração (via env vars)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4.1-mini")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Pedir o uso de tokens no fim dos streams (desligar se o fornecedor não suportar)
+LLM_STREAM_USAGE = os.getenv("LLM_STREAM_USAGE", "1") != "0"
+
+
+class LLMStats:
+    """Tokens (incluindo os servidos da cache do fornecedor) e tempo até ao primeiro token"""
+
+    def __init__(self, window: int = 1024):
+        self.counters = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self._ttft = deque(maxlen=window)   # ms
+
+    def record_usage(self, usage):
+        self.counters["requests"] += 1
+        if usage is None:
+            return
+        self.counters["prompt_tokens"] += usage.prompt_tokens or 0
+        self.counters["completion_tokens"] += usage.completion_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.counters["cached_tokens"] += getattr(details, "cached_tokens", None) or 0
+
+    def record_ttft(self, seconds: float):
+        self._ttft.append(seconds * 1000)
+
+    def snapshot(self) -> Dict:
+        ttft = sorted(self._ttft)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ttft:
+                return None
+            return round(ttft[min(len(ttft) - 1, int(p * len(ttft)))], 1)
+
+        prompt_tokens = self.counters["prompt_tokens"]
+        return {
+            **self.counters,
+            "cached_ratio": round(self.counters["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else None,
+            "ttft_ms": {"p50": percentile(0.5), "p95": percentile(0.95)}
+        }
+
+
+class LLMClient:
+    """
+    Cliente assíncrono para completions do OpenAI
+
+    Um único AsyncOpenAI (e um único pool HTTP) é partilhado por todas as
+    sessões. O semáforo limita quantas completions correm em simultâneo,
+    para que picos de reuniões não esgotem o pool nem os rate limits.
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpenAI] = None,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive: int = LLM_MAX_KEEPALIVE,
+        timeout: float = LLM_TIMEOUT
+    ):
+        self._client = client
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.stats = LLMStats()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Criar o AsyncOpenAI na primeira utilização (evita exigir a API key no import)"""
+        if self._client is None:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5.0)
+            )
+            self._client = AsyncOpenAI(
+                http_client=http_client,
+                max_retries=LLM_MAX_RETRIES
+            )
+            self._http_client = http_client
+        return self._client
+
+    async def warm_up(self, connections: int = 1):
+        """
+        Abrir conexões para a API antes dos pedidos (ex.: início de uma reunião)
+
+        Pedidos simultâneos deixam várias conexões no pool. Erros são ignorados.
+        """
+
+        try:
+            client = self.client
+        except Exception as e:   # Ex.: sem OPENAI_API_KEY
+            print(f"⚠️  Aquecimento do LLM ignorado: {e}")
+            return
+        if self._http_client is None:
+            return
+        url = str(client.base_url)
+
+        async def touch():
+            try:
+                await self._http_client.head(url)
+            except Exception as e:   # Ex.: URL inválido, cliente fechado
+                print(f"⚠️  Aquecimento falhou para {url}: {e!r}")
+
+        await asyncio.gather(*(touch() for _ in range(connections)))
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = LLM_MODEL,
+        limiter: Optional[asyncio.Semaphore] = None,
+        **params
+    ) -> str:
+        """
+        Gerar uma completion sem bloquear o event loop
+
+        Args:
+            messages: Mensagens no formato da API de chat
+            model: Modelo a usar
+            limiter: Semáforo próprio em vez do das respostas (ex.: trabalho
+                em fundo, que não deve ocupar lugares dos pedidos do utilizador)
+            **params: Parâmetros adicionais (max_tokens, temperature, ...)
+
+        Returns:
+            Texto da resposta (sem espaços nas pontas)
+        """
+
+        async with limiter or self._semaphore:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                **params
+            )
+
+        self.stats.record_usage(getattr(response, "usage", None))
+        return (response.choices[0].message.content or "").strip()
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = LLM_MODEL,
+        **params
+    ) -> AsyncIterator[str]:
+        """
+        Gerar uma completion em streaming, token a token
+
+        O lugar no semáforo fica ocupado até o stream terminar (ou o
+        consumidor o abandonar). Com LLM_STREAM_USAGE, o último fragmento
+        traz o uso de tokens (incluindo cached_tokens).
+
+        Yields:
+            Fragmentos de texto à medida que chegam
+        """
+
+        if LLM_STREAM_USAGE:
+            params.setdefault("stream_options", {"include_usage": True})
+
+        async with self._semaphore:
+            started = time.perf_counter()
+            first = True
+            usage = None
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                **params
+            )
+            async for chunk in response:
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first:
+                        self.stats.record_ttft(time.perf_counter() - started)
+                        first = False
+                    yield delta
+            self.stats.record_usage(usage)
+
+    async def aclose(self):
+        """Fechar o pool de conexões"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._http_client = None
+
+
+# Cliente partilhado pelo processo
+llm = LLMClient()
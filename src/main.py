@@ -5,23 +5,67 @@ FastAPI + WebSocket para reuniões em tempo real
 """
 
 import os
-import sys
 import json
+import time
+import uuid
+import base64
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from typing import List, Dict, Set, Optional, AsyncIterator
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from openai import OpenAI
-from voice_service import generate_agent_audio
-
-# Adicionar path do projeto principal
-sys.path.append('/home/ubuntu/elara_production')
+from llm_client import llm
+from http_transport import warm_up, close_http_client
+from voice_service import synthesize_agent_audio, stream_agent_audio, get_voice_service, AGENT_VOICES
+from audio_cache import audio_cache
+from tts_pipeline import TTSPipeline
+from audio_frames import negotiate_audio_format
+from avatar_jobs import avatar_jobs, AvatarJob
+from video_cache import video_cache
+from agent_router import router
+from conversation_history import ConversationHistory, HistoryEntry, HISTORY_MAX_TURNS
+from session_store import session_store
+from rooms import Room, RoomConnection, outbound_stats
+from message_bus import message_bus, WORKER_ID
+from token_budget import history_block, get_encoding
+from meeting_summary import summarizer, PromptHistory
+from agent_prompts import compile_agent_prefixes, session_prompt, prompt_messages, prompt_cache_params
+from response_cache import response_cache, history_fingerprint
 from agent_communication import AgentCommunicationHub
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Abrir conexões para ElevenLabs/D-ID antes do primeiro turno
+    await warm_up()
+    # Tokenizer carregado já (a primeira utilização pode descarregar o vocabulário)
+    await asyncio.to_thread(get_encoding)
+    # Vídeos de avatar prontos são enviados para o WebSocket da sessão
+    avatar_jobs.on_complete = push_avatar_video
+    avatar_jobs.start()
+    session_store.start()
+    # Resumos novos seguem para os outros workers com a sessão em memória
+    summarizer.on_update = manager.share_summary
+    hub.start()
+    # Mensagens para sessões ligadas a este worker vindas de outros workers
+    message_bus.handler = manager.deliver_from_bus
+    await message_bus.start()
+    yield
+    for task in list(background_tasks):
+        task.cancel()
+    await avatar_jobs.stop()
+    await summarizer.close()
+    await session_store.close()
+    await hub.close()
+    await message_bus.close()
+    # Fechar pools de conexões
+    await llm.aclose()
+    await close_http_client()
+
 # Configuração
-app = FastAPI(title="STAFF AI Meeting Room API", version="1.0.0")
+app = FastAPI(title="STAFF AI Meeting Room API", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -32,35 +76,313 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cliente OpenAI
-client = OpenAI()
-
-# Hub de comunicação
+# Hub de comunicação (memória das conversas, gravada em fundo)
 hub = AgentCommunicationHub()
 
+# Tarefas em fundo (referência forte até terminarem)
+background_tasks = set()
+
+def _background_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    # Ninguém espera por estas tarefas: a exceção tem de ser lida e registada aqui
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️  Erro numa tarefa em fundo ({task.get_coro().__qualname__}): {task.exception()!r}")
+
+def run_in_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+# Mensagens para uma sessão sem WebSocket ligado ficam guardadas este tempo (s)
+HELD_MESSAGES_TTL = float(os.getenv("HELD_MESSAGES_TTL", "60"))
+
+def audio_envelope(message: dict, audio: Optional[bytes]) -> dict:
+    """Mensagem com áudio para o bus (os outros workers codificam-no para os seus participantes)"""
+    return {
+        "kind": "audio",
+        "message": message,
+        "audio": base64.b64encode(audio).decode("ascii") if audio else None
+    }
+
 # Gerenciador de conexões WebSocket
 class ConnectionManager:
+    """
+    Salas de reunião: cada sessão pode ter vários participantes ligados
+    (neste worker e, via message bus, noutros)
+    """
+    
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.rooms: Dict[str, Room] = {}
         self.meeting_sessions: Dict[str, dict] = {}
+        # Mensagens guardadas para os WebSockets que ainda vão ligar (ex.: áudio
+        # da abertura). Podem ligar a outro worker: enquanto guarda mensagens,
+        # este worker fica subscrito à sessão e envia-as a cada worker que
+        # anunciar "joined" (deliver_from_bus)
+        self.held: Dict[str, List[tuple]] = {}
+        # Workers que já receberam as mensagens guardadas de cada sessão
+        self.held_joined: Dict[str, Set[str]] = {}
 
-    async def connect(self, websocket: WebSocket, session_id: str):
-        await websocket.accept()
-        self.active_connections[session_id] = websocket
+    async def connect(self, websocket: WebSocket, session_id: str) -> RoomConnection:
+        connection = RoomConnection(
+            websocket,
+            audio_format=websocket.query_params.get("audio_format"),
+            avatar_video=websocket.query_params.get("avatar_video") == "1"
+        )
+        connection.on_failure = lambda failed: self._drop_failed(session_id, failed)
+        room = self.rooms.get(session_id)
+        new_room = room is None
+        if new_room:
+            room = self.rooms[session_id] = Room(session_id)
+        # Membro da sala antes de qualquer await: o que chegar entretanto
+        # (ex.: áudio da abertura) fica na fila desta ligação
+        room.add(connection)
 
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
+        try:
+            if new_room:
+                # As mensagens guardadas ainda não chegaram a ninguém neste worker
+                deadline = time.monotonic() - HELD_MESSAGES_TTL
+                for held_at, message, audio in self.held.get(session_id, ()):
+                    if held_at >= deadline:
+                        room.broadcast_audio(message, audio)
+                # Subscrito antes de aceitar: o cliente só pode escrever (e os
+                # outros participantes responder) depois, e nada se perde
+                await message_bus.subscribe(session_id)
+            await websocket.accept()
+        except BaseException:
+            await self.disconnect(session_id, connection)
+            raise
+        connection.start()
+
+        if new_room:
+            # Carregada já: as mensagens registadas noutros workers a partir
+            # daqui chegam pelo bus (deliver_from_bus)
+            await self.get_session(session_id)
+            # Pedir aos outros workers as mensagens guardadas (ex.: o que tratou
+            # o /meeting/start) e o histórico que o store ainda não tem
+            await message_bus.publish(session_id, {"kind": "joined"})
+        return connection
+
+    async def disconnect(self, session_id: str, connection: RoomConnection):
+        connection.stop()
+        room = self.rooms.get(session_id)
+        if room is None or connection.connection_id not in room.members:
+            return
+        room.remove(connection)
+        if room:
+            return
+        
+        # Último participante deste worker (com mensagens guardadas, continua
+        # a ouvir os "joined" até expirarem)
+        del self.rooms[session_id]
+        if session_id not in self.held:
+            await message_bus.unsubscribe(session_id)
+        # A sessão continua no session_store (reconexões, outros workers)
         if session_id in self.meeting_sessions:
-            del self.meeting_sessions[session_id]
+            self.meeting_sessions.pop(session_id)["conversation_history"].discard()
+
+    def wants_video(self, session_id: str) -> bool:
+        room = self.rooms.get(session_id)
+        return room is not None and room.wants_video
+
+    async def create_session(self, session_id: str, meta: dict) -> dict:
+        """
+        Criar a sessão no store
+        
+        Não fica na cache local: o WebSocket pode ligar a outro worker, que a
+        carrega do store (get_session).
+        """
+        await session_store.create(session_id, meta)
+        summarizer.cancel(session_id)
+        self.meeting_sessions.pop(session_id, None)
+        return {**meta, "conversation_history": ConversationHistory(spill_path=None)}
+
+    async def get_session(self, session_id: str) -> Optional[dict]:
+        """Sessão da cache local ou, se não estiver, carregada do session_store"""
+        session = self.meeting_sessions.get(session_id)
+        if session is not None:
+            return session
+
+        meta = await session_store.get(session_id)
+        if meta is None:
+            return None
+
+        history = ConversationHistory.for_session(session_id)
+        for entry in await session_store.history(session_id, last=HISTORY_MAX_TURNS):
+            history.append(entry.sender, entry.sender_name, entry.content, entry.timestamp)
+        session = {**meta, "conversation_history": history}
+        return self.meeting_sessions.setdefault(session_id, session)
+
+    async def record_message(self, session_id: str, session: dict, sender: str, sender_name: str, content: str):
+        """
+        Juntar uma mensagem ao histórico local, ao session_store e ao dos
+        outros workers com participantes da sessão
+
+        Os participantes de uma reunião podem estar em workers diferentes
+        (o uvicorn distribui as ligações): cada worker tem o histórico em
+        memória e todos têm de construir os prompts a partir do mesmo.
+        """
+        entry = session["conversation_history"].append(sender, sender_name, content)
+        session_store.append(session_id, entry)
+        if message_bus.may_have_peers(session_id):
+            await message_bus.publish(session_id, {"kind": "history", "entry": entry.to_record()})
+        # Resumo atualizado em fundo, fora do caminho da resposta
+        summarizer.maybe_refresh(session_id, session)
 
-    async def send_message(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(message)
+    async def share_summary(self, session_id: str, fields: dict):
+        """Enviar um resumo atualizado aos outros workers (ver MeetingSummarizer.on_update)"""
+        if message_bus.may_have_peers(session_id):
+            await message_bus.publish(session_id, {"kind": "summary", "fields": fields})
 
+    async def send_message(self, session_id: str, message: dict, exclude: Optional[RoomConnection] = None):
+        """Enviar a todos os participantes da sessão (neste worker e, via bus, nos outros)"""
+        await self._deliver_local(session_id, message, exclude=exclude)
+        if message_bus.may_have_peers(session_id):
+            await message_bus.publish(session_id, {"kind": "json", "message": message})
+
+    async def send_with_audio(self, session_id: str, message: dict, audio: Optional[bytes]):
+        """Enviar mensagem com áudio no formato negociado por cada participante"""
+        await self._deliver_local(session_id, message, audio=audio, with_audio=True)
+        if message_bus.may_have_peers(session_id):
+            # Os outros workers codificam o áudio para os seus participantes
+            await message_bus.publish(session_id, audio_envelope(message, audio))
+
+    async def send_or_hold(self, session_id: str, message: dict, audio: Optional[bytes]):
+        """
+        Entregar aos participantes já ligados e guardar para os que ligarem
+        depois (aqui ou noutro worker), durante HELD_MESSAGES_TTL
+
+        Os outros workers recebem estas mensagens só por envio dirigido: as
+        anteriores quando anunciam o WebSocket ("joined"), as seguintes uma a
+        uma. Sem publicação geral, nenhum worker recebe a mesma duas vezes.
+        """
+        await self._expire_held()
+        held = self.held.get(session_id)
+        first = held is None
+        if first:
+            held = self.held[session_id] = []
+        held.append((time.monotonic(), message, audio))
+        # Antes de qualquer await: quem anunciar depois recebe esta no replay
+        joined = list(self.held_joined.get(session_id, ()))
+
+        await self._deliver_local(session_id, message, audio=audio, with_audio=True)
+        if first:
+            # Ouvir o "joined" dos workers onde o WebSocket ligar e perguntar
+            # aos que já têm participantes ("holding"); a resposta traz o replay
+            await message_bus.subscribe(session_id)
+            await message_bus.publish(session_id, {"kind": "holding"})
+        for worker_id in joined:
+            await message_bus.publish(session_id, {**audio_envelope(message, audio), "to": worker_id})
+    
+    async def _replay_held(self, session_id: str, worker_id: str):
+        """Enviar as mensagens guardadas ao worker que aceitou o WebSocket da sessão"""
+        held = self.held.get(session_id)
+        if not held:
+            return
+        joined = self.held_joined.setdefault(session_id, set())
+        if worker_id in joined:
+            return
+        # Antes de enviar: o que for guardado entretanto segue em direto
+        joined.add(worker_id)
+        deadline = time.monotonic() - HELD_MESSAGES_TTL
+        for held_at, message, audio in list(held):
+            if held_at >= deadline:
+                await message_bus.publish(session_id, {**audio_envelope(message, audio), "to": worker_id})
+    
+    async def _send_backfill(self, session_id: str, worker_id: str):
+        """
+        Enviar o histórico recente a um worker que acabou de carregar a sessão
+
+        Uma mensagem registada aqui antes de sabermos desse worker não foi
+        publicada e pode ainda não estar no store quando ele a carregou.
+        """
+        session = self.meeting_sessions.get(session_id)
+        if session is None:
+            return
+        await message_bus.publish(session_id, {
+            "kind": "backfill",
+            "entries": [entry.to_record() for entry in session["conversation_history"].last(HISTORY_MAX_TURNS)],
+            "to": worker_id
+        })
+    
+    async def _expire_held(self):
+        """Descartar o que ficou por entregar (o cliente nunca ligou)"""
+        deadline = time.monotonic() - HELD_MESSAGES_TTL
+        for session_id in [sid for sid, held in self.held.items() if held[-1][0] < deadline]:
+            del self.held[session_id]
+            self.held_joined.pop(session_id, None)
+            if session_id not in self.rooms:
+                await message_bus.unsubscribe(session_id)
+    
     async def broadcast(self, session_id: str, message: dict):
         await self.send_message(session_id, message)
 
+    async def deliver_from_bus(self, session_id: str, envelope: dict):
+        """Entregar aos participantes locais uma mensagem publicada por outro worker"""
+        if envelope.get("to", WORKER_ID) != WORKER_ID:
+            return  # Resposta para outro worker
+        kind = envelope["kind"]
+        if kind == "joined":
+            await self._replay_held(session_id, envelope["origin"])
+            await self._send_backfill(session_id, envelope["origin"])
+            return
+        if kind == "holding":
+            # Outro worker guarda mensagens para um WebSocket que já está aqui
+            if session_id in self.rooms:
+                await message_bus.publish(session_id, {"kind": "joined", "to": envelope["origin"]})
+            return
+        if kind in ("history", "summary"):
+            # Estado da sessão: só interessa se já estiver carregada aqui
+            # (senão vem do session_store quando for carregada)
+            session = self.meeting_sessions.get(session_id)
+            if session is None:
+                return
+            if kind == "history":
+                # Pode já ter vindo do store ou de um backfill
+                session["conversation_history"].merge([HistoryEntry.from_record(envelope["entry"])])
+            else:
+                session.update(envelope["fields"])
+            return
+        if kind == "backfill":
+            session = self.meeting_sessions.get(session_id)
+            if session is not None:
+                session["conversation_history"].merge(
+                    [HistoryEntry.from_record(record) for record in envelope["entries"]]
+                )
+            return
+        if kind == "audio":
+            audio = base64.b64decode(envelope["audio"]) if envelope["audio"] else None
+            await self._deliver_local(session_id, envelope["message"], audio=audio, with_audio=True)
+        else:
+            await self._deliver_local(session_id, envelope["message"])
+
+    async def _deliver_local(
+        self,
+        session_id: str,
+        message: dict,
+        audio: Optional[bytes] = None,
+        with_audio: bool = False,
+        exclude: Optional[RoomConnection] = None
+    ):
+        # Só põe nas filas de saída; cada ligação envia na sua própria tarefa
+        room = self.rooms.get(session_id)
+        if room is None:
+            return
+        if with_audio:
+            room.broadcast_audio(message, audio, exclude=exclude)
+        else:
+            room.broadcast_json(message, exclude=exclude)
+
+    async def _drop_failed(self, session_id: str, connection: RoomConnection):
+        """Participante lento (fila cheia) ou com a ligação em baixo sai da sala"""
+        print(f"⚠️  Participante removido da sessão {session_id} (cliente lento ou envio falhou)")
+        await self.disconnect(session_id, connection)
+        await connection.close(code=1013)
+
+    def queue_stats(self) -> dict:
+        depths = [depth for room in self.rooms.values() for depth in room.depths()]
+        return outbound_stats.snapshot(depths)
+
 manager = ConnectionManager()
 
 # Modelos
@@ -74,6 +396,10 @@ class ChatMessage(BaseModel):
     from_user: str
     content: str
 
+class VoiceRequest(BaseModel):
+    text: str
+    agent_id: str = "elara"
+
 # Configuração dos agentes
 AGENTS_CONFIG = {
     "elara": {
@@ -108,70 +434,137 @@ AGENTS_CONFIG = {
     }
 }
 
+# Prefixo fixo de cada agente, compilado uma vez
+AGENT_PREFIXES = compile_agent_prefixes(AGENTS_CONFIG)
+
+# Cookie com o worker que criou a reunião (afinidade de sessão)
+AFFINITY_COOKIE = os.getenv("AFFINITY_COOKIE", "staff_ai_worker")
+
+# Aquecer conexões para os agentes prováveis ao iniciar uma reunião
+MEETING_PREWARM = os.getenv("MEETING_PREWARM", "1") != "0"
+
+# Máximo de agentes a responder em paralelo numa mesa redonda
+ROUND_TABLE_MAX_PARALLEL = int(os.getenv("ROUND_TABLE_MAX_PARALLEL", "5"))
+
+# Parâmetros de geração comuns a todos os agentes
+COMPLETION_PARAMS = {
+    "max_tokens": 250,
+    "temperature": 0.8,
+    "presence_penalty": 0.6,
+    "frequency_penalty": 0.3
+}
+
+def build_agent_messages(
+    agent_id: str,
+    context: str,
+    topic: str,
+    conversation_history: List[HistoryEntry],
+    user_name: str,
+    summary: str = ""
+) -> List[Dict[str, str]]:
+    """
+    Construir as mensagens do prompt de um agente
+    
+    O prefixo do agente é sempre o mesmo (cache do fornecedor); só a parte
+    da sessão e a instrução do turno mudam.
+    """
+    
+    # Construir histórico (resumo + mensagens recentes, dentro do orçamento de tokens)
+    history_text = history_block(summary, conversation_history)
+    
+    return prompt_messages(
+        AGENT_PREFIXES[agent_id],
+        session_prompt(topic, user_name, history_text),
+        context
+    )
+
 async def get_agent_response(
     agent_id: str,
     context: str,
     topic: str,
-    conversation_history: List[dict],
-    user_name: str
+    conversation_history: List[HistoryEntry],
+    user_name: str,
+    summary: str = "",
+    cacheable: bool = False
 ) -> str:
-    """Gerar resposta de um agente usando IA"""
+    """
+    Gerar resposta de um agente usando IA
+    
+    Com cacheable, pedidos iguais (ou parecidos) aos anteriores são servidos
+    pelo response_cache (se RESPONSE_CACHE=1).
+    """
     
-    agent = AGENTS_CONFIG.get(agent_id)
-    if not agent:
+    if agent_id not in AGENTS_CONFIG:
         return f"Erro: Agente {agent_id} não encontrado"
     
-    # Construir histórico
-    history_text = ""
-    if conversation_history:
-        history_text = "\n\nCONTEXTO DA CONVERSA:\n"
-        for msg in conversation_history[-6:]:
-            speaker = msg.get('from_name', msg.get('from', 'Desconhecido'))
-            content = msg.get('content', '')[:150]
-            history_text += f"- {speaker}: {content}...\n"
+    fingerprint = ""
+    if cacheable:
+        fingerprint = history_fingerprint(conversation_history, summary)
+        cached = response_cache.get(agent_id, topic, context, fingerprint, user_name)
+        if cached is not None:
+            return cached
     
-    # Prompt do sistema
-    system_prompt = f"""Você é {agent['name']}, {agent['role']} da Sentient Sphere Technologies.
-
-PERSONALIDADE E TOM: {agent['personality']}
-
-CONTEXTO DA REUNIÃO:
-- Tópico: {topic}
-- Participante: {user_name}
-- Você está numa reunião executiva profissional
-
-INSTRUÇÕES CRÍTICAS:
-- Responda em português de Portugal
-- Máximo 120 palavras (seja conciso e direto)
-- Mantenha tom profissional mas acessível
-- Contribua com insights específicos da sua área de expertise
-- Seja colaborativo e construtivo
-- Use dados e exemplos quando relevante
-- Evite repetir o que outros já disseram
-
-{history_text}
-
-{context}"""
+    messages = build_agent_messages(agent_id, context, topic, conversation_history, user_name, summary)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": context}
-            ],
-            max_tokens=250,
-            temperature=0.8,
-            presence_penalty=0.6,
-            frequency_penalty=0.3
-        )
-        
-        return response.choices[0].message.content.strip()
+        started = time.perf_counter()
+        response = await llm.complete(messages=messages, **COMPLETION_PARAMS, **prompt_cache_params(agent_id))
+        if cacheable:
+            response_cache.put(
+                agent_id, topic, context, response, fingerprint, user_name,
+                latency=time.perf_counter() - started
+            )
+        return response
         
     except Exception as e:
         print(f"Erro ao gerar resposta: {e}")
         return f"Desculpe, {user_name}, estou a ter dificuldades técnicas. Pode repetir?"
 
+async def stream_agent_response(
+    agent_id: str,
+    context: str,
+    topic: str,
+    conversation_history: List[HistoryEntry],
+    user_name: str,
+    summary: str = "",
+    cacheable: bool = False
+) -> AsyncIterator[str]:
+    """Gerar resposta de um agente em streaming (fragmentos de texto; cacheable como em get_agent_response)"""
+    
+    if agent_id not in AGENTS_CONFIG:
+        yield f"Erro: Agente {agent_id} não encontrado"
+        return
+    
+    fingerprint = ""
+    if cacheable:
+        fingerprint = history_fingerprint(conversation_history, summary)
+        cached = response_cache.get(agent_id, topic, context, fingerprint, user_name)
+        if cached is not None:
+            yield cached
+            return
+    
+    messages = build_agent_messages(agent_id, context, topic, conversation_history, user_name, summary)
+    
+    sent_any = False
+    try:
+        started = time.perf_counter()
+        parts = []
+        async for delta in llm.stream(messages=messages, **COMPLETION_PARAMS, **prompt_cache_params(agent_id)):
+            sent_any = True
+            parts.append(delta)
+            yield delta
+        if cacheable:
+            response_cache.put(
+                agent_id, topic, context, "".join(parts).strip(), fingerprint, user_name,
+                latency=time.perf_counter() - started
+            )
+            
+    except Exception as e:
+        print(f"Erro ao gerar resposta: {e}")
+        # Só substituir pela mensagem de erro se ainda nada foi enviado
+        if not sent_any:
+            yield f"Desculpe, {user_name}, estou a ter dificuldades técnicas. Pode repetir?"
+
 # Endpoints HTTP
 @app.get("/")
 async def root():
@@ -197,32 +590,196 @@ async def get_agents():
         ]
     }
 
+async def voice_stream_response(agent_id: str, text: str) -> StreamingResponse:
+    """
+    Áudio do agente em streaming (audio/mpeg, chunked)
+    
+    Espera pelo primeiro chunk antes de responder: se o ElevenLabs falhar,
+    o cliente recebe um erro em vez de um 200 sem áudio.
+    """
+    
+    if agent_id not in AGENT_VOICES:
+        raise HTTPException(status_code=404, detail="Agente não encontrado")
+    if not text.strip():
+        raise HTTPException(status_code=400, detail="Texto vazio")
+    
+    chunks = stream_agent_audio(agent_id, text)
+    first = await anext(chunks, None)
+    if first is None:
+        raise HTTPException(status_code=502, detail="Síntese de voz indisponível")
+    
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    
+    return StreamingResponse(body(), media_type="audio/mpeg", headers={"Cache-Control": "no-store"})
+
+@app.post("/voice/stream")
+async def stream_voice(request: VoiceRequest):
+    """Sintetizar texto com a voz de um agente (a reprodução pode começar no primeiro chunk)"""
+    return await voice_stream_response(request.agent_id, request.text)
+
+@app.get("/voice/{agent_id}/stream")
+async def stream_agent_voice(agent_id: str, text: str):
+    """Como POST /voice/stream, para usar diretamente em <audio src>"""
+    return await voice_stream_response(agent_id, text)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas de desempenho (caches, sessões)"""
+    return {
+        "audio_cache": audio_cache.stats() if audio_cache else None,
+        "avatar_jobs": avatar_jobs.stats(),
+        "video_cache": await asyncio.to_thread(video_cache.stats) if video_cache else None,
+        "session_store": session_store.stats(),
+        "message_bus": message_bus.stats(),
+        "rooms": {
+            "rooms": len(manager.rooms),
+            "participants": sum(len(room) for room in manager.rooms.values())
+        },
+        "outbound": manager.queue_stats(),
+        "summaries": summarizer.stats(),
+        "llm": llm.stats.snapshot(),
+        "response_cache": response_cache.stats(),
+        "hub": hub.stats()
+    }
+
+@app.delete("/cache/responses")
+async def invalidate_response_cache(agent_id: Optional[str] = None, token: Optional[str] = None):
+    """Apagar respostas guardadas (de um agente ou todas), ex.: depois de mudar um prompt (RESPONSE_CACHE_ADMIN_TOKEN)"""
+    if not response_cache.admin_token:
+        raise HTTPException(status_code=404, detail="Invalidação desativada")
+    if not response_cache.admin_authorized(token):
+        raise HTTPException(status_code=403, detail="Token inválido")
+    
+    return {"invalidated": response_cache.invalidate(agent_id)}
+
+@app.post("/avatar/webhook")
+async def avatar_webhook(request: Request):
+    """Callback do D-ID quando um vídeo fica pronto (DID_WEBHOOK_URL + DID_WEBHOOK_TOKEN)"""
+    if not avatar_jobs.webhook_url:
+        raise HTTPException(status_code=404, detail="Webhook desativado")
+    if not avatar_jobs.webhook_authorized(request.query_params.get("token")):
+        raise HTTPException(status_code=403, detail="Token inválido")
+    
+    payload = await request.json()
+    return {"accepted": avatar_jobs.handle_webhook(payload)}
+
+@app.get("/threads/{thread_id}")
+async def get_thread(thread_id: str, since: Optional[float] = None, limit: Optional[int] = None):
+    """Mensagens de uma thread do hub (since: timestamp epoch)"""
+    return {"thread_id": thread_id, "messages": await hub.get_thread(thread_id, since=since, limit=limit)}
+
+@app.get("/avatar/jobs/{job_id}")
+async def get_avatar_job(job_id: str):
+    """Estado de um vídeo de avatar"""
+    job = avatar_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job.to_dict()
+
+@app.get("/avatar/videos/{key}.mp4")
+async def get_avatar_video(key: str):
+    """Servir um vídeo de avatar guardado localmente pelo cache"""
+    if not video_cache or not video_cache.local_dir or not key.isalnum():
+        raise HTTPException(status_code=404, detail="Vídeo não encontrado")
+    path = video_cache.local_path(key)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Vídeo não encontrado")
+    return FileResponse(path, media_type="video/mp4")
+
+async def push_avatar_video(job: AvatarJob):
+    """Enviar o resultado de um vídeo para o WebSocket da sessão"""
+    if not job.session_id:
+        return
+    await manager.send_message(job.session_id, {
+        "type": "agent_video",
+        "job_id": job.job_id,
+        "message_id": job.message_id,
+        "from": job.agent_id,
+        "status": job.status,
+        "video_url": job.result_url
+    })
+
+async def prewarm_meeting(topic: str):
+    """Abrir conexões (LLM e TTS) para os agentes que provavelmente vão falar nesta reunião"""
+    likely = {"elara", *router.route(topic, multi=True).agents}
+    voice_url = get_voice_service(os.getenv("ELEVENLABS_API_KEY")).base_url
+    await asyncio.gather(
+        llm.warm_up(connections=len(likely)),
+        warm_up([voice_url], connections=len(likely))
+    )
+
+async def push_opening_audio(session_id: str, message_id: str, pipeline: TTSPipeline):
+    """Enviar o áudio da abertura (frase a frase) quando o WebSocket da sessão estiver ligado"""
+    async for seq, sentence, audio in pipeline.chunks():
+        if not audio:
+            continue
+        await manager.send_or_hold(session_id, {
+            "type": "agent_audio_chunk",
+            "message_id": message_id,
+            "from": "elara",
+            "seq": seq,
+            "text": sentence
+        }, audio)
+
 @app.post("/meeting/start")
-async def start_meeting(meeting: MeetingStart):
-    """Iniciar nova reunião"""
+async def start_meeting(meeting: MeetingStart, response: Response):
+    """
+    Iniciar nova reunião
+    
+    A abertura é gerada em streaming e cada frase segue logo para o TTS;
+    a sessão é criada e as conexões aquecidas ao mesmo tempo. A resposta sai
+    assim que o texto está pronto: o áudio chega depois pelo WebSocket
+    (agent_audio_chunk com opening_message_id); o hub grava a mensagem em fundo.
+    """
     
     session_id = meeting.session_id
     user_name = meeting.user_name
     topic = meeting.topic
-    
-    # Criar sessão
     thread_id = f"meeting_{session_id}"
-    manager.meeting_sessions[session_id] = {
+    message_id = uuid.uuid4().hex
+    
+    if MEETING_PREWARM:
+        run_in_background(prewarm_meeting(topic))
+    
+    pipeline = TTSPipeline("elara", os.getenv("ELEVENLABS_API_KEY"))
+    
+    async def opening_text() -> str:
+        # Mensagem de abertura da Elara
+        parts = []
+        async for delta in stream_agent_response(
+            agent_id="elara",
+            context=f"Abra a reunião de forma profissional e calorosa. Apresente-se brevemente e convide {user_name} a partilhar suas ideias sobre {topic}.",
+            topic=topic,
+            conversation_history=[],
+            user_name=user_name,
+            cacheable=True
+        ):
+            parts.append(delta)
+            pipeline.feed(delta)
+        pipeline.close()
+        return "".join(parts).strip()
+    
+    session_task = asyncio.create_task(manager.create_session(session_id, {
         "thread_id": thread_id,
         "user_name": user_name,
         "topic": topic,
-        "started_at": datetime.now().isoformat(),
-        "conversation_history": []
-    }
+        "started_at": datetime.now().isoformat()
+    }))
+    opening_task = asyncio.create_task(opening_text())
+    try:
+        session, opening = await asyncio.gather(session_task, opening_task)
+    except BaseException:
+        # O gather não cancela a outra quando uma falha: sem isto, a abertura
+        # (LLM e TTS) continuava a correr para uma reunião que não existe
+        session_task.cancel()
+        opening_task.cancel()
+        pipeline.cancel()
+        raise
     
-    # Mensagem de abertura da Elara
-    opening = await get_agent_response(
-        agent_id="elara",
-        context=f"Abra a reunião de forma profissional e calorosa. Apresente-se brevemente e convide {user_name} a partilhar suas ideias sobre {topic}.",
-        topic=topic,
-        conversation_history=[],
-        user_name=user_name
-    )
+    run_in_background(push_opening_audio(session_id, message_id, pipeline))
     
     # Guardar na memória
     hub.send_message(
@@ -233,53 +790,295 @@ async def start_meeting(meeting: MeetingStart):
         thread_id=thread_id
     )
     
-    manager.meeting_sessions[session_id]["conversation_history"].append({
-        "from": "elara",
-        "from_name": "Elara Veyra",
-        "content": opening,
-        "timestamp": datetime.now().isoformat()
-    })
+    await manager.record_message(session_id, session, "elara", "Elara Veyra", opening)
+    # O WebSocket pode ligar a outro worker logo a seguir
+    await session_store.flush()
+    
+    # Dica de afinidade para um balanceador à frente de várias instâncias
+    # (entre os workers do start.sh não há afinidade: o histórico vai pelo bus)
+    response.set_cookie(AFFINITY_COOKIE, WORKER_ID, httponly=True, samesite="lax")
+    response.headers["X-Worker-Id"] = WORKER_ID
     
     return {
         "session_id": session_id,
         "thread_id": thread_id,
         "opening_message": opening,
-        "agents": list(AGENTS_CONFIG.keys())
+        "opening_message_id": message_id,
+        "agents": list(AGENTS_CONFIG.keys()),
+        "worker_id": WORKER_ID
     }
 
+async def deliver_agent_reply(
+    session_id: str,
+    session: dict,
+    responding_agent: str,
+    agent_context: str,
+    user_name: str,
+    stream: bool = False,
+    history_snapshot: Optional[PromptHistory] = None,
+    extra: Optional[dict] = None
+) -> str:
+    """
+    Gerar, registar e entregar a resposta de um agente
+    
+    Em streaming, a mensagem final (agent_message) sai e a resposta entra no
+    histórico assim que o texto termina; o áudio das últimas frases pode
+    chegar depois, e agent_audio_done indica quantos chunks foram enviados.
+    
+    Args:
+        session_id: Sessão do WebSocket
+        session: Dados da reunião (topic, thread_id, conversation_history)
+        responding_agent: ID do agente que responde
+        agent_context: Instrução do turno para o agente
+        user_name: Nome do participante
+        stream: Enviar fragmentos (agent_message_delta) e áudio frase a frase
+        history_snapshot: Resumo e histórico a usar no prompt (por defeito, os da sessão)
+        extra: Campos adicionais para a mensagem final (ex.: mesa redonda)
+        
+    Returns:
+        Texto final da resposta
+    """
+    
+    agent_config = AGENTS_CONFIG[responding_agent]
+    topic = session["topic"]
+    summary, prompt_history = summarizer.prompt_history(session) if history_snapshot is None else history_snapshot
+    message_id = uuid.uuid4().hex
+    
+    audio_task = None
+    if stream:
+        # Modo streaming: enviar fragmentos à medida que chegam e
+        # sintetizar o áudio frase a frase em paralelo
+        pipeline = TTSPipeline(responding_agent, os.getenv("ELEVENLABS_API_KEY"))
+        
+        async def send_audio_chunks():
+            sent = 0
+            async for seq, sentence, audio in pipeline.chunks():
+                if not audio:
+                    continue
+                await manager.send_with_audio(session_id, {
+                    "type": "agent_audio_chunk",
+                    "message_id": message_id,
+                    "from": responding_agent,
+                    "seq": seq,
+                    "text": sentence
+                }, audio)
+                sent += 1
+            return sent
+        
+        audio_task = asyncio.create_task(send_audio_chunks())
+        parts = []
+        try:
+            async for delta in stream_agent_response(
+                agent_id=responding_agent,
+                context=agent_context,
+                topic=topic,
+                conversation_history=prompt_history,
+                user_name=user_name,
+                summary=summary
+            ):
+                parts.append(delta)
+                pipeline.feed(delta)
+                await manager.send_message(session_id, {
+                    "type": "agent_message_delta",
+                    "message_id": message_id,
+                    "from": responding_agent,
+                    "delta": delta
+                })
+            pipeline.close()
+        except BaseException:
+            pipeline.cancel()
+            audio_task.cancel()
+            raise
+        response = "".join(parts).strip()
+    else:
+        response = await get_agent_response(
+            agent_id=responding_agent,
+            context=agent_context,
+            topic=topic,
+            conversation_history=prompt_history,
+            user_name=user_name,
+            summary=summary
+        )
+    
+    try:
+        # Adicionar resposta ao histórico
+        await manager.record_message(session_id, session, responding_agent, agent_config["name"], response)
+    
+        # Guardar na memória
+        hub.send_message(
+            from_agent=agent_config["name"],
+            to_agent=user_name,
+            content=response,
+            message_type="agent_response",
+            thread_id=session["thread_id"]
+        )
+    
+        # Gerar áudio da resposta (no modo streaming já foi enviado em chunks)
+        audio = None
+        if not stream:
+            audio = await synthesize_agent_audio(
+                responding_agent,
+                response,
+                os.getenv("ELEVENLABS_API_KEY")
+            )
+    
+        # Vídeo do avatar: submetido já, entregue quando o render terminar
+        video_job_id = None
+        if manager.wants_video(session_id):
+            video_job_id = avatar_jobs.submit(
+                responding_agent,
+                text=response,
+                voice_id=agent_config["voice_id"],
+                session_id=session_id,
+                message_id=message_id
+            ).job_id
+    
+        # Enviar resposta ao cliente
+        await manager.send_with_audio(session_id, {
+            "type": "agent_message",
+            "message_id": message_id,
+            "from": responding_agent,
+            "from_name": agent_config["name"],
+            "role": agent_config["role"],
+            "content": response,
+            "timestamp": datetime.now().isoformat(),
+            "voice_id": agent_config["voice_id"],
+            # Em streaming o áudio vai em chunks (total em agent_audio_done)
+            "audio_chunks": None if stream else 0,
+            "video_job_id": video_job_id,
+            **(extra or {})
+        }, audio)
+    except BaseException:
+        # O áudio em curso não sobrevive a uma resposta que não foi entregue
+        if audio_task is not None:
+            pipeline.cancel()
+            audio_task.cancel()
+        raise
+    
+    if audio_task is not None:
+        try:
+            audio_chunks = await audio_task
+        except BaseException:
+            pipeline.cancel()
+            audio_task.cancel()
+            raise
+        await manager.send_message(session_id, {
+            "type": "agent_audio_done",
+            "message_id": message_id,
+            "from": responding_agent,
+            "audio_chunks": audio_chunks
+        })
+    
+    return response
+
+async def run_round_table(
+    session_id: str,
+    session: dict,
+    agents: List[str],
+    agent_context: str,
+    user_name: str,
+    stream: bool = False
+):
+    """
+    Mesa redonda: vários agentes respondem à mesma mensagem em paralelo
+    
+    Todos partem do mesmo histórico (o de antes da ronda). Cada resposta é
+    entregue assim que fica pronta, marcada com round_id e order para que o
+    cliente a mostre pela ordem pedida.
+    """
+    
+    round_id = uuid.uuid4().hex
+    history_snapshot = summarizer.prompt_history(session)
+    semaphore = asyncio.Semaphore(ROUND_TABLE_MAX_PARALLEL)
+    
+    await manager.send_message(session_id, {
+        "type": "round_table_start",
+        "round_id": round_id,
+        "agents": agents
+    })
+    
+    async def reply(order: int, agent_id: str):
+        async with semaphore:
+            await deliver_agent_reply(
+                session_id, session, agent_id, agent_context, user_name,
+                stream=stream,
+                history_snapshot=history_snapshot,
+                extra={"round_id": round_id, "order": order, "round_size": len(agents)}
+            )
+    
+    # Um agente que falha não impede os outros nem o round_table_end
+    results = await asyncio.gather(
+        *(reply(order, agent_id) for order, agent_id in enumerate(agents)),
+        return_exceptions=True
+    )
+    for order, (agent_id, result) in enumerate(zip(agents, results)):
+        if isinstance(result, BaseException):
+            print(f"Erro na mesa redonda ({agent_id}): {result!r}")
+            await manager.send_message(session_id, {
+                "type": "error",
+                "round_id": round_id,
+                "order": order,
+                "from": agent_id,
+                "content": f"{AGENTS_CONFIG[agent_id]['name']} não conseguiu responder"
+            })
+    
+    await manager.send_message(session_id, {
+        "type": "round_table_end",
+        "round_id": round_id
+    })
+
 # WebSocket para chat em tempo real
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    await manager.connect(websocket, session_id)
+    connection = await manager.connect(websocket, session_id)
     
     try:
         while True:
             # Receber mensagem do cliente
-            data = await websocket.receive_json()
+            try:
+                data = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict):
+                connection.send_json({"type": "error", "content": "Mensagem inválida (JSON esperado)"})
+                continue
             
             message_type = data.get("type")
             content = data.get("content", "")
             user_name = data.get("user_name", "Participante")
             
+            # Negociação do protocolo (formato do áudio)
+            if message_type == "hello":
+                connection.audio_format = negotiate_audio_format(data.get("audio_format"))
+                if data.get("avatar_video"):
+                    connection.avatar_video = True
+                connection.send_json({
+                    "type": "hello_ack",
+                    "audio_format": connection.audio_format,
+                    "avatar_video": connection.avatar_video,
+                    "connection_id": connection.connection_id
+                })
+                continue
+            
             # Obter sessão
-            session = manager.meeting_sessions.get(session_id)
+            session = await manager.get_session(session_id)
             if not session:
-                await websocket.send_json({
+                connection.send_json({
                     "type": "error",
                     "content": "Sessão não encontrada"
                 })
                 continue
             
-            topic = session["topic"]
-            conversation_history = session["conversation_history"]
-            
             # Adicionar mensagem do utilizador ao histórico
-            conversation_history.append({
+            await manager.record_message(session_id, session, "user", user_name, content)
+            
+            # Os outros participantes da sala também veem a mensagem
+            await manager.send_message(session_id, {
+                "type": "user_message",
                 "from": "user",
                 "from_name": user_name,
-                "content": content,
-                "timestamp": datetime.now().isoformat()
-            })
+                "content": content
+            }, exclude=connection)
             
             # Guardar na memória
             hub.send_message(
@@ -291,70 +1090,38 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             )
             
             # Determinar qual agente deve responder
-            # Por padrão, Elara responde e pode convocar outros
-            responding_agent = "elara"
-            
-            # Lógica simples: se mencionar área específica, agente relevante responde
-            content_lower = content.lower()
-            if any(word in content_lower for word in ["marketing", "mercado", "campanha", "clientes"]):
-                responding_agent = "aurora"
-            elif any(word in content_lower for word in ["design", "visual", "interface", "ux", "ui"]):
-                responding_agent = "helios"
-            elif any(word in content_lower for word in ["técnico", "tecnologia", "sistema", "código", "arquitetura"]):
-                responding_agent = "hephaestus"
-            elif any(word in content_lower for word in ["dados", "análise", "métricas", "números", "estatística"]):
-                responding_agent = "athena"
+            # (Elara responde quando nenhuma área se destaca)
+            route = router.route(content, multi=True)
+            responding_agent = route.agent_id
             
-            # Gerar resposta
-            agent_config = AGENTS_CONFIG[responding_agent]
+            agent_context = f"{user_name} disse: \"{content}\"\n\nResponda de forma relevante e acrescente valor à discussão."
             
-            response = await get_agent_response(
-                agent_id=responding_agent,
-                context=f"{user_name} disse: \"{content}\"\n\nResponda de forma relevante e acrescente valor à discussão.",
-                topic=topic,
-                conversation_history=conversation_history,
-                user_name=user_name
-            )
-            
-            # Adicionar resposta ao histórico
-            conversation_history.append({
-                "from": responding_agent,
-                "from_name": agent_config["name"],
-                "content": response,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # Guardar na memória
-            hub.send_message(
-                from_agent=agent_config["name"],
-                to_agent=user_name,
-                content=response,
-                message_type="agent_response",
-                thread_id=session["thread_id"]
-            )
+            # Mesa redonda: a mensagem vai para vários agentes em simultâneo
+            if message_type == "round_table" or data.get("round_table"):
+                requested = data.get("agents")
+                if requested == "auto":
+                    requested = route.agents
+                elif requested is not None and not isinstance(requested, list):
+                    connection.send_json({"type": "error", "content": "agents deve ser uma lista ou \"auto\""})
+                    continue
+                agents = [a for a in requested or AGENTS_CONFIG if isinstance(a, str) and a in AGENTS_CONFIG]
+                await run_round_table(session_id, session, agents, agent_context, user_name, data.get("stream", False))
+                continue
             
-            # Gerar áudio da resposta
-            audio_base64 = generate_agent_audio(
-                responding_agent,
-                response,
-                os.getenv("ELEVENLABS_API_KEY")
+            # Gerar resposta
+            await deliver_agent_reply(
+                session_id, session, responding_agent, agent_context, user_name,
+                stream=data.get("stream", False)
             )
             
-            # Enviar resposta ao cliente
-            await manager.send_message(session_id, {
-                "type": "agent_message",
-                "from": responding_agent,
-                "from_name": agent_config["name"],
-                "role": agent_config["role"],
-                "content": response,
-                "timestamp": datetime.now().isoformat(),
-                "voice_id": agent_config["voice_id"],
-                "audio": audio_base64
-            })
-            
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
         print(f"Cliente {session_id} desconectado")
+    except Exception as e:
+        print(f"Erro no WebSocket {session_id}: {e!r}")
+        await connection.close(code=1011)
+    finally:
+        # Sempre: sair da sala, parar a escrita e a subscrição do bus
+        await manager.disconnect(session_id, connection)
 
 if __name__ == "__main__":
     import uvicorn
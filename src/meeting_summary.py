@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Meeting Summary - Resumo incremental de cada reunião
+De SUMMARY_EVERY_TURNS em SUMMARY_EVERY_TURNS mensagens, uma tarefa de fundo
+junta as mensagens mais antigas ao resumo da sessão. O prompt dos agentes passa
+a ser resumo + mensagens recentes, com tamanho limitado em reuniões longas.
+
+A atualização nunca fica no caminho da resposta: se ainda não terminou, o
+prompt usa o resumo anterior e mais mensagens recentes.
+"""
+
+import os
+import asyncio
+from typing import Dict, List, Tuple, Callable, Awaitable, Optional
+
+from llm_client import llm, LLM_MODEL
+from conversation_history import HistoryEntry, HISTORY_MAX_TURNS
+from session_store import session_store
+from token_budget import truncate_tokens
+
+# Configuração (via env vars)
+SUMMARY_EVERY_TURNS = int(os.getenv("SUMMARY_EVERY_TURNS", "8"))    # Mensagens novas por atualização
+SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", "4"))    # Ficam sempre fora do resumo
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+SUMMARY_TURN_TOKENS = int(os.getenv("SUMMARY_TURN_TOKENS", "250"))  # Por mensagem resumida
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", LLM_MODEL)
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "2"))  # Fora do limite das respostas
+
+SUMMARY_INSTRUCTIONS = """Você mantém o resumo de uma reunião executiva da Sentient Sphere Technologies.
+Recebe o resumo atual e as mensagens seguintes. Devolva o resumo atualizado:
+- Em português de Portugal, no máximo 200 palavras
+- Decisões, propostas, números, dúvidas em aberto e quem disse o quê
+- Sem introduções nem comentários, só o resumo"""
+
+# PromptHistory: (resumo, mensagens ainda fora do resumo)
+PromptHistory = Tuple[str, List[HistoryEntry]]
+
+
+class MeetingSummarizer:
+    """
+    Resumos das sessões
+
+    O resumo fica na própria sessão (summary, summary_until = timestamp da
+    última mensagem incluída) e no session_store, para que outro worker ou
+    uma reconexão o reutilizem. on_update recebe (session_id, campos) depois
+    de cada atualização (ex.: para os outros workers com a sessão em memória).
+    """
+
+    def __init__(
+        self,
+        every: int = SUMMARY_EVERY_TURNS,
+        keep_recent: int = SUMMARY_KEEP_RECENT,
+        max_tokens: int = SUMMARY_MAX_TOKENS,
+        model: str = SUMMARY_MODEL,
+        max_concurrency: int = SUMMARY_MAX_CONCURRENCY
+    ):
+        self.every = every
+        self.keep_recent = keep_recent
+        self.max_tokens = max_tokens
+        self.model = model
+        # Semáforo próprio: os resumos em fundo não tiram lugares às respostas
+        self._limiter = asyncio.Semaphore(max_concurrency)
+        self.on_update: Optional[Callable[[str, Dict], Awaitable[None]]] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stats = {"refreshes": 0, "failures": 0, "turns_summarized": 0}
+
+    def prompt_history(self, session: dict) -> PromptHistory:
+        """Resumo atual e mensagens posteriores (as que o prompt mostra por extenso)"""
+        until = session.get("summary_until", 0.0)
+        entries = [
+            entry for entry in session["conversation_history"].last(HISTORY_MAX_TURNS)
+            if entry.timestamp > until
+        ]
+        return session.get("summary", ""), entries
+
+    def maybe_refresh(self, session_id: str, session: dict):
+        """Agendar uma atualização do resumo, se houver mensagens suficientes (não bloqueia)"""
+        if self.every <= 0 or session_id in self._tasks:
+            return
+
+        _, entries = self.prompt_history(session)
+        if len(entries) < self.every + self.keep_recent:
+            return
+
+        # As mais recentes ficam por extenso no prompt
+        fold = entries[:len(entries) - self.keep_recent]
+        task = asyncio.get_running_loop().create_task(self._refresh(session_id, session, fold))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    def cancel(self, session_id: str):
+        task = self._tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {"in_flight": len(self._tasks), **self._stats}
+
+    async def _refresh(self, session_id: str, session: dict, entries: List[HistoryEntry]):
+        previous = session.get("summary", "")
+        transcript = "".join(
+            f"- {entry.sender_name}: {truncate_tokens(entry.content, SUMMARY_TURN_TOKENS)}\n"
+            for entry in entries
+        )
+        messages = [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {"role": "user", "content": f"RESUMO ATUAL:\n{previous or '(ainda vazio)'}\n\nMENSAGENS SEGUINTES:\n{transcript}"}
+        ]
+
+        try:
+            summary = await llm.complete(
+                messages=messages,
+                model=self.model,
+                limiter=self._limiter,
+                max_tokens=self.max_tokens,
+                temperature=0.2
+            )
+        except Exception as e:
+            self._stats["failures"] += 1
+            print(f"⚠️  Erro ao atualizar o resumo de {session_id}: {e}")
+            return
+        if not summary:
+            return
+
+        fields = {"summary": summary, "summary_until": entries[-1].timestamp}
+        session.update(fields)
+        self._stats["refreshes"] += 1
+        self._stats["turns_summarized"] += len(entries)
+
+        try:
+            await session_store.update(session_id, fields)
+            if self.on_update:
+                await self.on_update(session_id, fields)
+        except Exception as e:
+            print(f"⚠️  Erro ao gravar o resumo de {session_id}: {e}")
+
+
+# Resumos partilhados pelo processo
+summarizer = MeetingSummarizer()
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Message Bus - Entrega de mensagens WebSocket entre workers
+Qualquer worker pode enviar para uma sessão; a mensagem chega a todos os
+workers com participantes ligados a essa sessão
+
+Backends (escolhidos por MESSAGE_BUS_URL):
+    local://                  No processo (um worker; testes com LocalBroker)
+    unix:///tmp/bus.sock      Broker local por Unix socket (vários workers na mesma máquina)
+    redis://host:6379/0       Redis pub/sub (vários workers/máquinas)
+
+Broker Unix:
+    python message_bus.py broker /tmp/staff_ai_bus.sock
+"""
+
+import os
+import sys
+import json
+import socket
+import struct
+import asyncio
+from typing import Dict, Set, Tuple, Optional, Callable, Awaitable
+
+# Configuração (via env vars)
+MESSAGE_BUS_URL = os.getenv("MESSAGE_BUS_URL", "local://")
+MESSAGE_BUS_CHANNEL_PREFIX = os.getenv("MESSAGE_BUS_CHANNEL_PREFIX", "staff_ai:ws:")
+DEFAULT_BROKER_SOCKET = "/tmp/staff_ai_bus.sock"
+# Espera máxima pelo broker num envio; depois a mensagem é descartada (e contada)
+MESSAGE_BUS_SEND_TIMEOUT = float(os.getenv("MESSAGE_BUS_SEND_TIMEOUT", "1.0"))
+
+# Identificação do worker (dica de afinidade de sessão)
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+# Cada frame no Unix socket: tamanhos (2 + 4 bytes, big-endian), cabeçalho JSON
+# ({"op", "session_id"}) e corpo (envelope JSON). O broker só lê o cabeçalho;
+# o corpo segue tal como chegou. Do broker para os workers, "peers" (sem corpo)
+# indica quantos outros workers têm a sessão subscrita.
+FRAME_SIZES = struct.Struct("!HI")
+
+Handler = Callable[[str, Dict], Awaitable[None]]
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+    """
+    Ler um frame inteiro
+
+    O frame é lido até ao fim antes de interpretar o cabeçalho: um cabeçalho
+    inválido (ValueError) não desalinha o frame seguinte.
+    """
+    header_size, body_size = FRAME_SIZES.unpack(await reader.readexactly(FRAME_SIZES.size))
+    header_data = await reader.readexactly(header_size)
+    body = await reader.readexactly(body_size) if body_size else b""
+    header = json.loads(header_data)
+    if not isinstance(header, dict):
+        raise ValueError(f"cabeçalho inválido: {header!r}")
+    return header, body
+
+
+def encode_frame(header: Dict, body: bytes = b"") -> bytes:
+    header_data = json.dumps(header).encode("utf-8")
+    return FRAME_SIZES.pack(len(header_data), len(body)) + header_data + body
+
+
+class MessageBus:
+    """
+    Interface comum
+
+    - subscribe/unsubscribe: este worker passa a receber/deixa de receber as
+      mensagens de uma sessão (quando o WebSocket liga/desliga)
+    - publish: enviar para os outros workers com membros da sessão (o envelope
+      leva a origem; o worker que publicou já entregou aos seus membros)
+    - handler: corrotina chamada com (session_id, envelope) para cada mensagem recebida
+    """
+
+    backend = "abstract"
+
+    def __init__(self, worker_id: str = WORKER_ID):
+        self.worker_id = worker_id
+        self.handler: Optional[Handler] = None
+        self.sessions: Set[str] = set()
+        self._stats = {"published": 0, "received": 0, "errors": 0, "dropped": 0}
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def subscribe(self, session_id: str):
+        self.sessions.add(session_id)
+
+    async def unsubscribe(self, session_id: str):
+        self.sessions.discard(session_id)
+
+    async def publish(self, session_id: str, envelope: Dict):
+        raise NotImplementedError
+
+    def may_have_peers(self, session_id: str) -> bool:
+        """Pode haver outros workers com membros desta sessão? (evita publicar em vão)"""
+        return True
+
+    def _envelope(self, envelope: Dict) -> Dict:
+        self._stats["published"] += 1
+        return {**envelope, "origin": self.worker_id}
+
+    async def _dispatch(self, session_id: str, envelope: Dict):
+        if self.handler is None or session_id not in self.sessions:
+            return
+        if envelope.get("origin") == self.worker_id:
+            return
+        self._stats["received"] += 1
+        try:
+            await self.handler(session_id, envelope)
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"⚠️  Erro ao entregar mensagem do bus ({session_id}): {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "sessions": len(self.sessions),
+            **self._stats
+        }
+
+
+class LocalBroker:
+    """Broker em memória: liga vários LocalBus no mesmo processo (testes)"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set["LocalBus"]] = {}
+
+    async def publish(self, session_id: str, envelope: Dict, sender: Optional["LocalBus"] = None) -> int:
+        targets = [bus for bus in self.subscribers.get(session_id, ()) if bus is not sender]
+        for bus in targets:
+            await bus._dispatch(session_id, envelope)
+        return len(targets)
+
+
+class LocalBus(MessageBus):
+    """Bus no processo (um só worker, ou vários workers simulados com o mesmo LocalBroker)"""
+
+    backend = "local"
+
+    def __init__(self, broker: Optional[LocalBroker] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.broker = broker or LocalBroker()
+
+    async def subscribe(self, session_id: str):
+        await super().subscribe(session_id)
+        self.broker.subscribers.setdefault(session_id, set()).add(self)
+
+    async def unsubscribe(self, session_id: str):
+        await super().unsubscribe(session_id)
+        subscribers = self.broker.subscribers.get(session_id)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.broker.subscribers[session_id]
+
+    async def publish(self, session_id: str, envelope: Dict):
+        await self.broker.publish(session_id, self._envelope(envelope), sender=self)
+
+    def may_have_peers(self, session_id: str) -> bool:
+        return any(bus is not self for bus in self.broker.subscribers.get(session_id, ()))
+
+
+class UnixSocketBus(MessageBus):
+    """
+    Cliente do broker Unix (ver UnixBroker)
+
+    Se a ligação cair, volta a ligar e a subscrever as sessões deste worker.
+    Enquanto o broker não responde, os envios esperam no máximo send_timeout
+    e a mensagem é descartada (stats: dropped): um broker em baixo não pode
+    parar os turnos. O broker informa quantos outros workers têm cada sessão
+    subscrita (may_have_peers); até essa resposta chegar, conta-se que pode
+    haver (uma mensagem registada entretanto não pode ficar por publicar).
+    subscribe() só volta com a resposta (ou ao fim de send_timeout): os outros
+    workers da sessão já sabem deste e publicam o que vier a seguir.
+    """
+
+    backend = "unix"
+
+    def __init__(self, path: str = DEFAULT_BROKER_SOCKET, send_timeout: float = MESSAGE_BUS_SEND_TIMEOUT, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.send_timeout = send_timeout
+        self.peers: Dict[str, int] = {}
+        self._unacked: Set[str] = set()   # Subscritas, à espera do frame "peers"
+        self._acks: Dict[str, asyncio.Event] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _run(self):
+        backoff = 0.1
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                print(f"⚠️  Broker indisponível em {self.path}: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+
+            backoff = 0.1
+            self._writer = writer
+            self._unacked.update(self.sessions)
+            for session_id in self.sessions:
+                writer.write(encode_frame({"op": "sub", "session_id": session_id}))
+            self._connected.set()
+
+            try:
+                while True:
+                    try:
+                        header, body = await read_frame(reader)
+                        if header.get("op") == "peers":
+                            self._set_peers(header["session_id"], header["count"])
+                        else:
+                            await self._dispatch(header["session_id"], json.loads(body))
+                    except (ValueError, KeyError, TypeError) as e:
+                        # Um frame inválido não pode parar a entrega dos seguintes
+                        self._stats["errors"] += 1
+                        print(f"⚠️  Frame inválido do broker ignorado: {e!r}")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                print("⚠️  Ligação ao broker perdida; a religar")
+            except Exception as e:
+                print(f"⚠️  Erro na ligação ao broker ({e!r}); a religar")
+            finally:
+                self._connected.clear()
+                self._writer = None
+                # O broker volta a enviar as contagens quando as sessões forem subscritas
+                self.peers.clear()
+                self._release_acks()
+                writer.close()
+
+    def _set_peers(self, session_id: str, count: int):
+        self._unacked.discard(session_id)
+        ack = self._acks.pop(session_id, None)
+        if ack is not None:
+            ack.set()
+        if count > 0 and session_id in self.sessions:
+            self.peers[session_id] = count
+        else:
+            self.peers.pop(session_id, None)
+
+    def _release_acks(self):
+        for ack in self._acks.values():
+            ack.set()
+        self._acks.clear()
+
+    def may_have_peers(self, session_id: str) -> bool:
+        return self._connected.is_set() and (session_id in self.peers or session_id in self._unacked)
+
+    async def _send(self, header: Dict, body: bytes = b""):
+        try:
+            await asyncio.wait_for(self._write(header, body), timeout=self.send_timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            self._stats["dropped"] += 1
+            if self._stats["dropped"] == 1 or self._stats["dropped"] % 100 == 0:
+                print(f"⚠️  Broker indisponível; mensagem descartada ({self._stats['dropped']} no total): {e!r}")
+
+    async def _write(self, header: Dict, body: bytes):
+        await self._connected.wait()
+        self._writer.write(encode_frame(header, body))
+        await self._writer.drain()
+
+    async def subscribe(self, session_id: str):
+        await super().subscribe(session_id)
+        if self._connected.is_set():
+            self._unacked.add(session_id)
+            ack = self._acks.setdefault(session_id, asyncio.Event())
+            await self._send({"op": "sub", "session_id": session_id})
+            try:
+                await asyncio.wait_for(ack.wait(), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def unsubscribe(self, session_id: str):
+        await super().unsubscribe(session_id)
+        self.peers.pop(session_id, None)
+        self._unacked.discard(session_id)
+        ack = self._acks.pop(session_id, None)
+        if ack is not None:
+            ack.set()
+        if self._connected.is_set():
+            await self._send({"op": "unsub", "session_id": session_id})
+
+    async def publish(self, session_id: str, envelope: Dict):
+        body = json.dumps(self._envelope(envelope), ensure_ascii=False).encode("utf-8")
+        await self._send({"op": "pub", "session_id": session_id}, body)
+
+
+class UnixBroker:
+    """
+    Broker para os workers de uma máquina
+
+    Encaminha cada publicação apenas para os outros workers que subscreveram
+    a sessão, e avisa os subscritores quando o número de workers da sessão
+    muda (frame "peers").
+    """
+
+    def __init__(self, path: str = DEFAULT_BROKER_SOCKET):
+        self.path = path
+        self.subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.stats = {"clients": 0, "published": 0, "delivered": 0, "undelivered": 0}
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats["clients"] += 1
+        subscribed: Set[str] = set()
+        try:
+            while True:
+                try:
+                    header, body = await read_frame(reader)
+                except ValueError as e:
+                    print(f"⚠️  Broker: frame inválido ignorado: {e!r}")
+                    continue
+                op = header.get("op")
+                session_id = header.get("session_id")
+
+                if op == "sub":
+                    self.subscribers.setdefault(session_id, set()).add(writer)
+                    subscribed.add(session_id)
+                    self._notify_peers(session_id)
+                elif op == "unsub":
+                    self._unsubscribe(session_id, writer)
+                    subscribed.discard(session_id)
+                elif op == "pub":
+                    await self._publish(session_id, body, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"⚠️  Broker: ligação de um worker terminada ({e!r})")
+        finally:
+            for session_id in subscribed:
+                self._unsubscribe(session_id, writer)
+            self.stats["clients"] -= 1
+            writer.close()
+
+    def _unsubscribe(self, session_id: str, writer: asyncio.StreamWriter):
+        writers = self.subscribers.get(session_id)
+        if writers is not None:
+            writers.discard(writer)
+            if not writers:
+                del self.subscribers[session_id]
+            else:
+                self._notify_peers(session_id)
+
+    def _notify_peers(self, session_id: str):
+        """Dizer a cada subscritor quantos outros workers têm a sessão"""
+        writers = self.subscribers.get(session_id, ())
+        data = encode_frame({"op": "peers", "session_id": session_id, "count": len(writers) - 1})
+        for writer in writers:
+            if not writer.is_closing():
+                writer.write(data)
+
+    async def _publish(self, session_id: str, body: bytes, sender: asyncio.StreamWriter):
+        self.stats["published"] += 1
+        # O worker que publicou já entregou aos seus próprios membros
+        writers = [w for w in self.subscribers.get(session_id, ()) if w is not sender]
+        if not writers:
+            self.stats["undelivered"] += 1
+            return
+
+        data = encode_frame({"session_id": session_id}, body)
+        for writer in writers:
+            try:
+                writer.write(data)
+                await writer.drain()
+                self.stats["delivered"] += 1
+            except ConnectionError:
+                pass
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"📡 Broker a escutar em {self.path}")
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+
+class RedisBus(MessageBus):
+    """Bus sobre Redis pub/sub (um canal por sessão)"""
+
+    backend = "redis"
+
+    def __init__(self, url: str, client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.redis = client
+        self.pubsub = client.pubsub()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _channel(session_id: str) -> str:
+        return f"{MESSAGE_BUS_CHANNEL_PREFIX}{session_id}"
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+    async def _run(self):
+        prefix = len(MESSAGE_BUS_CHANNEL_PREFIX)
+        while True:
+            if not self.pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                envelope = json.loads(message["data"])
+            except (ValueError, TypeError) as e:
+                self._stats["errors"] += 1
+                print(f"⚠️  Mensagem inválida no canal {channel} ignorada: {e!r}")
+                continue
+            await self._dispatch(channel[prefix:], envelope)
+
+    async def subscribe(self, session_id: str):
+        await super().subscribe(session_id)
+        await self.pubsub.subscribe(self._channel(session_id))
+
+    async def unsubscribe(self, session_id: str):
+        await super().unsubscribe(session_id)
+        await self.pubsub.unsubscribe(self._channel(session_id))
+
+    async def publish(self, session_id: str, envelope: Dict):
+        await self.redis.publish(self._channel(session_id), json.dumps(self._envelope(envelope), ensure_ascii=False))
+
+
+def create_message_bus(url: str = MESSAGE_BUS_URL) -> MessageBus:
+    """Criar o backend indicado pelo URL"""
+
+    if url.startswith("unix://"):
+        return UnixSocketBus(url[len("unix://"):] or DEFAULT_BROKER_SOCKET)
+
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            return RedisBus(url)
+        except ImportError:
+            print("⚠️  MESSAGE_BUS_URL é Redis mas o pacote redis não está instalado (pip install redis)")
+            print("   A usar bus local (sem entrega entre workers)")
+            return LocalBus()
+
+    if not url.startswith("local://"):
+        print(f"⚠️  MESSAGE_BUS_URL desconhecido ({url}); a usar bus local")
+    return LocalBus()
+
+
+# Bus partilhado pelo processo
+message_bus = create_message_bus()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "broker":
+        print("Uso: python message_bus.py broker [caminho_do_socket]")
+        sys.exit(1)
+
+    path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BROKER_SOCKET
+    try:
+        asyncio.run(UnixBroker(path).serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Broker terminado")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Persistence - Peças comuns aos armazenamentos
+WriteBehind: fila com escrita diferida em lotes (sessões, hub)
+SQLiteConnections: uma conexão SQLite (WAL) por thread (sessões, hub, vídeos)
+"""
+
+import sqlite3
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class SQLiteConnections:
+    """
+    Conexões a um ficheiro SQLite, uma por thread
+
+    As chamadas chegam via asyncio.to_thread e uma conexão sqlite3 não pode
+    ser usada noutra thread. Chamar a instância devolve a conexão da thread
+    atual (criada na primeira vez, em modo WAL).
+    """
+
+    def __init__(self, db_path: str, timeout: float = 10):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+class WriteBehind:
+    """
+    Escrita diferida em lotes
+
+    _enqueue() não bloqueia: só junta o item à fila. Uma tarefa de fundo grava
+    a fila a cada flush_interval (ou logo que chegue a batch_size) através de
+    _write_batch, a implementar pela subclasse. Chamar start() dentro do event
+    loop e close() no fim para gravar o que falta.
+
+    Com max_pending a fila é limitada: as mais antigas perdem-se ("dropped").
+    """
+
+    # Nome usado nos avisos de escrita falhada
+    label = "itens"
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: Optional[int] = None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._pending: Deque = deque(maxlen=max_pending)
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"batches": 0, "dropped": 0, "write_errors": 0}
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            # asyncio.wait e não wait_for: com o evento já ativo, wait_for
+            # (até ao Python 3.11) engole o cancel de close() e o ciclo não termina
+            wakeup = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({wakeup}, timeout=self.flush_interval)
+            finally:
+                wakeup.cancel()
+            self._wakeup.clear()
+            await self.flush()
+
+    # ------------------------------------------------------------------
+    # Fila
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, item: Any):
+        if len(self._pending) == self._pending.maxlen:
+            self._stats["dropped"] += 1
+        self._pending.append(item)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _discard(self, match: Callable[[Any], bool]):
+        """Retirar da fila os itens que ainda não foram gravados e já não interessam"""
+        self._pending = deque((item for item in self._pending if not match(item)), maxlen=self._pending.maxlen)
+
+    async def _read_with_pending(
+        self,
+        read: Callable[[], Awaitable[List]],
+        match: Callable[[Any], bool]
+    ) -> Tuple[List, List]:
+        """Ler o que já está gravado e os itens em fila que interessam"""
+        # Com o lock, um lote a meio da escrita não fica invisível
+        async with self._flush_lock:
+            stored = await read()
+            pending = [item for item in self._pending if match(item)]
+        return stored, pending
+
+    async def flush(self):
+        """Gravar a fila atual (se falhar, os itens ficam para a próxima vez)"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch = list(self._pending)
+            self._pending.clear()
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                # Voltam para o início da fila, antes dos que chegaram entretanto.
+                # Numa fila limitada só voltam os que cabem (os mais novos do
+                # lote): extendleft descartaria os mais recentes
+                maxlen = self._pending.maxlen
+                free = len(batch) if maxlen is None else maxlen - len(self._pending)
+                kept = batch[len(batch) - free:] if free < len(batch) else batch
+                self._stats["dropped"] += len(batch) - len(kept)
+                self._pending.extendleft(reversed(kept))
+                self._stats["write_errors"] += 1
+                print(f"⚠️  Erro ao gravar {self.label} ({len(kept)} voltam à fila): {e}")
+                return
+            self._stats["batches"] += 1
+
+    def stats(self) -> Dict:
+        return {"pending": len(self._pending), **self._stats}
+
+    async def _write_batch(self, batch: List):
+        raise NotImplementedError
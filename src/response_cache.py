@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Response Cache - Cache opcional de respostas do LLM
+Para pedidos que se repetem (abertura da reunião, api/chat.py sem estado):
+    exato    (agente, tópico, mensagem, histórico) normalizados
+    próximo  mensagem semelhante (features do router, cosseno >= limiar),
+             com o mesmo agente, tópico e histórico
+
+Desligada por defeito (RESPONSE_CACHE=1 para ligar). Entradas com TTL,
+número máximo de entradas (LRU) e invalidação por agente.
+"""
+
+import os
+import re
+import hmac
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from agent_router import normalize, hashed_features
+
+# Configuração (via env vars)
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+# Similaridade mínima para respostas de mensagens parecidas (0 = só exatas)
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+# Token do DELETE /cache/responses (?token=): sem ele o endpoint fica desligado
+RESPONSE_CACHE_ADMIN_TOKEN = os.getenv("RESPONSE_CACHE_ADMIN_TOKEN", "")
+
+# Substitui o nome do participante nas chaves e respostas guardadas
+USER_PLACEHOLDER = "{{user_name}}"
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_key(text: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços simples"""
+    return " ".join(PUNCTUATION_RE.sub(" ", normalize(text)).split())
+
+
+def with_placeholder(text: str, user_name: str) -> str:
+    """Trocar o nome do participante (palavra inteira) pelo marcador"""
+    if len(user_name) < 2:
+        return text
+    return re.sub(rf"\b{re.escape(user_name)}\b", USER_PLACEHOLDER, text)
+
+
+def history_fingerprint(entries: Iterable, summary: str = "") -> str:
+    """Impressão digital do histórico (e resumo) usado no prompt ("" se vazio)"""
+    digest = hashlib.blake2b(digest_size=12)
+    empty = not summary
+    digest.update(normalize_key(summary).encode())
+    for entry in entries:
+        digest.update(f"{entry.sender}\x00{normalize_key(entry.content)}\x01".encode())
+        empty = False
+    return "" if empty else digest.hexdigest()
+
+
+class CachedResponse:
+    """Uma resposta guardada"""
+
+    __slots__ = ("agent_id", "bucket", "text", "vector", "latency", "expires_at")
+
+    def __init__(self, agent_id: str, bucket: Tuple, text: str, vector: Optional[np.ndarray], latency: float, expires_at: float):
+        self.agent_id = agent_id
+        self.bucket = bucket        # (agente, tópico, histórico): onde procurar as próximas
+        self.text = text
+        self.vector = vector
+        self.latency = latency      # Tempo que a resposta levou a gerar (s)
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Cache LRU de respostas
+
+    As chaves exatas ficam num OrderedDict; para as próximas, cada grupo
+    (agente, tópico, histórico) tem a lista das suas chaves e a matriz das
+    features, para comparar a mensagem com todas de uma vez.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = RESPONSE_CACHE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        similarity: float = RESPONSE_CACHE_SIMILARITY,
+        admin_token: str = RESPONSE_CACHE_ADMIN_TOKEN
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.admin_token = admin_token
+
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._buckets: Dict[Tuple, List[Tuple]] = {}
+        self._matrices: Dict[Tuple, np.ndarray] = {}   # Reconstruídas quando o grupo muda
+        self._stats = {
+            "lookups": 0, "exact_hits": 0, "near_hits": 0, "misses": 0,
+            "stores": 0, "evictions": 0, "expired": 0, "invalidated": 0, "saved_seconds": 0.0
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def get(self, agent_id: str, topic: str, message: str, fingerprint: str = "", user_name: str = "") -> Optional[str]:
+        """Resposta guardada para o pedido (ou None)"""
+        if not self.enabled:
+            return None
+        self._stats["lookups"] += 1
+
+        key, bucket, text = self._key(agent_id, topic, message, fingerprint, user_name)
+        entry = self._live(key)
+        if entry is not None:
+            self._stats["exact_hits"] += 1
+        elif self.similarity > 0:
+            entry = self._nearest(bucket, text)
+            if entry is not None:
+                self._stats["near_hits"] += 1
+
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["saved_seconds"] += entry.latency
+        return entry.text.replace(USER_PLACEHOLDER, user_name) if user_name else entry.text
+
+    def put(
+        self,
+        agent_id: str,
+        topic: str,
+        message: str,
+        response: str,
+        fingerprint: str = "",
+        user_name: str = "",
+        latency: float = 0.0
+    ):
+        """Guardar uma resposta gerada (latency: quanto demorou a gerar)"""
+        if not self.enabled or not response:
+            return
+
+        key, bucket, text = self._key(agent_id, topic, message, fingerprint, user_name)
+        response = with_placeholder(response, user_name)
+        vector = hashed_features(text, normalized=True) if self.similarity > 0 else None
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CachedResponse(agent_id, bucket, response, vector, latency, time.time() + self.ttl)
+        self._buckets.setdefault(bucket, []).append(key)
+        self._matrices.pop(bucket, None)
+        self._stats["stores"] += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def invalidate(self, agent_id: Optional[str] = None) -> int:
+        """Apagar as respostas de um agente (ou todas); devolve quantas"""
+        keys = [key for key, entry in self._entries.items() if agent_id is None or entry.agent_id == agent_id]
+        for key in keys:
+            self._remove(key)
+        self._stats["invalidated"] += len(keys)
+        return len(keys)
+
+    def admin_authorized(self, token: Optional[str]) -> bool:
+        """O pedido traz o token de administração? (falso se não houver token configurado)"""
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(token, self.admin_token)
+
+    def stats(self) -> Dict:
+        lookups = self._stats["lookups"]
+        hits = self._stats["exact_hits"] + self._stats["near_hits"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            **self._stats,
+            "saved_seconds": round(self._stats["saved_seconds"], 2),
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
+
+    # ------------------------------------------------------------------
+    # Interno
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(agent_id: str, topic: str, message: str, fingerprint: str, user_name: str) -> Tuple[Tuple, Tuple, str]:
+        message = with_placeholder(message, user_name)
+        bucket = (agent_id, normalize_key(topic), fingerprint)
+        text = normalize_key(message)
+        return (*bucket, text), bucket, text
+
+    def _live(self, key: Tuple) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.time():
+            self._remove(key)
+            self._stats["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, bucket: Tuple, text: str) -> Optional[CachedResponse]:
+        keys = self._buckets.get(bucket)
+        if not keys:
+            return None
+
+        matrix = self._matrices.get(bucket)
+        if matrix is None:
+            matrix = self._matrices[bucket] = np.stack([self._entries[key].vector for key in keys])
+
+        scores = matrix @ hashed_features(text, normalized=True)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+        return self._live(keys[best])
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        keys = self._buckets.get(entry.bucket)
+        if keys is not None:
+            keys.remove(key)
+            if not keys:
+                del self._buckets[entry.bucket]
+            self._matrices.pop(entry.bucket, None)
+
+
+# Cache partilhada pelo processo
+response_cache = ResponseCache()
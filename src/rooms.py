@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Rooms - Salas de reunião com vários participantes
+Cada mensagem é serializada uma vez e posta na fila de saída de cada membro;
+cada ligação tem a sua tarefa de escrita, por isso um cliente lento não
+atrasa o turno nem os outros membros
+
+Quando a fila de um membro enche, aplica-se OUTBOUND_POLICY (por ordem):
+    coalesce_deltas  Juntar fragmentos agent_message_delta da mesma mensagem
+    drop_audio       Descartar o áudio em fila (o texto segue)
+    disconnect       Desligar o membro se a fila continuar cheia
+Sem "disconnect", a mensagem nova é descartada.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Callable, Awaitable
+
+from fastapi import WebSocket
+
+from audio_frames import negotiate_audio_format, audio_fields
+
+# Configuração (via env vars)
+OUTBOUND_QUEUE_MAX = int(os.getenv("OUTBOUND_QUEUE_MAX", "64"))
+OUTBOUND_POLICY = [
+    policy.strip()
+    for policy in os.getenv("OUTBOUND_POLICY", "coalesce_deltas,drop_audio,disconnect").split(",")
+    if policy.strip()
+]
+# Tempo máximo de um envio; acima disso o membro é desligado
+ROOM_SEND_TIMEOUT = float(os.getenv("ROOM_SEND_TIMEOUT", "5"))
+
+DELTA_TYPE = "agent_message_delta"
+AUDIO_CHUNK_TYPE = "agent_audio_chunk"
+
+
+class OutboundStats:
+    """Métricas agregadas de todas as filas de saída do processo"""
+
+    def __init__(self, window: int = 1024):
+        self.counters = {
+            "enqueued": 0, "sent": 0, "coalesced": 0, "audio_dropped": 0,
+            "messages_dropped": 0, "slow_disconnects": 0, "send_errors": 0
+        }
+        self.max_depth = 0
+        self._latencies = deque(maxlen=window)   # Da entrada na fila ao envio (ms)
+
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds * 1000)
+
+    def snapshot(self, depths: List[int]) -> Dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            **self.counters,
+            "queue_depth": sum(depths),
+            "queue_depth_max_connection": max(depths, default=0),
+            "queue_depth_max_seen": self.max_depth,
+            "send_latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)}
+        }
+
+
+outbound_stats = OutboundStats()
+
+
+class OutboundItem:
+    """Mensagem à espera de envio para um membro"""
+
+    __slots__ = ("text", "frames", "message", "fallback", "enqueued_at")
+
+    def __init__(self, text: str, frames=(), message: Optional[Dict] = None, fallback: Optional[str] = None):
+        self.text = text
+        self.frames = frames
+        self.message = message     # Só para fragmentos (coalescência) e áudio
+        self.fallback = fallback   # Versão sem áudio (drop_audio)
+        self.enqueued_at = time.perf_counter()
+
+    @property
+    def is_delta(self) -> bool:
+        return self.message is not None and self.message.get("type") == DELTA_TYPE
+
+    @property
+    def has_audio(self) -> bool:
+        return self.fallback is not None
+
+
+class RoomConnection:
+    """Um participante ligado a uma sala (um WebSocket) com a sua fila de saída"""
+
+    __slots__ = (
+        "connection_id", "websocket", "audio_format", "avatar_video",
+        "queue", "max_queue", "policy", "on_failure", "_wakeup", "_writer", "_closed"
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        audio_format: Optional[str] = None,
+        avatar_video: bool = False,
+        max_queue: int = OUTBOUND_QUEUE_MAX,
+        policy: List[str] = OUTBOUND_POLICY
+    ):
+        self.connection_id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.audio_format = negotiate_audio_format(audio_format)
+        self.avatar_video = avatar_video
+        self.queue: deque = deque()
+        self.max_queue = max_queue
+        self.policy = policy
+        self.on_failure: Optional[Callable[["RoomConnection"], Awaitable[None]]] = None
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    def stop(self):
+        """Parar a escrita (pendentes são descartados)"""
+        self._closed = True
+        self.queue.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def close(self, code: int = 1000):
+        """Parar a escrita e fechar o WebSocket"""
+        self.stop()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Fila de saída
+    # ------------------------------------------------------------------
+
+    def send_json(self, message: Dict):
+        """Pôr uma mensagem na fila (não bloqueia)"""
+        self.enqueue(OutboundItem(json.dumps(message, ensure_ascii=False)))
+
+    def enqueue(self, item: OutboundItem) -> bool:
+        if self._closed:
+            return False
+
+        if len(self.queue) >= self.max_queue and not self._make_room(item):
+            return False
+        if not item.text:
+            return False
+
+        self.queue.append(item)
+        outbound_stats.counters["enqueued"] += 1
+        outbound_stats.max_depth = max(outbound_stats.max_depth, len(self.queue))
+        self._wakeup.set()
+        return True
+
+    def _make_room(self, item: OutboundItem) -> bool:
+        """Aplicar a política de cliente lento; True se a mensagem pode entrar"""
+
+        for policy in self.policy:
+            if policy == "coalesce_deltas":
+                self._coalesce_deltas(item)
+            elif policy == "drop_audio":
+                self._drop_audio(item)
+            elif policy == "disconnect":
+                if len(self.queue) >= self.max_queue:
+                    outbound_stats.counters["slow_disconnects"] += 1
+                    self._fail()
+                    return False
+            if len(self.queue) < self.max_queue:
+                return True
+
+        outbound_stats.counters["messages_dropped"] += 1
+        return False
+
+    def _coalesce_deltas(self, incoming: OutboundItem):
+        merged: deque = deque()
+        for item in self.queue:
+            previous = merged[-1] if merged else None
+            if (
+                item.is_delta and previous is not None and previous.is_delta
+                and previous.message["message_id"] == item.message["message_id"]
+            ):
+                previous.message = {**previous.message, "delta": previous.message["delta"] + item.message["delta"]}
+                previous.text = json.dumps(previous.message, ensure_ascii=False)
+                outbound_stats.counters["coalesced"] += 1
+            else:
+                merged.append(item)
+        self.queue = merged
+
+        # O novo fragmento pode juntar-se ao último em fila
+        last = self.queue[-1] if self.queue else None
+        if incoming.is_delta and last is not None and last.is_delta \
+                and last.message["message_id"] == incoming.message["message_id"]:
+            self.queue.pop()
+            incoming.message = {**last.message, "delta": last.message["delta"] + incoming.message["delta"]}
+            incoming.text = json.dumps(incoming.message, ensure_ascii=False)
+            incoming.enqueued_at = last.enqueued_at
+            outbound_stats.counters["coalesced"] += 1
+
+    def _drop_audio(self, incoming: OutboundItem):
+        kept: deque = deque()
+        for item in (*self.queue, incoming):
+            if not item.has_audio:
+                if item is not incoming:
+                    kept.append(item)
+                continue
+            outbound_stats.counters["audio_dropped"] += 1
+            if item.message and item.message.get("type") == AUDIO_CHUNK_TYPE:
+                # Só áudio: o texto chega na mensagem final
+                if item is incoming:
+                    incoming.text, incoming.frames, incoming.fallback = "", (), None
+                continue
+            item.text, item.frames, item.fallback = item.fallback, (), None
+            if item is not incoming:
+                kept.append(item)
+        self.queue = kept
+
+    def _fail(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.clear()
+        if self.on_failure is not None:
+            asyncio.get_running_loop().create_task(self.on_failure(self))
+
+    async def _write_loop(self):
+        while True:
+            if not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            item = self.queue.popleft()
+            try:
+                await asyncio.wait_for(self._send(item), ROOM_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                outbound_stats.counters["slow_disconnects"] += 1
+                self._fail()
+                return
+            except Exception:
+                outbound_stats.counters["send_errors"] += 1
+                self._fail()
+                return
+            outbound_stats.counters["sent"] += 1
+            outbound_stats.record_latency(time.perf_counter() - item.enqueued_at)
+
+    async def _send(self, item: OutboundItem):
+        await self.websocket.send_text(item.text)
+        for frame in item.frames:
+            await self.websocket.send_bytes(frame)
+
+
+class Room:
+    """Membros de uma reunião ligados a este worker"""
+
+    __slots__ = ("room_id", "members")
+
+    def __init__(self, room_id: str):
+        self.room_id = room_id
+        self.members: Dict[str, RoomConnection] = {}
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def add(self, connection: RoomConnection):
+        self.members[connection.connection_id] = connection
+
+    def remove(self, connection: RoomConnection):
+        self.members.pop(connection.connection_id, None)
+
+    @property
+    def wants_video(self) -> bool:
+        return any(member.avatar_video for member in self.members.values())
+
+    def broadcast_json(self, message: Dict, exclude: Optional[RoomConnection] = None):
+        """Pôr uma mensagem JSON na fila de todos os membros (serializada uma vez)"""
+        text = json.dumps(message, ensure_ascii=False)
+        keep = message if message.get("type") == DELTA_TYPE else None
+        for member in self._targets(exclude):
+            member.enqueue(OutboundItem(text, message=keep))
+
+    def broadcast_audio(self, message: Dict, audio: Optional[bytes], exclude: Optional[RoomConnection] = None):
+        """
+        Pôr uma mensagem com áudio na fila de todos os membros
+
+        O áudio é codificado uma vez por formato (base64 e/ou frames binários),
+        não uma vez por membro.
+        """
+        if not audio:
+            self.broadcast_json({**message, "audio": None}, exclude=exclude)
+            return
+
+        fallback = json.dumps({**message, "audio": None, "audio_dropped": True}, ensure_ascii=False)
+        encoded: Dict[str, Tuple[str, List[bytes]]] = {}
+        for member in self._targets(exclude):
+            if member.audio_format not in encoded:
+                fields, frames = audio_fields(audio, member.audio_format)
+                encoded[member.audio_format] = (json.dumps({**message, **fields}, ensure_ascii=False), frames)
+            text, frames = encoded[member.audio_format]
+            member.enqueue(OutboundItem(text, frames, message=message, fallback=fallback))
+
+    def depths(self) -> List[int]:
+        return [len(member.queue) for member in self.members.values()]
+
+    def _targets(self, exclude: Optional[RoomConnection]) -> List[RoomConnection]:
+        return [member for member in self.members.values() if member is not exclude]
@@ -7,19 +7,27 @@ FastAPI servindo frontend (React) + backend (API + WebSocket)
 import os
 import sys
 import json
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import List, Dict
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from openai import OpenAI
+from llm_client import llm
+from agent_router import route_message
+from conversation_history import ConversationHistory
+from static_manifest import static_manifest
 
-# Configuração
-STATIC_DIR = "/home/ubuntu/meeting_room_app/src/static"
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Frontend indexado e comprimido uma vez (STATIC_DIR)
+    await asyncio.to_thread(static_manifest.build)
+    yield
+    # Fechar pool de conexões do OpenAI
+    await llm.aclose()
 
-app = FastAPI(title="STAFF AI Meeting Room", version="1.0.0")
+app = FastAPI(title="STAFF AI Meeting Room", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -30,9 +38,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Cliente OpenAI
-client = OpenAI()
-
 # Configuração dos agentes
 AGENTS_CONFIG = {
     "elara": {
@@ -106,8 +111,7 @@ Participante: {user_name}
 Responda em português de Portugal, de forma profissional e concisa (máximo 100 palavras)."""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
+        return await llm.complete(
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": context}
@@ -115,7 +119,6 @@ Responda em português de Portugal, de forma profissional e concisa (máximo 100
             max_tokens=200,
             temperature=0.8
         )
-        return response.choices[0].message.content.strip()
     except Exception as e:
         return f"Desculpe, estou com dificuldades técnicas. ({agent['name']})"
 
@@ -130,7 +133,7 @@ async def start_meeting(meeting: MeetingStart):
     manager.meeting_sessions[session_id] = {
         "user_name": user_name,
         "topic": topic,
-        "conversation_history": [],
+        "conversation_history": ConversationHistory.for_session(session_id),
         "started_at": datetime.now().isoformat()
     }
     
@@ -141,11 +144,7 @@ async def start_meeting(meeting: MeetingStart):
         user_name
     )
     
-    manager.meeting_sessions[session_id]["conversation_history"].append({
-        "from": "elara",
-        "from_name": "Elara Veyra",
-        "content": opening
-    })
+    manager.meeting_sessions[session_id]["conversation_history"].append("elara", "Elara Veyra", opening)
     
     return {
         "session_id": session_id,
@@ -170,17 +169,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 continue
             
             # Determinar agente
-            responding_agent = "elara"
-            content_lower = content.lower()
-            
-            if any(w in content_lower for w in ["marketing", "mercado"]):
-                responding_agent = "aurora"
-            elif any(w in content_lower for w in ["design", "visual"]):
-                responding_agent = "helios"
-            elif any(w in content_lower for w in ["técnico", "tecnologia"]):
-                responding_agent = "hephaestus"
-            elif any(w in content_lower for w in ["dados", "análise"]):
-                responding_agent = "athena"
+            responding_agent = route_message(content)
             
             # Gerar resposta
             agent_config = AGENTS_CONFIG[responding_agent]
@@ -211,15 +200,9 @@ async def health():
     return {"status": "operational", "agents": len(AGENTS_CONFIG)}
 
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
-    """Servir frontend React"""
-    file_path = os.path.join(STATIC_DIR, full_path)
-    
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return FileResponse(file_path)
-    
-    # SPA routing - retornar index.html
-    return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+async def serve_frontend(request: Request, full_path: str):
+    """Servir frontend React (ficheiros do manifesto; rotas do SPA recebem index.html)"""
+    return static_manifest.response(request, full_path)
 
 if __name__ == "__main__":
     import uvicorn
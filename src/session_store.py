@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Session Store - Armazenamento persistente das reuniões
+As sessões sobrevivem a reinícios e são partilhadas entre workers
+
+Backends (escolhidos por SESSION_STORE_URL):
+    memory://                 Dicionário no processo (por defeito, um só worker)
+    sqlite:///caminho/db      SQLite em modo WAL (vários workers na mesma máquina)
+    redis://host:6379/0       Redis ou compatível (vários workers/máquinas)
+
+As mensagens são acumuladas e escritas em lotes por uma tarefa de fundo;
+os metadados da sessão são escritos logo na criação.
+"""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+from typing import List, Dict, Optional, Tuple
+
+from conversation_history import HistoryEntry
+from persistence import SQLiteConnections, WriteBehind
+
+# Configuração (via env vars)
+SESSION_STORE_URL = os.getenv(
+    "SESSION_STORE_URL",
+    "memory://"
+)
+SESSION_STORE_TTL = float(os.getenv("SESSION_STORE_TTL", str(24 * 3600)))
+SESSION_STORE_BATCH = int(os.getenv("SESSION_STORE_BATCH", "64"))
+SESSION_STORE_FLUSH_INTERVAL = float(os.getenv("SESSION_STORE_FLUSH_INTERVAL", "0.2"))
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "staff_ai_sessions.db")
+
+
+class SessionStore(WriteBehind):
+    """
+    Interface comum dos backends
+
+    append() é síncrono e não bloqueia: só junta a mensagem ao lote. Os lotes
+    são escritos por _write_batch (a implementar em cada backend).
+    """
+
+    label = "sessões"
+
+    def __init__(
+        self,
+        ttl: float = SESSION_STORE_TTL,
+        batch_size: int = SESSION_STORE_BATCH,
+        flush_interval: float = SESSION_STORE_FLUSH_INTERVAL
+    ):
+        super().__init__(batch_size, flush_interval)
+        self.ttl = ttl
+        self._stats.update({"sessions_created": 0, "appends": 0, "loads": 0})
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    async def create(self, session_id: str, meta: Dict):
+        """Criar (ou substituir) uma sessão; apaga o histórico anterior"""
+        async with self._flush_lock:
+            self._discard(lambda item: item[0] == session_id)
+            await self._create(session_id, meta)
+        self._stats["sessions_created"] += 1
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        """Metadados da sessão (ou None se não existir/expirou)"""
+        return await self._get(session_id)
+
+    async def update(self, session_id: str, fields: Dict):
+        """Juntar campos aos metadados de uma sessão existente (ex.: resumo)"""
+        await self._update(session_id, fields)
+
+    def append(self, session_id: str, entry: HistoryEntry):
+        """Juntar uma mensagem ao lote a gravar"""
+        self._enqueue((session_id, entry))
+        self._stats["appends"] += 1
+
+    async def history(self, session_id: str, last: Optional[int] = None) -> List[HistoryEntry]:
+        """Mensagens da sessão por ordem (as últimas `last`, se indicado)"""
+        stored, pending = await self._read_with_pending(
+            lambda: self._history(session_id, last),
+            lambda item: item[0] == session_id
+        )
+        entries = stored + [entry for _, entry in pending]
+        self._stats["loads"] += 1
+        return entries[-last:] if last else entries
+
+    async def delete(self, session_id: str):
+        self._discard(lambda item: item[0] == session_id)
+        await self._delete(session_id)
+
+    def stats(self) -> Dict:
+        return {"backend": self.backend, **super().stats()}
+
+    # ------------------------------------------------------------------
+    # A implementar pelos backends
+    # ------------------------------------------------------------------
+
+    backend = "abstract"
+
+    async def _create(self, session_id: str, meta: Dict):
+        raise NotImplementedError
+
+    async def _get(self, session_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    async def _update(self, session_id: str, fields: Dict):
+        raise NotImplementedError
+
+    async def _history(self, session_id: str, last: Optional[int]) -> List[HistoryEntry]:
+        raise NotImplementedError
+
+    async def _delete(self, session_id: str):
+        raise NotImplementedError
+
+    async def _write_batch(self, batch: List[Tuple[str, HistoryEntry]]):
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Sessões em memória (só um processo; perde-se num reinício)"""
+
+    backend = "memory"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._sessions: Dict[str, Dict] = {}
+        self._expires: Dict[str, float] = {}
+        self._messages: Dict[str, List[HistoryEntry]] = {}
+
+    def _prune(self):
+        now = time.time()
+        for session_id in [sid for sid, expires in self._expires.items() if expires < now]:
+            self._drop(session_id)
+
+    def _drop(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._expires.pop(session_id, None)
+        self._messages.pop(session_id, None)
+
+    async def _create(self, session_id: str, meta: Dict):
+        self._prune()
+        self._sessions[session_id] = dict(meta)
+        self._expires[session_id] = time.time() + self.ttl
+        self._messages[session_id] = []
+
+    async def _get(self, session_id: str) -> Optional[Dict]:
+        if self._expires.get(session_id, 0) < time.time():
+            self._drop(session_id)
+            return None
+        return dict(self._sessions[session_id])
+
+    async def _update(self, session_id: str, fields: Dict):
+        if session_id in self._sessions:
+            self._sessions[session_id].update(fields)
+
+    async def _history(self, session_id: str, last: Optional[int]) -> List[HistoryEntry]:
+        messages = self._messages.get(session_id, [])
+        return list(messages[-last:] if last else messages)
+
+    async def _delete(self, session_id: str):
+        self._drop(session_id)
+
+    async def _write_batch(self, batch: List[Tuple[str, HistoryEntry]]):
+        now = time.time()
+        for session_id, entry in batch:
+            if session_id in self._messages:
+                self._messages[session_id].append(entry)
+                self._expires[session_id] = now + self.ttl
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessões em SQLite (WAL): vários workers na mesma máquina partilham o ficheiro
+
+    As mensagens ficam indexadas por (session_id, id); cada lote é uma única
+    transação.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, db_path: str = DEFAULT_SQLITE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = db_path
+        self._conn = SQLiteConnections(db_path)
+        self._init_db()
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                meta TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                sender_name TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+        """)
+        conn.commit()
+
+    # Operações síncronas (correm numa thread)
+
+    def _create_sync(self, session_id: str, meta: Dict):
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT session_id FROM sessions WHERE expires_at < ?", (now,)
+            )]
+            for sid in expired + [session_id]:
+                conn.execute("DELETE FROM messages WHERE session_id = ?", (sid,))
+                conn.execute("DELETE FROM sessions WHERE session_id = ?", (sid,))
+            conn.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?)",
+                (session_id, json.dumps(meta, ensure_ascii=False), now + self.ttl)
+            )
+
+    def _get_sync(self, session_id: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT meta, expires_at FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def _update_sync(self, session_id: str, fields: Dict):
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT meta FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE sessions SET meta = ? WHERE session_id = ?",
+                    (json.dumps({**json.loads(row[0]), **fields}, ensure_ascii=False), session_id)
+                )
+
+    def _history_sync(self, session_id: str, last: Optional[int]) -> List[HistoryEntry]:
+        conn = self._conn()
+        if last:
+            rows = conn.execute(
+                "SELECT sender, sender_name, content, timestamp FROM messages "
+                "WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                (session_id, last)
+            ).fetchall()
+            rows.reverse()
+        else:
+            rows = conn.execute(
+                "SELECT sender, sender_name, content, timestamp FROM messages "
+                "WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+        return [HistoryEntry.from_record(row) for row in rows]
+
+    def _delete_sync(self, session_id: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _write_batch_sync(self, batch: List[Tuple[str, HistoryEntry]]):
+        conn = self._conn()
+        expires_at = time.time() + self.ttl
+        with conn:
+            conn.executemany(
+                "INSERT INTO messages (session_id, sender, sender_name, content, timestamp) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(session_id, *entry.to_record()) for session_id, entry in batch]
+            )
+            conn.executemany(
+                "UPDATE sessions SET expires_at = ? WHERE session_id = ?",
+                [(expires_at, session_id) for session_id in {sid for sid, _ in batch}]
+            )
+
+    # Interface assíncrona
+
+    async def _create(self, session_id: str, meta: Dict):
+        await asyncio.to_thread(self._create_sync, session_id, meta)
+
+    async def _get(self, session_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self._get_sync, session_id)
+
+    async def _update(self, session_id: str, fields: Dict):
+        await asyncio.to_thread(self._update_sync, session_id, fields)
+
+    async def _history(self, session_id: str, last: Optional[int]) -> List[HistoryEntry]:
+        return await asyncio.to_thread(self._history_sync, session_id, last)
+
+    async def _delete(self, session_id: str):
+        await asyncio.to_thread(self._delete_sync, session_id)
+
+    async def _write_batch(self, batch: List[Tuple[str, HistoryEntry]]):
+        await asyncio.to_thread(self._write_batch_sync, batch)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessões em Redis (ou servidor compatível)
+
+    session:{id}          JSON com os metadados
+    session:{id}:history  Lista com as mensagens (JSON por elemento)
+    Cada lote é enviado num único pipeline.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+        self.redis = client
+
+    @staticmethod
+    def _meta_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def _history_key(session_id: str) -> str:
+        return f"session:{session_id}:history"
+
+    async def _create(self, session_id: str, meta: Dict):
+        ttl = int(self.ttl)
+        pipe = self.redis.pipeline()
+        pipe.delete(self._history_key(session_id))
+        pipe.set(self._meta_key(session_id), json.dumps(meta, ensure_ascii=False), ex=ttl)
+        await pipe.execute()
+
+    async def _get(self, session_id: str) -> Optional[Dict]:
+        raw = await self.redis.get(self._meta_key(session_id))
+        return json.loads(raw) if raw else None
+
+    async def _update(self, session_id: str, fields: Dict):
+        key = self._meta_key(session_id)
+        raw = await self.redis.get(key)
+        if raw:
+            meta = {**json.loads(raw), **fields}
+            await self.redis.set(key, json.dumps(meta, ensure_ascii=False), xx=True, keepttl=True)
+
+    async def _history(self, session_id: str, last: Optional[int]) -> List[HistoryEntry]:
+        start = -last if last else 0
+        raw = await self.redis.lrange(self._history_key(session_id), start, -1)
+        return [HistoryEntry.from_record(json.loads(item)) for item in raw]
+
+    async def _delete(self, session_id: str):
+        await self.redis.delete(self._meta_key(session_id), self._history_key(session_id))
+
+    async def _write_batch(self, batch: List[Tuple[str, HistoryEntry]]):
+        by_session: Dict[str, List[str]] = {}
+        for session_id, entry in batch:
+            by_session.setdefault(session_id, []).append(
+                json.dumps(entry.to_record(), ensure_ascii=False)
+            )
+
+        ttl = int(self.ttl)
+        pipe = self.redis.pipeline()
+        for session_id, items in by_session.items():
+            pipe.rpush(self._history_key(session_id), *items)
+            pipe.expire(self._history_key(session_id), ttl)
+            pipe.expire(self._meta_key(session_id), ttl)
+        await pipe.execute()
+
+    async def close(self):
+        await super().close()
+        await self.redis.aclose()
+
+
+def create_session_store(url: str = SESSION_STORE_URL) -> SessionStore:
+    """Criar o backend indicado pelo URL"""
+
+    if url.startswith("sqlite://"):
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else ""
+        return SQLiteSessionStore(path or DEFAULT_SQLITE_PATH)
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            return RedisSessionStore(url)
+        except ImportError:
+            print("⚠️  SESSION_STORE_URL é Redis mas o pacote redis não está instalado (pip install redis)")
+            print("   A usar sessões em memória")
+            return MemorySessionStore()
+
+    if not url.startswith("memory://"):
+        print(f"⚠️  SESSION_STORE_URL desconhecido ({url}); a usar sessões em memória")
+    return MemorySessionStore()
+
+
+# Store partilhado pelo processo
+session_store = create_session_store()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Static Manifest - Frontend servido a partir de um índice em memória
+O diretório estático é lido uma vez (no arranque): para cada ficheiro ficam
+o conteúdo, o ETag e as variantes gzip/brotli já comprimidas (ou as .gz/.br
+geradas pelo build, se existirem). Por pedido não há acesso ao disco:
+    - bundles com hash no nome (index-QaS0ta3W.js): Cache-Control immutable
+    - restantes (index.html, favicon): revalidação com If-None-Match (304)
+    - rotas do SPA: index.html, com uma consulta ao dicionário
+
+O brotli é opcional (pip install brotli); sem ele só há gzip.
+"""
+
+import os
+import re
+import gzip
+import hashlib
+import mimetypes
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Configuração (via env vars)
+STATIC_DIR = os.getenv("STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "static"))
+STATIC_MIN_COMPRESS = int(os.getenv("STATIC_MIN_COMPRESS", "1024"))   # Abaixo disto não compensa comprimir
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "31536000"))          # Bundles com hash (1 ano)
+
+INDEX_FILE = "index.html"
+IMMUTABLE_CACHE = f"public, max-age={STATIC_MAX_AGE}, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Nome gerado pelo Vite: <nome>-<hash de 8 caracteres>.<ext>
+HASHED_NAME_RE = re.compile(r"-[A-Za-z0-9_-]{8,}\.\w+$")
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+# Caminhos que são ficheiros e nunca devem receber o index.html do SPA
+NO_FALLBACK_PREFIXES = ("assets/",)
+# Preferência quando o cliente aceita várias
+ENCODINGS = ("br", "gzip")
+PRECOMPRESSED_SUFFIXES = {".br": "br", ".gz": "gzip"}
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+class StaticAsset:
+    """Um ficheiro do manifesto e as suas variantes comprimidas"""
+
+    __slots__ = ("path", "body", "content_type", "etag", "cache_control", "variants")
+
+    def __init__(self, path: str, body: bytes, content_type: str, cache_control: str):
+        self.path = path
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.cache_control = cache_control
+        self.variants: Dict[str, bytes] = {}
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        # ETag forte diferente por codificação (os bytes são outros)
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        base = self.etag[1:-1]
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag == base or tag.startswith(base + "-"):
+                return True
+        return False
+
+
+class StaticManifest:
+    """Índice do diretório estático (construído por build())"""
+
+    def __init__(self, root: str = STATIC_DIR, min_compress: int = STATIC_MIN_COMPRESS):
+        self.root = root
+        self.min_compress = min_compress
+        self.assets: Dict[str, StaticAsset] = {}
+        self.index: Optional[StaticAsset] = None
+        self._stats = {"hits": 0, "not_modified": 0, "fallbacks": 0, "not_found": 0}
+
+    def build(self) -> "StaticManifest":
+        """Ler e comprimir todos os ficheiros (uma vez, no arranque)"""
+
+        brotli = _brotli()
+        if brotli is None:
+            print("⚠️  brotli não instalado; ficheiros estáticos só com gzip (pip install brotli)")
+
+        assets: Dict[str, StaticAsset] = {}
+        precompressed: Dict[str, Dict[str, bytes]] = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                full_path = os.path.join(directory, name)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    body = f.read()
+
+                base, suffix = os.path.splitext(path)
+                if suffix in PRECOMPRESSED_SUFFIXES:
+                    precompressed.setdefault(base, {})[PRECOMPRESSED_SUFFIXES[suffix]] = body
+                    continue
+
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type == "application/javascript":
+                    content_type += "; charset=utf-8"
+                hashed = path.startswith(NO_FALLBACK_PREFIXES) and HASHED_NAME_RE.search(name)
+                assets[path] = StaticAsset(path, body, content_type, IMMUTABLE_CACHE if hashed else REVALIDATE_CACHE)
+
+        for asset in assets.values():
+            asset.variants.update(precompressed.get(asset.path, {}))
+            if len(asset.body) < self.min_compress or not asset.content_type.startswith(COMPRESSIBLE_TYPES):
+                continue
+            if "gzip" not in asset.variants:
+                asset.variants["gzip"] = gzip.compress(asset.body, compresslevel=9, mtime=0)
+            if "br" not in asset.variants and brotli is not None:
+                asset.variants["br"] = brotli.compress(asset.body, quality=11)
+            # Só ficam as variantes que são de facto mais pequenas
+            asset.variants = {encoding: body for encoding, body in asset.variants.items() if len(body) < len(asset.body)}
+
+        self.assets = assets
+        self.index = assets.get(INDEX_FILE)
+        if self.index is None:
+            print(f"⚠️  {INDEX_FILE} não encontrado em {self.root}")
+        return self
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """Ficheiro para o caminho pedido (index.html para rotas do SPA)"""
+        path = path.lstrip("/")
+        asset = self.assets.get(path or INDEX_FILE)
+        if asset is not None:
+            self._stats["hits"] += 1
+            return asset
+        if path.startswith(NO_FALLBACK_PREFIXES):
+            self._stats["not_found"] += 1
+            return None
+        self._stats["fallbacks"] += 1
+        return self.index
+
+    def response(self, request: Request, path: str) -> Response:
+        """Resposta para um GET/HEAD do frontend"""
+
+        asset = self.lookup(path)
+        if asset is None:
+            return Response("Não encontrado", status_code=404, media_type="text/plain; charset=utf-8")
+
+        encoding = self._negotiate(asset, request.headers.get("accept-encoding", ""))
+        headers = {"Cache-Control": asset.cache_control, "ETag": asset.variant_etag(encoding)}
+        if asset.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and asset.matches(if_none_match):
+            self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            body = asset.variants[encoding]
+        else:
+            body = asset.body
+        return Response(body if request.method != "HEAD" else b"", media_type=asset.content_type, headers=headers)
+
+    def stats(self) -> Dict:
+        return {
+            "files": len(self.assets),
+            "bytes": sum(len(asset.body) for asset in self.assets.values()),
+            "compressed_bytes": sum(len(body) for asset in self.assets.values() for body in asset.variants.values()),
+            **self._stats
+        }
+
+    @staticmethod
+    def _negotiate(asset: StaticAsset, accept_encoding: str) -> Optional[str]:
+        if not asset.variants or not accept_encoding:
+            return None
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(name.strip())
+        for encoding in ENCODINGS:
+            if encoding in asset.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return None
+
+
+# Manifesto partilhado pelo processo (build() no arranque do servidor)
+static_manifest = StaticManifest()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Token Budget - Contagem de tokens e histórico do prompt dentro de um orçamento
+Usa o tokenizer local do modelo (tiktoken) quando está disponível; sem ele,
+a contagem é uma estimativa por caracteres
+"""
+
+import os
+from typing import List, Sequence
+
+from llm_client import LLM_MODEL
+from conversation_history import HistoryEntry
+
+# Configuração (via env vars)
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "700"))    # Resumo + mensagens recentes
+PROMPT_TURN_MAX_TOKENS = int(os.getenv("PROMPT_TURN_MAX_TOKENS", "120"))  # Por mensagem
+FALLBACK_ENCODING = "o200k_base"
+
+# Estimativa sem tokenizer (texto em português/inglês)
+CHARS_PER_TOKEN = 4
+
+HISTORY_HEADER = "\n\nCONTEXTO DA CONVERSA:\n"
+
+_encoding = None
+_encoding_loaded = False
+
+
+def get_encoding():
+    """
+    Tokenizer do modelo (carregado uma vez)
+
+    Na primeira utilização o tiktoken pode descarregar o vocabulário; por isso
+    o arranque do servidor chama esta função antes de aceitar pedidos.
+    """
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    _encoding_loaded = True
+
+    try:
+        import tiktoken
+    except ImportError:
+        print("⚠️  tiktoken não instalado; contagem de tokens aproximada (pip install tiktoken)")
+        return None
+
+    try:
+        try:
+            _encoding = tiktoken.encoding_for_model(LLM_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding(FALLBACK_ENCODING)
+    except Exception as e:
+        print(f"⚠️  Tokenizer indisponível ({e}); contagem de tokens aproximada")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cortar um texto a max_tokens (com "..." se foi cortado)"""
+    encoding = get_encoding()
+    if encoding is None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        return text if len(text) <= max_chars else text[:max_chars - 3].rstrip() + "..."
+
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # Um corte a meio de um carácter multibyte deixa "�" no fim
+    return encoding.decode(tokens[:max(0, max_tokens - 1)]).rstrip("�").rstrip() + "..."
+
+
+def history_block(
+    summary: str,
+    entries: Sequence[HistoryEntry],
+    budget: int = PROMPT_HISTORY_TOKENS,
+    turn_max_tokens: int = PROMPT_TURN_MAX_TOKENS
+) -> str:
+    """
+    Contexto da conversa para o prompt: resumo + mensagens mais recentes
+
+    O bloco inteiro (cabeçalho incluído) fica dentro de `budget` tokens. O
+    resumo ocupa no máximo metade; as mensagens entram da mais recente para a
+    mais antiga até o orçamento acabar e são apresentadas por ordem.
+    """
+
+    if not summary and not entries:
+        return ""
+
+    header = HISTORY_HEADER
+    if summary:
+        prefix = header + "Resumo da reunião até agora: "
+        suffix = "\nMensagens mais recentes:\n" if entries else "\n"
+        summary_budget = max(0, budget // 2 - count_tokens(prefix + suffix))
+        header = prefix + truncate_tokens(summary, summary_budget) + suffix
+
+    used = count_tokens(header)
+    lines: List[str] = []
+    for entry in reversed(entries):
+        line = f"- {entry.sender_name}: {truncate_tokens(entry.content, turn_max_tokens)}\n"
+        cost = count_tokens(line)
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    lines.reverse()
+
+    block = header + "".join(lines)
+    # Tokens podem fundir-se entre linhas: confirmar o total do bloco
+    while lines and count_tokens(block) > budget:
+        lines.pop(0)
+        block = header + "".join(lines)
+    return block
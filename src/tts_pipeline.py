@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+TTS Pipeline - Síntese de voz frase a frase
+Converte a resposta em áudio enquanto o LLM ainda está a gerar texto
+"""
+
+import os
+import re
+import asyncio
+from typing import List, Optional, AsyncIterator, Tuple
+
+from voice_service import synthesize_agent_audio
+
+# Máximo de sínteses em paralelo por resposta e no processo inteiro
+TTS_PIPELINE_PARALLEL = int(os.getenv("TTS_PIPELINE_PARALLEL", "2"))
+TTS_MAX_PARALLEL = int(os.getenv("TTS_MAX_PARALLEL", "8"))
+
+# Frases mais curtas do que isto juntam-se à seguinte (evita pedidos minúsculos)
+TTS_MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "25"))
+
+# Fim de frase: pontuação final (e aspas/parênteses de fecho) seguida de espaço
+SENTENCE_END = re.compile(r'[.!?…]+["”’»)\]]*\s+')
+
+# Abreviaturas que terminam em ponto mas não fecham a frase
+ABBREVIATIONS = {"sr", "sra", "dr", "dra", "eng", "prof", "etc", "ex", "p.ex", "vs", "nº"}
+
+# Limite global partilhado por todas as pipelines
+_global_semaphore = asyncio.Semaphore(TTS_MAX_PARALLEL)
+
+
+class SentenceSplitter:
+    """Divide texto em streaming em frases completas"""
+
+    def __init__(self, min_chars: int = TTS_MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Acrescentar um fragmento e devolver as frases que ficaram completas
+
+        Args:
+            delta: Novo fragmento de texto
+
+        Returns:
+            Lista de frases completas (pode ser vazia)
+        """
+
+        self._buffer += delta
+        sentences = []
+        start = 0
+
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            last_word = candidate.rstrip('.!?…"”’»)] ').rsplit(" ", 1)[-1].lower()
+
+            if last_word in ABBREVIATIONS or len(candidate) < self.min_chars:
+                continue
+
+            sentences.append(candidate)
+            start = match.end()
+
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Devolver o texto que sobrou no fim do stream"""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
+
+
+class TTSPipeline:
+    """
+    Pipeline de síntese para uma resposta de um agente
+
+    Cada frase completa é enviada ao TTS de imediato; as sínteses correm em
+    paralelo (limitadas), mas os chunks de áudio saem sempre pela ordem das
+    frases, para que a voz do agente nunca fique trocada.
+    """
+
+    def __init__(
+        self,
+        agent_id: str,
+        api_key: str = None,
+        max_parallel: int = TTS_PIPELINE_PARALLEL
+    ):
+        self.agent_id = agent_id
+        self.api_key = api_key
+        self._splitter = SentenceSplitter()
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._closed = False
+
+    def feed(self, delta: str):
+        """Acrescentar texto gerado pelo LLM"""
+        for sentence in self._splitter.feed(delta):
+            self._submit(sentence)
+
+    def close(self):
+        """Marcar o fim do texto (envia a última frase pendente)"""
+        if self._closed:
+            return
+        remainder = self._splitter.flush()
+        if remainder:
+            self._submit(remainder)
+        self._closed = True
+        self._queue.put_nowait(None)
+
+    def _submit(self, sentence: str):
+        task = asyncio.create_task(self._synthesize(sentence))
+        self._queue.put_nowait((sentence, task))
+
+    async def _synthesize(self, sentence: str) -> Optional[bytes]:
+        async with self._semaphore, _global_semaphore:
+            return await synthesize_agent_audio(self.agent_id, sentence, self.api_key)
+
+    async def chunks(self) -> AsyncIterator[Tuple[int, str, Optional[bytes]]]:
+        """
+        Iterar os chunks de áudio pela ordem das frases
+
+        Yields:
+            (sequência, frase, bytes do áudio MP3 ou None)
+        """
+
+        seq = 0
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                break
+            sentence, task = item
+            yield seq, sentence, await task
+            seq += 1
+
+    def cancel(self):
+        """Cancelar sínteses pendentes (ex.: cliente desconectou)"""
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[1].cancel()
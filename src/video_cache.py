@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Video Cache - Cache persistente de vídeos de avatar
+Mapeia (imagem do avatar, áudio ou texto, configuração) para o vídeo renderizado
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from typing import Optional, Dict
+
+from audio_cache import normalize_text
+from persistence import SQLiteConnections
+
+# Configuração (via env vars)
+VIDEO_CACHE_ENABLED = os.getenv("VIDEO_CACHE", "1") != "0"
+VIDEO_CACHE_DB = os.getenv(
+    "VIDEO_CACHE_DB",
+    os.path.join(tempfile.gettempdir(), "staff_ai_video_cache.db")
+)
+# Os result_url do D-ID expiram; vídeos guardados localmente duram mais
+VIDEO_CACHE_TTL = float(os.getenv("VIDEO_CACHE_TTL", str(12 * 3600)))
+VIDEO_CACHE_LOCAL_TTL = float(os.getenv("VIDEO_CACHE_LOCAL_TTL", str(30 * 24 * 3600)))
+VIDEO_CACHE_MAX_ENTRIES = int(os.getenv("VIDEO_CACHE_MAX_ENTRIES", "5000"))
+VIDEO_CACHE_MAX_MB = int(os.getenv("VIDEO_CACHE_MAX_MB", "2048"))
+# Diretório para guardar os MP4 localmente (vazio = guardar só o result_url)
+VIDEO_CACHE_DIR = os.getenv("VIDEO_CACHE_DIR", "")
+
+
+def video_key(
+    image_url: str,
+    config: Dict,
+    audio: Optional[bytes] = None,
+    audio_url: str = None,
+    text: str = None,
+    voice_id: str = None
+) -> str:
+    """
+    Chave de um vídeo
+
+    O conteúdo falado é identificado pelo hash do áudio (se disponível), pelo
+    URL do áudio, ou pelo texto normalizado + voz.
+    """
+
+    if audio is not None:
+        content = ["audio", hashlib.sha256(audio).hexdigest()]
+    elif audio_url:
+        content = ["audio_url", audio_url]
+    else:
+        content = ["text", normalize_text(text or ""), voice_id]
+
+    payload = json.dumps([image_url, content, config], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VideoCache:
+    """
+    Índice SQLite (partilhado entre workers) de vídeos renderizados
+
+    Cada entrada guarda o result_url do D-ID e, opcionalmente, o caminho de
+    uma cópia local do MP4. Expira por TTL e é limitada em número de entradas
+    e em bytes (cópias locais), removendo as menos usadas.
+    """
+
+    def __init__(
+        self,
+        db_path: str = VIDEO_CACHE_DB,
+        ttl: float = VIDEO_CACHE_TTL,
+        local_ttl: float = VIDEO_CACHE_LOCAL_TTL,
+        max_entries: int = VIDEO_CACHE_MAX_ENTRIES,
+        max_bytes: int = VIDEO_CACHE_MAX_MB * 1024 * 1024,
+        local_dir: str = VIDEO_CACHE_DIR
+    ):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.local_dir = local_dir or None
+
+        self._conn = SQLiteConnections(db_path)
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "writes": 0}
+        self._stats_lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                key TEXT PRIMARY KEY,
+                agent_id TEXT,
+                result_url TEXT,
+                local_path TEXT,
+                size INTEGER DEFAULT 0,
+                expires_at REAL,
+                last_used REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_last_used ON videos(last_used)")
+        conn.commit()
+
+    def _count(self, stat: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[stat] += n
+
+    # ------------------------------------------------------------------
+    # API pública (síncrona: chamar com asyncio.to_thread no event loop)
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Procurar um vídeo; devolve {"result_url", "local_path"} ou None"""
+
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT result_url, local_path, expires_at FROM videos WHERE key = ?",
+            (key,)
+        ).fetchone()
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        result_url, local_path, expires_at = row
+        if expires_at < time.time() or (local_path and not os.path.exists(local_path)):
+            self._delete(conn, key, local_path)
+            conn.commit()
+            self._count("expired")
+            self._count("misses")
+            return None
+
+        conn.execute("UPDATE videos SET last_used = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        self._count("hits")
+        return {"result_url": result_url, "local_path": local_path}
+
+    def put(self, key: str, agent_id: str, result_url: str, video: Optional[bytes] = None):
+        """
+        Guardar um vídeo renderizado
+
+        Args:
+            key: Chave (video_key)
+            agent_id: Agente (para estatísticas/limpeza)
+            result_url: URL devolvido pelo D-ID
+            video: Bytes do MP4 para guardar localmente (opcional)
+        """
+
+        local_path = None
+        size = 0
+        if video is not None and self.local_dir:
+            local_path = self.local_path(key)
+            os.makedirs(self.local_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.local_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(video)
+            os.replace(tmp_path, local_path)
+            size = len(video)
+
+        now = time.time()
+        ttl = self.local_ttl if local_path else self.ttl
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, agent_id, result_url, local_path, size, now + ttl, now)
+        )
+        conn.commit()
+        self._count("writes")
+        self._enforce_limits(conn)
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.local_dir or "", f"{key}.mp4")
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        entries, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM videos"
+        ).fetchone()
+        stats["entries"] = entries
+        stats["local_bytes"] = total
+        return stats
+
+    # ------------------------------------------------------------------
+    # Limpeza
+    # ------------------------------------------------------------------
+
+    def _delete(self, conn: sqlite3.Connection, key: str, local_path: Optional[str]):
+        conn.execute("DELETE FROM videos WHERE key = ?", (key,))
+        if local_path:
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+
+    def _enforce_limits(self, conn: sqlite3.Connection):
+        # Expirados primeiro
+        expired = conn.execute(
+            "SELECT key, local_path FROM videos WHERE expires_at < ?",
+            (time.time(),)
+        ).fetchall()
+        for key, local_path in expired:
+            self._delete(conn, key, local_path)
+
+        # Depois os menos usados, até caber nos limites
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM videos"
+        ).fetchone()
+        evicted = 0
+        if entries > self.max_entries or total > self.max_bytes:
+            for key, local_path, size in conn.execute(
+                "SELECT key, local_path, size FROM videos ORDER BY last_used"
+            ).fetchall():
+                if entries <= self.max_entries and total <= self.max_bytes:
+                    break
+                self._delete(conn, key, local_path)
+                entries -= 1
+                total -= size
+                evicted += 1
+
+        conn.commit()
+        if evicted:
+            self._count("evictions", evicted)
+
+
+# Cache partilhado pelo processo
+video_cache = VideoCache() if VIDEO_CACHE_ENABLED else None
@@ -5,21 +5,26 @@ Síntese de voz para os agentes do STAFF AI
 """
 
 import os
-import requests
 import base64
-from typing import Optional
+import asyncio
+from typing import Optional, List, Dict, AsyncIterator
+
+from audio_cache import audio_cache, cache_key, AudioCache
+from http_transport import get_http_client
 
 # API Key do ElevenLabs (configurar via env var)
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1").rstrip("/")
 
 class VoiceService:
     """Serviço de síntese de voz usando ElevenLabs"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, cache: Optional[AudioCache] = audio_cache):
         self.api_key = api_key or ELEVENLABS_API_KEY
-        self.base_url = "https://api.elevenlabs.io/v1"
+        self.base_url = ELEVENLABS_BASE_URL
+        self.cache = cache
         
-    def text_to_speech(
+    async def text_to_speech(
         self,
         text: str,
         voice_id: str,
@@ -45,6 +50,24 @@ class VoiceService:
             Bytes do áudio MP3 ou None se falhar
         """
         
+        voice_settings = {
+            "stability": stability,
+            "similarity_boost": similarity_boost,
+            "style": style,
+            "use_speaker_boost": use_speaker_boost
+        }
+        
+        # Textos iguais com a mesma voz/configuração dão o mesmo áudio
+        key = None
+        if self.cache is not None:
+            key = cache_key(voice_id, model_id, voice_settings, text)
+            cached = self.cache.get_memory(key)
+            if cached is None:
+                # O disco (leitura + utime) fica fora do event loop
+                cached = await asyncio.to_thread(self.cache.get_disk, key)
+            if cached is not None:
+                return cached
+        
         if not self.api_key:
             print("⚠️  ELEVENLABS_API_KEY não configurada")
             return None
@@ -60,18 +83,16 @@ class VoiceService:
         data = {
             "text": text,
             "model_id": model_id,
-            "voice_settings": {
-                "stability": stability,
-                "similarity_boost": similarity_boost,
-                "style": style,
-                "use_speaker_boost": use_speaker_boost
-            }
+            "voice_settings": voice_settings
         }
         
         try:
-            response = requests.post(url, json=data, headers=headers)
+            response = await get_http_client().post(url, json=data, headers=headers)
             
             if response.status_code == 200:
+                if key is not None:
+                    # Escrita em disco fora do event loop
+                    await asyncio.to_thread(self.cache.put, key, response.content)
                 return response.content
             else:
                 print(f"❌ Erro ElevenLabs: {response.status_code}")
@@ -82,7 +103,83 @@ class VoiceService:
             print(f"❌ Erro ao chamar ElevenLabs: {e}")
             return None
     
-    def text_to_speech_base64(
+    async def stream_text_to_speech(
+        self,
+        text: str,
+        voice_id: str,
+        model_id: str = "eleven_multilingual_v2",
+        stability: float = 0.5,
+        similarity_boost: float = 0.75,
+        style: float = 0.0,
+        use_speaker_boost: bool = True
+    ) -> AsyncIterator[bytes]:
+        """
+        Converter texto em áudio em streaming (endpoint /stream do ElevenLabs)
+        
+        Os chunks MP3 chegam à medida que são gerados, por isso a reprodução
+        pode começar no primeiro. Com o áudio em cache sai tudo num chunk;
+        o áudio completo fica em cache no fim (um stream interrompido não).
+        
+        Yields:
+            Chunks do áudio MP3 (nenhum se falhar)
+        """
+        
+        voice_settings = {
+            "stability": stability,
+            "similarity_boost": similarity_boost,
+            "style": style,
+            "use_speaker_boost": use_speaker_boost
+        }
+        
+        key = None
+        if self.cache is not None:
+            key = cache_key(voice_id, model_id, voice_settings, text)
+            cached = self.cache.get_memory(key)
+            if cached is None:
+                # O disco (leitura + utime) fica fora do event loop
+                cached = await asyncio.to_thread(self.cache.get_disk, key)
+            if cached is not None:
+                yield cached
+                return
+        
+        if not self.api_key:
+            print("⚠️  ELEVENLABS_API_KEY não configurada")
+            return
+        
+        url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
+        
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key
+        }
+        
+        data = {
+            "text": text,
+            "model_id": model_id,
+            "voice_settings": voice_settings
+        }
+        
+        chunks = []
+        try:
+            async with get_http_client().stream("POST", url, json=data, headers=headers) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    print(f"❌ Erro ElevenLabs: {response.status_code}")
+                    print(f"   Resposta: {response.text}")
+                    return
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            print(f"❌ Erro ao chamar ElevenLabs (stream): {e}")
+            return
+        
+        if key is not None and chunks:
+            # Escrita em disco fora do event loop
+            await asyncio.to_thread(self.cache.put, key, b"".join(chunks))
+    
+    async def text_to_speech_base64(
         self,
         text: str,
         voice_id: str,
@@ -93,13 +190,13 @@ class VoiceService:
         Útil para enviar via WebSocket/JSON
         """
         
-        audio_bytes = self.text_to_speech(text, voice_id, **kwargs)
+        audio_bytes = await self.text_to_speech(text, voice_id, **kwargs)
         
         if audio_bytes:
             return base64.b64encode(audio_bytes).decode('utf-8')
         return None
     
-    def get_available_voices(self) -> list:
+    async def get_available_voices(self) -> list:
         """Listar vozes disponíveis"""
         
         if not self.api_key:
@@ -109,7 +206,7 @@ class VoiceService:
         headers = {"xi-api-key": self.api_key}
         
         try:
-            response = requests.get(url, headers=headers)
+            response = await get_http_client().get(url, headers=headers)
             if response.status_code == 200:
                 return response.json().get("voices", [])
             return []
@@ -171,7 +268,67 @@ AGENT_VOICES = {
     }
 }
 
-def generate_agent_audio(agent_id: str, text: str, api_key: str = None) -> Optional[str]:
+# Frases curtas que se repetem em quase todas as reuniões
+COMMON_PHRASES = [
+    "Um momento, por favor.",
+    "Boa pergunta.",
+    "Concordo totalmente.",
+    "Vamos avançar para o próximo ponto.",
+    "Obrigado a todos pela participação."
+]
+
+async def prewarm_audio_cache(
+    agents: Optional[List[str]] = None,
+    phrases: Optional[List[str]] = None,
+    api_key: str = None
+) -> Dict:
+    """
+    Preencher o cache de áudio com frases comuns de cada agente
+    
+    Args:
+        agents: IDs dos agentes (por defeito, todos em AGENT_VOICES)
+        phrases: Frases a sintetizar (por defeito, COMMON_PHRASES)
+        api_key: API key do ElevenLabs (opcional)
+        
+    Returns:
+        Estatísticas do cache depois do pré-aquecimento
+    """
+    
+    if audio_cache is None:
+        print("⚠️  Cache de áudio desativado (AUDIO_CACHE=0)")
+        return {}
+    
+    service = get_voice_service(api_key)
+    
+    for agent_id in agents or AGENT_VOICES:
+        voice_config = AGENT_VOICES.get(agent_id)
+        if not voice_config:
+            print(f"⚠️  Agente {agent_id} não tem voz configurada")
+            continue
+        
+        await asyncio.gather(*(
+            service.text_to_speech(
+                text=text,
+                voice_id=voice_config["voice_id"],
+                **voice_config["settings"]
+            )
+            for text in phrases or COMMON_PHRASES
+        ))
+        print(f"🔥 {agent_id}: {len(phrases or COMMON_PHRASES)} frases em cache")
+    
+    return audio_cache.stats()
+
+# Um VoiceService por API key, reutilizado entre turnos
+_services: Dict[Optional[str], VoiceService] = {}
+
+def get_voice_service(api_key: str = None) -> VoiceService:
+    """Obter o VoiceService partilhado para uma API key"""
+    service = _services.get(api_key)
+    if service is None:
+        service = _services[api_key] = VoiceService(api_key)
+    return service
+
+async def synthesize_agent_audio(agent_id: str, text: str, api_key: str = None) -> Optional[bytes]:
     """
     Gerar áudio para um agente específico
     
@@ -181,7 +338,7 @@ def generate_agent_audio(agent_id: str, text: str, api_key: str = None) -> Optio
         api_key: API key do ElevenLabs (opcional)
         
     Returns:
-        Áudio em base64 ou None
+        Bytes do áudio MP3 ou None
     """
     
     voice_config = AGENT_VOICES.get(agent_id)
@@ -189,14 +346,60 @@ def generate_agent_audio(agent_id: str, text: str, api_key: str = None) -> Optio
         print(f"⚠️  Agente {agent_id} não tem voz configurada")
         return None
     
-    service = VoiceService(api_key)
+    service = get_voice_service(api_key)
     
-    return service.text_to_speech_base64(
+    return await service.text_to_speech(
         text=text,
         voice_id=voice_config["voice_id"],
         **voice_config["settings"]
     )
 
+async def stream_agent_audio(agent_id: str, text: str, api_key: str = None) -> AsyncIterator[bytes]:
+    """
+    Gerar áudio para um agente específico, em chunks (streaming)
+    
+    Args:
+        agent_id: ID do agente (elara, aurora, helios, hephaestus, athena)
+        text: Texto para sintetizar
+        api_key: API key do ElevenLabs (opcional)
+        
+    Yields:
+        Chunks do áudio MP3
+    """
+    
+    voice_config = AGENT_VOICES.get(agent_id)
+    if not voice_config:
+        print(f"⚠️  Agente {agent_id} não tem voz configurada")
+        return
+    
+    service = get_voice_service(api_key)
+    
+    async for chunk in service.stream_text_to_speech(
+        text=text,
+        voice_id=voice_config["voice_id"],
+        **voice_config["settings"]
+    ):
+        yield chunk
+
+async def generate_agent_audio(agent_id: str, text: str, api_key: str = None) -> Optional[str]:
+    """
+    Gerar áudio para um agente específico, em base64
+    
+    Args:
+        agent_id: ID do agente (elara, aurora, helios, hephaestus, athena)
+        text: Texto para sintetizar
+        api_key: API key do ElevenLabs (opcional)
+        
+    Returns:
+        Áudio em base64 ou None
+    """
+    
+    audio_bytes = await synthesize_agent_audio(agent_id, text, api_key)
+    
+    if audio_bytes:
+        return base64.b64encode(audio_bytes).decode('utf-8')
+    return None
+
 # Teste
 if __name__ == "__main__":
     print("🎤 Teste de Voice Service")
@@ -209,13 +412,11 @@ if __name__ == "__main__":
         print("   Configure com: export ELEVENLABS_API_KEY='sua_chave'")
         exit(1)
     
-    service = VoiceService(api_key)
-    
     # Testar com Elara
     print("\n🗣️  Testando voz de Elara...")
     text = "Olá! Sou Elara Veyra, CEO da Sentient Sphere Technologies. É um prazer conhecê-lo!"
     
-    audio_base64 = generate_agent_audio("elara", text, api_key)
+    audio_base64 = asyncio.run(generate_agent_audio("elara", text, api_key))
     
     if audio_base64:
         print(f"✅ Áudio gerado com sucesso!")
@@ -1,4 +1,24 @@
 #!/bin/bash
-cd /home/ubuntu/meeting_room_app/src
-python3 server.py
+# Arranque do backend (main.py) com um ou vários workers uvicorn
+#
+#   WEB_CONCURRENCY=4 ./start.sh
+#
+# Com mais de um worker, as mensagens WebSocket entre workers passam pelo
+# message bus. Sem MESSAGE_BUS_URL definido, é lançado um broker local
+# (Unix socket) e as sessões ficam em SQLite partilhado.
+cd "$(dirname "$0")/src"
 
+WORKERS=${WEB_CONCURRENCY:-1}
+PORT=${PORT:-8002}
+
+if [ "$WORKERS" -gt 1 ]; then
+    if [ -z "$MESSAGE_BUS_URL" ]; then
+        export MESSAGE_BUS_URL=unix:///tmp/staff_ai_bus.sock
+        python3 message_bus.py broker /tmp/staff_ai_bus.sock &
+        BROKER_PID=$!
+        trap 'kill $BROKER_PID' EXIT
+    fi
+    export SESSION_STORE_URL=${SESSION_STORE_URL:-sqlite:////tmp/staff_ai_sessions.db}
+fi
+
+python3 -m uvicorn main:app --host 0.0.0.0 --port "$PORT" --workers "$WORKERS"